@@ -0,0 +1,60 @@
+"""
+Time taken by `SSHClient.connect` to a stub server on localhost, in total
+and per phase (see `ConnectTiming`).
+
+Run with ``python -m benchmarks.connect``, or as part of
+``python -m benchmarks.suite``.
+"""
+
+import argparse
+
+from paramiko import AutoAddPolicy
+
+from benchmarks.harness import percentile, report, tcp_server
+from paramiko_stat import ConnectTiming, SSHClient
+
+
+def run(connects=20):
+    totals = []
+    phases = {phase: [] for phase in ConnectTiming.PHASES}
+    with tcp_server() as (host, port):
+        for i in range(connects):
+            client = SSHClient()
+            client.set_missing_host_key_policy(AutoAddPolicy())
+            client.connect(
+                host,
+                port,
+                username="slowdive",
+                password="pygmalion",
+                allow_agent=False,
+                look_for_keys=False,
+            )
+            timing = client.connect_timing
+            client.close()
+            totals.append(timing.total)
+            for phase, duration in timing.durations.items():
+                phases[phase].append(duration)
+    totals.sort()
+    results = {
+        "total.p50": (percentile(totals, 50) * 1000, "ms"),
+        "total.p90": (percentile(totals, 90) * 1000, "ms"),
+    }
+    for phase, samples in phases.items():
+        if samples:
+            samples.sort()
+            results[phase + ".p50"] = (
+                percentile(samples, 50) * 1000,
+                "ms",
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--connects", type=int, default=20)
+    args = parser.parse_args(argv)
+    report(run(connects=args.connects))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Memory use of downloading into memory with ``SFTPClient.open(...).read()``
+and `SFTPClient.getfo` (into a `io.BytesIO`) versus `SFTPClient.get_into`
+(into a preallocated `bytearray`): throughput, the peak of traced Python
+allocations beyond the downloaded data itself, and how far the peak RSS of
+the process grew.
+
+Each measurement runs in a fresh process, since peak RSS never goes back
+down. Run with ``python -m benchmarks.get_into``, or as part of
+``python -m benchmarks.suite``.
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import (
+    add_link_arguments,
+    link_from_arguments,
+    local_path,
+    loopback_sftp,
+    report,
+    scratch_folder,
+)
+
+MODES = ("read", "getfo", "get_into")
+
+MB = 1024.0 * 1024.0
+
+
+def max_rss():
+    """
+    Peak resident set size of this process so far, in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes, except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def download(sftp, mode, path, size):
+    if mode == "read":
+        with sftp.open(path) as f:
+            f.read()
+    elif mode == "getfo":
+        sftp.getfo(path, io.BytesIO())
+    else:
+        sftp.get_into(path, bytearray(size))
+
+
+def measure(mode, size_mb, link):
+    """
+    Download a ``size_mb`` file once in ``mode`` to time it and see how far
+    RSS grows, then again with allocations traced.
+    """
+    size = int(size_mb * MB)
+    with scratch_folder() as remote, loopback_sftp(**link) as sftp:
+        path = remote + "/source"
+        with open(local_path(path), "wb") as f:
+            # A block at a time, to keep it out of the peak RSS
+            for offset in range(0, size, 1 << 20):
+                f.write(os.urandom(min(1 << 20, size - offset)))
+        warm_up = remote + "/small"
+        with open(local_path(warm_up), "wb") as f:
+            f.write(os.urandom(65536))
+        # So that the loopback machinery's own growth isn't counted
+        download(sftp, mode, warm_up, 65536)
+        before = max_rss()
+        start = time.perf_counter()
+        download(sftp, mode, path, size)
+        elapsed = time.perf_counter() - start
+        rss = max_rss() - before
+        tracemalloc.start()
+        download(sftp, mode, path, size)
+        # Beyond the downloaded data itself
+        peak = tracemalloc.get_traced_memory()[1] - size
+        tracemalloc.stop()
+    return {"elapsed": elapsed, "rss": rss, "peak": peak}
+
+
+def run(size_mb=64, link=None):
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.get_into",
+                "--child",
+                mode,
+                "--size-mb",
+                str(size_mb),
+                "--link",
+                json.dumps(link or {}),
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        found = json.loads(output.decode().strip().splitlines()[-1])
+        results[mode + ".throughput"] = (size_mb / found["elapsed"], "MB/s")
+        results[mode + ".peak_alloc"] = (found["peak"] / MB, "MB")
+        results[mode + ".rss_growth"] = (found["rss"] / MB, "MB")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--size-mb", type=float, default=64)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--link", help=argparse.SUPPRESS)
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.child:
+        found = measure(args.child, args.size_mb, json.loads(args.link))
+        print(json.dumps(found))
+        return
+    report(run(size_mb=args.size_mb, link=link_from_arguments(args)))
+
+
+if __name__ == "__main__":
+    main()
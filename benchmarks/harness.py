@@ -0,0 +1,214 @@
+"""
+Loopback SFTP setup shared by the benchmarks.
+
+This mirrors the ``sftp_server`` fixture in ``tests/conftest.py``: an
+in-memory `.StubSFTPServer` on one end of a `.LoopSocket` pair and a
+paramiko_stat `.Transport` on the other, so benchmarks need no real server.
+"""
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from paramiko import RSAKey, SFTPServer
+
+from paramiko_stat import SFTPClient, Transport
+from tests.loop import LoopSocket
+from tests.stub_sftp import StubServer, StubSFTPServer
+from tests.util import _support
+
+
+@contextmanager
+def loopback_transport(**link):
+    """
+    Yield an authenticated client `.Transport` talking to a stub SFTP server
+    over a `.LoopSocket` pair. Keyword arguments (``delay``, ``jitter``,
+    ``bandwidth``, ...) emulate a network link between them; see `.Link`.
+    """
+    sockc, socks = LoopSocket.pair(**link)
+    tc = Transport(sockc)
+    ts = Transport(socks)
+    ts.add_server_key(RSAKey.from_private_key_file(_support("test_rsa.key")))
+    event = threading.Event()
+    ts.set_subsystem_handler("sftp", SFTPServer, StubSFTPServer)
+    ts.start_server(event, StubServer())
+    event.wait(1.0)
+    tc.connect(username="slowdive", password="pygmalion")
+    try:
+        yield tc
+    finally:
+        tc.close()
+        ts.close()
+
+
+@contextmanager
+def loopback_sftp(**link):
+    """
+    Yield an `.SFTPClient` on a fresh loopback transport, over an emulated
+    link if given keyword arguments for one.
+    """
+    with loopback_transport(**link) as tc:
+        sftp = SFTPClient.from_transport(tc)
+        try:
+            yield sftp
+        finally:
+            sftp.close()
+
+
+@contextmanager
+def tcp_server():
+    """
+    Yield the ``(host, port)`` of a stub SSH server (any password, SFTP
+    subsystem) listening on localhost, for measuring real connects. This
+    mirrors the ``ssh_server`` fixture in ``tests/conftest.py``.
+    """
+    host_key = RSAKey.from_private_key_file(_support("test_rsa.key"))
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(64)
+    listener.settimeout(0.1)
+    stopping = threading.Event()
+    transports = []
+
+    def serve():
+        while not stopping.is_set():
+            try:
+                sock, addr = listener.accept()
+            except socket.timeout:
+                continue
+            ts = Transport(sock)
+            ts.add_server_key(host_key)
+            ts.set_subsystem_handler("sftp", SFTPServer, StubSFTPServer)
+            ts.start_server(threading.Event(), StubServer())
+            transports.append(ts)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        yield listener.getsockname()
+    finally:
+        stopping.set()
+        thread.join()
+        listener.close()
+        for ts in transports:
+            ts.close()
+
+
+@contextmanager
+def scratch_folder():
+    """
+    Yield the remote path of an empty folder, removed again afterwards.
+
+    The stub server serves `.StubSFTPServer.ROOT` as ``/``, so the folder is
+    created locally beneath it.
+    """
+    local = tempfile.mkdtemp(prefix="paramiko-bench-", dir=StubSFTPServer.ROOT)
+    try:
+        yield "/" + os.path.basename(local)
+    finally:
+        shutil.rmtree(local, ignore_errors=True)
+
+
+def local_path(remote):
+    """
+    Map a remote path on the stub server back to the local filesystem.
+    """
+    return StubSFTPServer.ROOT + remote
+
+
+def populate(remote, count, size=0):
+    """
+    Create ``count`` files of ``size`` bytes in the remote folder ``remote``
+    (directly on disk, so setup time is not part of any measurement) and
+    return their remote paths.
+    """
+    payload = b"x" * size
+    paths = []
+    for i in range(count):
+        path = "{}/file{:06d}".format(remote, i)
+        with open(local_path(path), "wb") as f:
+            f.write(payload)
+        paths.append(path)
+    return paths
+
+
+def timed(func, *args, **kwargs):
+    """
+    Call ``func`` and return ``(elapsed_seconds, result)``.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def latencies(func, items):
+    """
+    Call ``func`` on each of ``items`` and return the sorted list of
+    per-call durations in seconds.
+    """
+    samples = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        func(item)
+        samples.append(clock() - start)
+    samples.sort()
+    return samples
+
+
+def percentile(samples, q):
+    """
+    Return the ``q``-th percentile (0-100) of the sorted list ``samples``.
+    """
+    index = min(len(samples) - 1, int(round(q / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def best_of(repeat, func, *args, **kwargs):
+    """
+    Call ``func`` ``repeat`` times and return the fastest time in seconds.
+    """
+    return min(timed(func, *args, **kwargs)[0] for i in range(repeat))
+
+
+def report(results, prefix=""):
+    """
+    Print ``{name: (value, unit)}`` results as an aligned table.
+    """
+    for name, (value, unit) in sorted(results.items()):
+        print("{:<40} {:>14.3f} {}".format(prefix + name, value, unit))
+
+
+def add_link_arguments(parser):
+    """
+    Add ``--delay``, ``--jitter`` and ``--bandwidth`` options to an
+    `argparse.ArgumentParser`, for running over an emulated link.
+    """
+    parser.add_argument(
+        "--delay", type=float, default=0, help="one-way delay in ms"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="extra random delay in ms"
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, default=None, help="link speed in MB/s"
+    )
+
+
+def link_from_arguments(args):
+    """
+    Return `loopback_sftp` keyword arguments for the options added by
+    `add_link_arguments` (empty for an unemulated link).
+    """
+    link = {}
+    if args.delay or args.jitter:
+        link.update(delay=args.delay / 1000.0, jitter=args.jitter / 1000.0)
+        # Jitter is reproducible between runs
+        link.update(seed=0)
+    if args.bandwidth:
+        link.update(bandwidth=args.bandwidth * 1024 * 1024)
+    return link
@@ -0,0 +1,67 @@
+"""
+Throughput of listing one large directory with `SFTPClient.listdir`,
+`listdir_attr`, `scandir` and `listdir_columns`, and how much memory
+`listdir_attr` and `listdir_columns` allocate at the peak and keep for the
+result. The peak includes the in-process test server's own listing.
+
+Run with ``python -m benchmarks.listing``, or as part of
+``python -m benchmarks.suite``.
+"""
+
+import argparse
+import tracemalloc
+
+from benchmarks.harness import (
+    add_link_arguments,
+    best_of,
+    link_from_arguments,
+    loopback_sftp,
+    populate,
+    report,
+    scratch_folder,
+)
+
+
+def run(entries=5000, repeat=3, link=None):
+    results = {}
+    with scratch_folder() as remote, loopback_sftp(**link or {}) as sftp:
+        populate(remote, entries)
+        listings = {
+            "listdir": lambda: sftp.listdir(remote),
+            "listdir_attr": lambda: sftp.listdir_attr(remote),
+            "scandir": lambda: [
+                entry.is_dir() for entry in sftp.scandir(remote)
+            ],
+            "listdir_columns": lambda: sftp.listdir_columns(remote),
+        }
+        for name, listing in listings.items():
+            elapsed = best_of(repeat, listing)
+            results[name + ".throughput"] = (entries / elapsed, "entries/s")
+        for name in ("listdir_attr", "listdir_columns"):
+            tracemalloc.start()
+            kept = listings[name]()
+            kept_size, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del kept
+            results[name + ".peak_alloc"] = (peak / 1024.0, "KB")
+            results[name + ".retained"] = (kept_size / 1024.0, "KB")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+    report(
+        run(
+            entries=args.entries,
+            repeat=args.repeat,
+            link=link_from_arguments(args),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
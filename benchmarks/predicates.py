@@ -0,0 +1,74 @@
+"""
+Throughput and latency of the existence predicates (`SFTPClient.exists`,
+`isfile`, `isdir`, `islink` and `lexists`) over a mix of files,
+directories, symlinks and missing paths, with `SFTPClient.exists_many` for
+comparison.
+
+Run with ``python -m benchmarks.predicates``, or as part of
+``python -m benchmarks.suite``.
+"""
+
+import argparse
+import os
+
+from benchmarks.harness import (
+    add_link_arguments,
+    latencies,
+    link_from_arguments,
+    local_path,
+    loopback_sftp,
+    percentile,
+    report,
+    scratch_folder,
+    timed,
+)
+
+PREDICATES = ("exists", "isfile", "isdir", "islink", "lexists")
+
+
+def mixed_paths(remote, count):
+    """
+    Create a quarter each of files, directories and symlinks (to files) in
+    ``remote`` and return their paths plus a quarter of missing ones.
+    """
+    paths = []
+    for i in range(count):
+        path = "{}/p{:06d}".format(remote, i)
+        kind = i % 4
+        if kind == 0:
+            open(local_path(path), "wb").close()
+        elif kind == 1:
+            os.mkdir(local_path(path))
+        elif kind == 2:
+            os.symlink("p{:06d}".format(i - 2), local_path(path))
+        paths.append(path)
+    return paths
+
+
+def run(paths=2000, link=None):
+    results = {}
+    with scratch_folder() as remote, loopback_sftp(**link or {}) as sftp:
+        targets = mixed_paths(remote, paths)
+        for name in PREDICATES:
+            samples = latencies(getattr(sftp, name), targets)
+            results[name + ".throughput"] = (
+                len(samples) / sum(samples),
+                "ops/s",
+            )
+            results[name + ".p50"] = (percentile(samples, 50) * 1000, "ms")
+            results[name + ".p99"] = (percentile(samples, 99) * 1000, "ms")
+        elapsed, _ = timed(sftp.exists_many, targets)
+        results["exists_many.throughput"] = (len(targets) / elapsed, "ops/s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--paths", type=int, default=2000)
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+    report(run(paths=args.paths, link=link_from_arguments(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of `SFTPClient.exists_many` versus its in-flight window.
+
+Run with ``python -m benchmarks.stat_many``. A window of 1 behaves like
+calling `SFTPClient.exists` in a loop; add e.g. ``--delay 10`` to see the
+difference over a link with a 20ms round-trip.
+"""
+
+import argparse
+
+from benchmarks.harness import (
+    add_link_arguments,
+    link_from_arguments,
+    loopback_sftp,
+    populate,
+    scratch_folder,
+    timed,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--paths", type=int, default=2000)
+    parser.add_argument(
+        "--windows", type=int, nargs="+", default=[1, 4, 16, 64, 256]
+    )
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+
+    link = link_from_arguments(args)
+    with scratch_folder() as remote, loopback_sftp(**link) as sftp:
+        existing = populate(remote, args.paths // 2)
+        missing = [
+            "{}/missing{:06d}".format(remote, i)
+            for i in range(args.paths - len(existing))
+        ]
+        paths = existing + missing
+
+        elapsed, _ = timed(lambda: [sftp.exists(p) for p in paths])
+        print("{:>8} {:>12.0f} paths/s".format("loop", len(paths) / elapsed))
+        for window in args.windows:
+            elapsed, result = timed(sftp.exists_many, paths, window=window)
+            assert sum(result.values()) == len(existing)
+            print(
+                "{:>8} {:>12.0f} paths/s".format(window, len(paths) / elapsed)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Run the benchmarks, save their results as JSON and compare them against a
+saved baseline.
+
+Save a baseline, then check a change against it::
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json
+
+Exits with status 1 when any result is worse than the baseline by more
+than ``--threshold`` (a fraction). Results in units per second are better
+when higher; times are better when lower.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import paramiko
+
+from benchmarks import connect, get_into, listing, predicates, transfer
+from benchmarks.harness import add_link_arguments, link_from_arguments
+
+#: name -> (function returning {metric: (value, unit)}, keyword arguments
+#: for a quick run)
+BENCHMARKS = {
+    "predicates": (predicates.run, dict(paths=200)),
+    "listing": (listing.run, dict(entries=500, repeat=1)),
+    "transfer": (transfer.run, dict(size_mb=1, repeat=1)),
+    "connect": (connect.run, dict(connects=3)),
+    "get_into": (get_into.run, dict(size_mb=2)),
+}
+
+#: Benchmarks run over the loopback transport, and so over an emulated link
+#: when one is asked for.
+LINKED = ("predicates", "listing", "transfer", "get_into")
+
+
+def higher_is_better(unit):
+    return unit.endswith("/s")
+
+
+def run(names, quick=False, link=None):
+    """
+    Run the named benchmarks and return the results document: metadata
+    plus ``{"benchmark.metric": {"value": ..., "unit": ...}}``. ``link``
+    sets up an emulated link (see `.Link`) for the loopback benchmarks.
+    """
+    results = {}
+    for name in names:
+        func, quick_kwargs = BENCHMARKS[name]
+        kwargs = dict(quick_kwargs) if quick else {}
+        if name in LINKED:
+            kwargs["link"] = link
+        for metric, (value, unit) in func(**kwargs).items():
+            results[name + "." + metric] = {"value": value, "unit": unit}
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "paramiko": paramiko.__version__,
+            "platform": platform.platform(),
+            "quick": quick,
+            "link": link or {},
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare two results documents.
+
+    :return:
+        a list of ``(name, old, new, change, regressed)`` for every result
+        present in both, ``change`` being the fractional improvement
+        (negative when worse)
+    """
+    rows = []
+    old_results = baseline["results"]
+    for name, new in sorted(results["results"].items()):
+        old = old_results.get(name)
+        if old is None or old["unit"] != new["unit"] or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        if not higher_is_better(new["unit"]):
+            change = -change
+        rows.append(
+            (name, old["value"], new["value"], change, change < -threshold)
+        )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=sorted(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help="benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="run with small workloads"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="fractional slowdown counted as a regression (default: 0.2)",
+    )
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = run(args.only, quick=args.quick, link=link_from_arguments(args))
+    for name, result in sorted(results["results"].items()):
+        print(
+            "{:<44} {:>14.3f} {}".format(name, result["value"], result["unit"])
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    print()
+    regressions = 0
+    for name, old, new, change, regressed in rows:
+        regressions += regressed
+        print(
+            "{:<44} {:>12.3f} -> {:>12.3f} {:>+8.1%}{}".format(
+                name, old, new, change, "  REGRESSION" if regressed else ""
+            )
+        )
+    if regressions:
+        print(
+            "\n{} result(s) regressed by more than {:.0%}".format(
+                regressions, args.threshold
+            )
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Throughput of whole-file transfers with `SFTPClient.get` and
+`SFTPClient.put`.
+
+Run with ``python -m benchmarks.transfer``, or as part of
+``python -m benchmarks.suite``.
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.harness import (
+    add_link_arguments,
+    best_of,
+    link_from_arguments,
+    local_path,
+    loopback_sftp,
+    report,
+    scratch_folder,
+)
+
+
+def run(size_mb=16, repeat=3, link=None):
+    size = size_mb * 1024 * 1024
+    results = {}
+    with scratch_folder() as remote, loopback_sftp(**link or {}) as sftp:
+        source = remote + "/source"
+        with open(local_path(source), "wb") as f:
+            f.write(os.urandom(size))
+        with tempfile.TemporaryDirectory() as local:
+            target = os.path.join(local, "target")
+            elapsed = best_of(repeat, sftp.get, source, target)
+            results["get.throughput"] = (size_mb / elapsed, "MB/s")
+            elapsed = best_of(repeat, sftp.put, target, remote + "/copy")
+            results["put.throughput"] = (size_mb / elapsed, "MB/s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--size-mb", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+    report(
+        run(
+            size_mb=args.size_mb,
+            repeat=args.repeat,
+            link=link_from_arguments(args),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
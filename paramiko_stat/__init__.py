@@ -1,10 +1,19 @@
+from .aio_sftp_client import AsyncSFTPClient
 from .client import SSHClient
+from .connect_timing import ConnectTiming
+from .connection_pool import ConnectionPool, default_pool
 from .sftp_client import SFTP, SFTPClient
+from .sftp_kind import PathKind
 from .transport import Transport
 
 __all__ = [
+    "AsyncSFTPClient",
     "SSHClient",
+    "ConnectTiming",
+    "ConnectionPool",
+    "default_pool",
     "SFTPClient",
     "SFTP",
+    "PathKind",
     "Transport",
 ]
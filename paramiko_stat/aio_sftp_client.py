@@ -0,0 +1,421 @@
+"""
+An asyncio front-end for `.SFTPClient`.
+"""
+
+import asyncio
+import stat
+import threading
+from collections import deque
+
+from paramiko.sftp import (
+    CMD_ATTRS,
+    CMD_CLOSE,
+    CMD_DATA,
+    CMD_FSTAT,
+    CMD_HANDLE,
+    CMD_LSTAT,
+    CMD_NAME,
+    CMD_OPEN,
+    CMD_OPENDIR,
+    CMD_READ,
+    CMD_READDIR,
+    CMD_STAT,
+    CMD_STATUS,
+    SFTP_FLAG_READ,
+    SFTPError,
+    int64,
+)
+from paramiko.sftp_attr import SFTPAttributes
+from paramiko.ssh_exception import SSHException
+
+from .sftp_client import SFTPClient, _names_from_msg
+from .sftp_kind import PathKind
+from .sftp_limits import SFTPLimits
+from .sftp_stat import SFTPStat
+
+
+def _resolve(future, result, error):
+    if not future.done():
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+
+class _AsyncReply:
+    """
+    Hands the reply to one request, read on the reader thread, to the
+    future its coroutine is awaiting on the event loop.
+    """
+
+    __slots__ = ("future", "_loop", "__weakref__")
+
+    def __init__(self, loop):
+        self._loop = loop
+        self.future = loop.create_future()
+
+    def _async_response(self, t, msg, num):
+        self._deliver((t, msg), None)
+
+    def fail(self, error):
+        self._deliver(None, error)
+
+    def _deliver(self, result, error):
+        try:
+            self._loop.call_soon_threadsafe(
+                _resolve, self.future, result, error
+            )
+        except RuntimeError:
+            # The loop has been closed; nobody is waiting any more
+            pass
+
+
+class AsyncSFTPClient:
+    """
+    Awaitable versions of the `.SFTPClient` metadata calls and file reads.
+
+    Requests are sent straight from the event loop and tagged with their
+    request ids; a single reader thread per client reads the replies and
+    resolves the matching futures. Any number of coroutines can therefore
+    have requests in flight on the one channel at the same time, without a
+    thread (or executor slot) per call.
+
+    The wrapped `.SFTPClient` must not be used directly while this is open,
+    since its replies would be read by the wrong party. Use
+    `from_transport` to get an SFTP session of its own.
+    """
+
+    #: Largest ``SSH_FXP_READ`` request made by `AsyncSFTPFile.read`.
+    max_read_size = 32768
+
+    #: Number of ``SSH_FXP_READ`` (or ``SSH_FXP_READDIR``) requests kept in
+    #: flight by a single read (or listing).
+    read_window = 64
+
+    def __init__(self, sftp):
+        """
+        Wrap an open `.SFTPClient`, which this then owns. Reads are sized to
+        the server's limits if the client has asked for them (see
+        `.SFTPClient.query_limits`).
+        """
+        self.sftp = sftp
+        if sftp.limits is not SFTPLimits.DEFAULT:
+            self.max_read_size = sftp.limits.max_read_length
+        self._lock = threading.Lock()
+        self._outstanding = set()
+        self._error = None
+        self._reader = threading.Thread(
+            target=self._read_replies,
+            name="AsyncSFTPClient reader ({})".format(
+                sftp.get_channel().get_name()
+            ),
+            daemon=True,
+        )
+        self._reader.start()
+
+    @classmethod
+    async def from_transport(cls, t):
+        """
+        Open a new SFTP session on the `.Transport` ``t`` (without blocking
+        the event loop), ask for the server's limits and wrap it.
+        """
+        loop = asyncio.get_running_loop()
+        sftp = await loop.run_in_executor(None, SFTPClient.from_transport, t)
+        try:
+            await loop.run_in_executor(None, sftp.query_limits)
+        except Exception:
+            sftp.close()
+            raise
+        return cls(sftp)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Close the SFTP session. Requests still waiting fail with
+        `.SSHException`.
+        """
+        self.sftp.close()
+
+    async def stat(self, path):
+        """
+        Awaitable `.SFTPClient.stat`.
+        """
+        return await self._attrs(CMD_STAT, path)
+
+    async def lstat(self, path):
+        """
+        Awaitable `.SFTPClient.lstat`.
+        """
+        return await self._attrs(CMD_LSTAT, path)
+
+    async def path_kind(self, path):
+        """
+        Awaitable `.SFTPClient.path_kind`.
+        """
+        return await self._path_kind(path, True)
+
+    async def exists(self, path):
+        """
+        Awaitable `.SFTPClient.exists`.
+        """
+        return (await self._path_kind(path, True)).exists
+
+    async def lexists(self, path):
+        """
+        Awaitable `.SFTPClient.lexists`.
+        """
+        return (await self._path_kind(path, False)).lexists
+
+    async def isfile(self, path):
+        """
+        Awaitable `.SFTPClient.isfile`.
+        """
+        return (await self._path_kind(path, True)).is_file
+
+    async def isdir(self, path):
+        """
+        Awaitable `.SFTPClient.isdir`.
+        """
+        return (await self._path_kind(path, True)).is_dir
+
+    async def islink(self, path):
+        """
+        Awaitable `.SFTPClient.islink`.
+        """
+        return (await self._path_kind(path, False)).is_symlink
+
+    async def listdir(self, path="."):
+        """
+        Awaitable `.SFTPClient.listdir`.
+        """
+        return [attr.filename for attr in await self.listdir_attr(path)]
+
+    async def listdir_attr(self, path="."):
+        """
+        Awaitable `.SFTPClient.listdir_attr`, keeping `read_window`
+        ``SSH_FXP_READDIR`` requests in flight.
+        """
+        t, msg = await self._request(CMD_OPENDIR, path)
+        if t != CMD_HANDLE:
+            raise SFTPError("Expected handle")
+        handle = msg.get_binary()
+        entries = []
+        try:
+            pending = deque(
+                self._send(CMD_READDIR, handle)
+                for i in range(self.read_window)
+            )
+            while pending:
+                try:
+                    t, msg = await self._wait(pending.popleft())
+                except EOFError:
+                    continue
+                if t != CMD_NAME:
+                    raise SFTPError("Expected name response")
+                entries.extend(_names_from_msg(msg))
+                pending.append(self._send(CMD_READDIR, handle))
+        finally:
+            await self._request(CMD_CLOSE, handle)
+        return entries
+
+    async def open(self, path):
+        """
+        Open a remote file for reading.
+
+        :return: an `AsyncSFTPFile`, also usable as an async context manager
+        """
+        t, msg = await self._request(
+            CMD_OPEN, path, SFTP_FLAG_READ, SFTPAttributes()
+        )
+        if t != CMD_HANDLE:
+            raise SFTPError("Expected handle")
+        return AsyncSFTPFile(self, msg.get_binary())
+
+    async def read_file(self, path):
+        """
+        Return the whole contents of a remote file.
+        """
+        async with await self.open(path) as f:
+            return await f.read()
+
+    # ...internals...
+
+    async def _attrs(self, t, path, compact=False):
+        t, msg = await self._request(t, path)
+        if t != CMD_ATTRS:
+            raise SFTPError("Expected attributes")
+        if compact:
+            return SFTPStat.from_msg(msg)
+        return SFTPAttributes._from_msg(msg)
+
+    async def _lookup(self, t, path):
+        try:
+            return await self._attrs(t, path, compact=True)
+        except (OSError, IOError):
+            return None
+
+    async def _path_kind(self, path, follow):
+        path_lstat = await self._lookup(CMD_LSTAT, path)
+        if path_lstat is None or not stat.S_ISLNK(path_lstat.st_mode):
+            return PathKind.from_lstat(path_lstat)
+        if not follow:
+            return PathKind(PathKind.SYMLINK, path_lstat, None)
+        path_stat = await self._lookup(CMD_STAT, path)
+        if path_stat is None:
+            return PathKind(PathKind.BROKEN_SYMLINK, path_lstat, None)
+        return PathKind(PathKind.SYMLINK, path_lstat, path_stat)
+
+    async def _request(self, t, *args):
+        return await self._wait(self._send(t, *args))
+
+    def _send(self, t, *args):
+        """
+        Send a request and return the `_AsyncReply` to `_wait` on. Path
+        arguments (``str``) are adjusted for the emulated cwd.
+        """
+        args = [
+            self.sftp._adjust_cwd(arg) if isinstance(arg, str) else arg
+            for arg in args
+        ]
+        reply = _AsyncReply(asyncio.get_running_loop())
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            self._outstanding.add(reply)
+        self.sftp._async_request(reply, t, *args)
+        return reply
+
+    async def _wait(self, reply):
+        try:
+            t, msg = await reply.future
+        finally:
+            with self._lock:
+                self._outstanding.discard(reply)
+        if t == CMD_STATUS:
+            self.sftp._convert_status(msg)
+        return t, msg
+
+    def _read_replies(self):
+        try:
+            while True:
+                self.sftp._read_response()
+        except Exception as e:
+            error = e
+        with self._lock:
+            self._error = SSHException("SFTP session closed: {}".format(error))
+            outstanding = list(self._outstanding)
+        for reply in outstanding:
+            reply.fail(self._error)
+
+
+class AsyncSFTPFile:
+    """
+    A remote file opened for reading by `AsyncSFTPClient.open`.
+    """
+
+    def __init__(self, client, handle):
+        self._client = client
+        self._handle = handle
+        self._pos = 0
+        self._closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def tell(self):
+        """
+        Return the current read position.
+        """
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        """
+        Set the read position, as `io.IOBase.seek` does for ``whence`` 0
+        (start) and 1 (current position).
+        """
+        if whence == 1:
+            offset += self._pos
+        elif whence != 0:
+            raise ValueError("Only whence 0 and 1 are supported")
+        self._pos = offset
+        return self._pos
+
+    async def stat(self):
+        """
+        Retrieve the file's attributes (``SSH_FXP_FSTAT``).
+        """
+        t, msg = await self._client._request(CMD_FSTAT, self._handle)
+        if t != CMD_ATTRS:
+            raise SFTPError("Expected attributes")
+        return SFTPAttributes._from_msg(msg)
+
+    async def read(self, size=-1):
+        """
+        Read up to ``size`` bytes (everything left, if negative), keeping
+        `AsyncSFTPClient.read_window` chunk requests in flight.
+        """
+        if size < 0:
+            size = max((await self.stat()).st_size - self._pos, 0)
+        client = self._client
+        start = self._pos
+        end = start + size
+        chunk = client.max_read_size
+        # (offset, length) still to be requested
+        todo = deque(
+            (offset, min(chunk, end - offset))
+            for offset in range(start, end, chunk)
+        )
+        pending = deque()
+        pieces = {}
+        eof = end
+
+        def fill():
+            while todo and len(pending) < client.read_window:
+                offset, length = todo.popleft()
+                if offset < eof:
+                    reply = client._send(
+                        CMD_READ, self._handle, int64(offset), length
+                    )
+                    pending.append((offset, length, reply))
+
+        fill()
+        while pending:
+            offset, length, reply = pending.popleft()
+            try:
+                t, msg = await client._wait(reply)
+            except EOFError:
+                eof = min(eof, offset)
+            else:
+                if t != CMD_DATA:
+                    raise SFTPError("Expected data")
+                piece = msg.get_string()
+                pieces[offset] = piece
+                if not piece:
+                    eof = min(eof, offset)
+                elif len(piece) < length:
+                    # Short read; ask again for the remainder
+                    todo.appendleft((offset + len(piece), length - len(piece)))
+            fill()
+        data = []
+        offset = start
+        while offset < eof and pieces.get(offset):
+            data.append(pieces[offset])
+            offset += len(pieces[offset])
+        self._pos = offset
+        return b"".join(data)
+
+    async def close(self):
+        """
+        Close the remote file handle.
+        """
+        if not self._closed:
+            self._closed = True
+            await self._client._request(CMD_CLOSE, self._handle)
@@ -24,6 +24,8 @@ from paramiko.client import SSHClient as _SSHClient
 from paramiko.config import SSH_PORT
 from paramiko.ssh_exception import BadHostKeyException, NoValidConnectionsError
 
+from paramiko_stat.connect_timing import ConnectTiming
+from paramiko_stat.happy_eyeballs import race_connect
 from paramiko_stat.transport import Transport
 
 
@@ -52,6 +54,8 @@ class SSHClient(_SSHClient):
         passphrase=None,
         disabled_algorithms=None,
         transport_factory=None,
+        happy_eyeballs_delay=None,
+        timing_callback=None,
     ):
         """
         Connect to an SSH server and authenticate to it.  The server's host key
@@ -129,6 +133,17 @@ class SSHClient(_SSHClient):
             functionality, and algorithm selection) and generates a
             `.Transport` instance to be used by this client. Defaults to
             `.Transport.__init__`.
+        :param float happy_eyeballs_delay:
+            if given, race connection attempts to the host's addresses
+            instead of trying them one after another: a new attempt starts
+            every ``happy_eyeballs_delay`` seconds (or as soon as one fails),
+            alternating between address families, and the first to connect
+            is used (see RFC 8305; 0.25 is a sensible value). ``timeout``
+            then applies to each attempt.
+        :param callable timing_callback:
+            called with the `.ConnectTiming` of this connect once it has
+            succeeded or failed; the same object is kept as
+            ``connect_timing``.
         :raises BadHostKeyException:
             if the server's host key could not be verified.
         :raises AuthenticationException: if authentication failed.
@@ -138,7 +153,7 @@ class SSHClient(_SSHClient):
         :raises NoValidConnectionsError:
             if all valid connection targets for the requested hostname (eg IPv4
             and IPv6) yielded connection-refused or host-unreachable socket
-            errors.
+            errors, or (with ``happy_eyeballs_delay``) any errors at all.
         :raises SSHException:
             if there was any other error connecting or establishing an SSH
             session.
@@ -154,122 +169,153 @@ class SSHClient(_SSHClient):
         .. versionchanged:: 2.12
             Added the ``transport_factory`` argument.
         """
-        if not sock:
-            errors = {}
-            # Try multiple possible address families (e.g. IPv4 vs IPv6)
-            to_try = list(self._families_and_addresses(hostname, port))
-            for af, addr in to_try:
-                try:
-                    sock = socket.socket(af, socket.SOCK_STREAM)
-                    if timeout is not None:
-                        try:
-                            sock.settimeout(timeout)
-                        except Exception:
-                            pass
-                    sock.connect(addr)
-                    # Break out of the loop on success
-                    break
-                except socket.error as e:
-                    # As mentioned in socket docs it is better
-                    # to close sockets explicitly
-                    if sock:
-                        sock.close()
-                    # Raise anything that isn't a straight up connection error
-                    # (such as a resolution error)
-                    if e.errno not in (ECONNREFUSED, EHOSTUNREACH):
-                        raise
-                    # Capture anything else so we know how the run looks once
-                    # iteration is complete. Retain info about which attempt
-                    # this was.
-                    errors[addr] = e
+        timing = self.connect_timing = ConnectTiming(hostname, port)
+        try:
+            if not sock and happy_eyeballs_delay is not None:
+                to_try = list(self._families_and_addresses(hostname, port))
+                timing.mark("dns")
+                sock, errors = race_connect(
+                    to_try, timeout, happy_eyeballs_delay
+                )
+                if sock is None:
+                    raise NoValidConnectionsError(errors)
+                timing.address = sock.getpeername()
+                timing.mark("tcp")
+            elif not sock:
+                errors = {}
+                # Try multiple possible address families (e.g. IPv4 vs IPv6)
+                to_try = list(self._families_and_addresses(hostname, port))
+                timing.mark("dns")
+                for af, addr in to_try:
+                    try:
+                        sock = socket.socket(af, socket.SOCK_STREAM)
+                        if timeout is not None:
+                            try:
+                                sock.settimeout(timeout)
+                            except Exception:
+                                pass
+                        sock.connect(addr)
+                        # Break out of the loop on success
+                        break
+                    except socket.error as e:
+                        # As mentioned in socket docs it is better
+                        # to close sockets explicitly
+                        if sock:
+                            sock.close()
+                        # Raise anything that isn't a straight up connection
+                        # error (such as a resolution error)
+                        if e.errno not in (ECONNREFUSED, EHOSTUNREACH):
+                            raise
+                        # Capture anything else so we know how the run looks
+                        # once iteration is complete. Retain info about which
+                        # attempt this was.
+                        errors[addr] = e
 
-            # Make sure we explode usefully if no address family attempts
-            # succeeded. We've no way of knowing which error is the "right"
-            # one, so we construct a hybrid exception containing all the real
-            # ones, of a subclass that client code should still be watching for
-            # (socket.error)
-            if len(errors) == len(to_try):
-                raise NoValidConnectionsError(errors)
+                # Make sure we explode usefully if no address family
+                # attempts succeeded. We've no way of knowing which error is
+                # the "right" one, so we construct a hybrid exception
+                # containing all the real ones, of a subclass that client
+                # code should still be watching for (socket.error)
+                if len(errors) == len(to_try):
+                    raise NoValidConnectionsError(errors)
+                timing.address = addr
+                timing.mark("tcp")
 
-        if transport_factory is None:
-            transport_factory = Transport
-        t = self._transport = transport_factory(
-            sock,
-            gss_kex=gss_kex,
-            gss_deleg_creds=gss_deleg_creds,
-            disabled_algorithms=disabled_algorithms,
-        )
-        t.use_compression(compress=compress)
-        t.set_gss_host(
-            # t.hostname may be None, but GSS-API requires a target name.
-            # Therefore use hostname as fallback.
-            gss_host=gss_host or hostname,
-            trust_dns=gss_trust_dns,
-            gssapi_requested=gss_auth or gss_kex,
-        )
-        if self._log_channel is not None:
-            t.set_log_channel(self._log_channel)
-        if banner_timeout is not None:
-            t.banner_timeout = banner_timeout
-        if auth_timeout is not None:
-            t.auth_timeout = auth_timeout
-        if channel_timeout is not None:
-            t.channel_timeout = channel_timeout
+            if transport_factory is None:
+                transport_factory = Transport
+            t = self._transport = transport_factory(
+                sock,
+                gss_kex=gss_kex,
+                gss_deleg_creds=gss_deleg_creds,
+                disabled_algorithms=disabled_algorithms,
+            )
+            t.use_compression(compress=compress)
+            t.set_gss_host(
+                # t.hostname may be None, but GSS-API requires a target name.
+                # Therefore use hostname as fallback.
+                gss_host=gss_host or hostname,
+                trust_dns=gss_trust_dns,
+                gssapi_requested=gss_auth or gss_kex,
+            )
+            if self._log_channel is not None:
+                t.set_log_channel(self._log_channel)
+            if banner_timeout is not None:
+                t.banner_timeout = banner_timeout
+            if auth_timeout is not None:
+                t.auth_timeout = auth_timeout
+            if channel_timeout is not None:
+                t.channel_timeout = channel_timeout
 
-        if port == SSH_PORT:
-            server_hostkey_name = hostname
-        else:
-            server_hostkey_name = "[{}]:{}".format(hostname, port)
-        our_server_keys = None
+            if port == SSH_PORT:
+                server_hostkey_name = hostname
+            else:
+                server_hostkey_name = "[{}]:{}".format(hostname, port)
+            our_server_keys = None
 
-        our_server_keys = self._system_host_keys.get(server_hostkey_name)
-        if our_server_keys is None:
-            our_server_keys = self._host_keys.get(server_hostkey_name)
-        if our_server_keys is not None:
-            keytype = our_server_keys.keys()[0]
-            sec_opts = t.get_security_options()
-            other_types = [x for x in sec_opts.key_types if x != keytype]
-            sec_opts.key_types = [keytype] + other_types
+            our_server_keys = self._system_host_keys.get(server_hostkey_name)
+            if our_server_keys is None:
+                our_server_keys = self._host_keys.get(server_hostkey_name)
+            if our_server_keys is not None:
+                keytype = our_server_keys.keys()[0]
+                sec_opts = t.get_security_options()
+                other_types = [x for x in sec_opts.key_types if x != keytype]
+                sec_opts.key_types = [keytype] + other_types
 
-        t.start_client(timeout=timeout)
+            t.start_client(timeout=timeout)
+            banner_received = getattr(t, "banner_received", None)
+            if banner_received is not None:
+                timing.mark("banner", banner_received)
+            timing.mark("kex")
 
-        # If GSS-API Key Exchange is performed we are not required to check the
-        # host key, because the host is authenticated via GSS-API / SSPI as
-        # well as our client.
-        if not self._transport.gss_kex_used:
-            server_key = t.get_remote_server_key()
-            if our_server_keys is None:
-                # will raise exception if the key is rejected
-                self._policy.missing_host_key(
-                    self, server_hostkey_name, server_key
-                )
-            else:
-                our_key = our_server_keys.get(server_key.get_name())
-                if our_key != server_key:
-                    if our_key is None:
-                        our_key = list(our_server_keys.values())[0]
-                    raise BadHostKeyException(hostname, server_key, our_key)
+            # If GSS-API Key Exchange is performed we are not required to
+            # check the host key, because the host is authenticated via
+            # GSS-API / SSPI as well as our client.
+            if not self._transport.gss_kex_used:
+                server_key = t.get_remote_server_key()
+                if our_server_keys is None:
+                    # will raise exception if the key is rejected
+                    self._policy.missing_host_key(
+                        self, server_hostkey_name, server_key
+                    )
+                else:
+                    our_key = our_server_keys.get(server_key.get_name())
+                    if our_key != server_key:
+                        if our_key is None:
+                            our_key = list(our_server_keys.values())[0]
+                        raise BadHostKeyException(
+                            hostname, server_key, our_key
+                        )
+                timing.mark("hostkey")
 
-        if username is None:
-            username = getpass.getuser()
+            if username is None:
+                username = getpass.getuser()
 
-        if key_filename is None:
-            key_filenames = []
-        elif isinstance(key_filename, str):
-            key_filenames = [key_filename]
-        else:
-            key_filenames = key_filename
+            if key_filename is None:
+                key_filenames = []
+            elif isinstance(key_filename, str):
+                key_filenames = [key_filename]
+            else:
+                key_filenames = key_filename
 
-        self._auth(
-            username,
-            password,
-            pkey,
-            key_filenames,
-            allow_agent,
-            look_for_keys,
-            gss_auth,
-            gss_kex,
-            gss_deleg_creds,
-            t.gss_host,
-            passphrase,
-        )
+            self._auth(
+                username,
+                password,
+                pkey,
+                key_filenames,
+                allow_agent,
+                look_for_keys,
+                gss_auth,
+                gss_kex,
+                gss_deleg_creds,
+                t.gss_host,
+                passphrase,
+            )
+            timing.auth_method = getattr(t, "auth_method", None)
+            timing.auth_key = getattr(t, "auth_key", None)
+            timing.mark("auth")
+        except BaseException as e:
+            timing.error = e
+            raise
+        finally:
+            if timing_callback is not None:
+                timing_callback(timing)
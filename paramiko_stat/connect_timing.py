@@ -0,0 +1,84 @@
+"""
+Per-phase timing of `.SSHClient.connect`.
+"""
+
+import time
+
+
+class ConnectTiming:
+    """
+    When each phase of an `.SSHClient.connect` call ended, and how it
+    authenticated.
+
+    The phases, in order, are `PHASES`: name resolution, the TCP connect,
+    receiving the server's banner, key exchange, host key verification and
+    authentication. ``timestamps`` maps each phase that completed to the
+    `time.monotonic` time it ended, and ``durations`` to the seconds it took
+    since the previous one (or since ``started``). Phases that were skipped
+    (``dns`` and ``tcp`` when a socket is passed in, ``hostkey`` after
+    GSS-API key exchange) or not reached are missing from both.
+
+    ``auth_method`` names the method that authenticated (``"publickey"``,
+    ``"password"``, ``"keyboard-interactive"``, ...) and ``auth_key`` holds
+    the fingerprint of the key that did, for public key authentication.
+    ``address`` is the address connected to, and ``error`` the exception
+    that ended a failed connect.
+    """
+
+    PHASES = ("dns", "tcp", "banner", "kex", "hostkey", "auth")
+
+    def __init__(self, hostname, port):
+        self.hostname = hostname
+        self.port = port
+        self.address = None
+        self.auth_method = None
+        self.auth_key = None
+        self.error = None
+        self.started = time.monotonic()
+        self.timestamps = {}
+        self.durations = {}
+        self._last = self.started
+
+    def __repr__(self):
+        phases = " ".join(
+            "{}={:.3f}s".format(phase, self.durations[phase])
+            for phase in self.PHASES
+            if phase in self.durations
+        )
+        return "<ConnectTiming {}:{} {}>".format(
+            self.hostname, self.port, phases
+        )
+
+    @property
+    def total(self):
+        """
+        Seconds from the start of the connect to the end of the last phase
+        completed.
+        """
+        return self._last - self.started
+
+    def mark(self, phase, when=None):
+        """
+        Record that ``phase`` ended at ``when`` (default: now).
+        """
+        if when is None:
+            when = time.monotonic()
+        self.timestamps[phase] = when
+        self.durations[phase] = when - self._last
+        self._last = when
+
+    def as_dict(self):
+        """
+        Return the durations and authentication details as a flat `dict`,
+        for feeding to metrics systems.
+        """
+        result = dict(self.durations)
+        result.update(
+            hostname=self.hostname,
+            port=self.port,
+            total=self.total,
+            auth_method=self.auth_method,
+            auth_key=self.auth_key,
+            error=None if self.error is None else repr(self.error),
+        )
+        return result
@@ -0,0 +1,330 @@
+"""
+A pool of authenticated SSH connections, shared between tasks talking to the
+same hosts.
+"""
+
+import atexit
+import getpass
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from paramiko.config import SSH_PORT
+from paramiko.ssh_exception import SSHException
+
+from .client import SSHClient
+
+
+def _identity(hostname, port, username, kwargs):
+    """
+    Return the pool key for a connection: who we connect to, as whom, and
+    with which credentials. Secrets are only kept as digests.
+    """
+    pkey = kwargs.get("pkey")
+    key_filename = kwargs.get("key_filename")
+    if isinstance(key_filename, str):
+        key_filename = (key_filename,)
+    elif key_filename is not None:
+        key_filename = tuple(key_filename)
+    password = kwargs.get("password")
+    if password is not None:
+        password = hashlib.sha256(password.encode("utf-8")).hexdigest()
+    return (
+        hostname,
+        port,
+        username,
+        pkey.fingerprint if pkey is not None else None,
+        key_filename,
+        password,
+        kwargs.get("allow_agent", True),
+        kwargs.get("look_for_keys", True),
+        kwargs.get("gss_auth", False),
+    )
+
+
+class _Connection:
+    __slots__ = ("client", "key", "host", "idle_since", "_sessions")
+
+    def __init__(self, client, key, host):
+        self.client = client
+        self.key = key
+        self.host = host
+        self.idle_since = None
+        self._sessions = None
+
+    def alive(self):
+        t = self.client.get_transport()
+        return t is not None and t.is_active()
+
+    def sessions(self):
+        if self._sessions is None:
+            t = self.client.get_transport()
+            self._sessions = t.open_sftp_pool(max_size=1)
+        return self._sessions
+
+    def close(self):
+        if self._sessions is not None:
+            self._sessions.close()
+        self.client.close()
+
+
+class ConnectionPool:
+    """
+    Reuses connected, authenticated `.SSHClient` objects between tasks.
+
+    Connections are keyed by host, port, username and the credentials used
+    (key fingerprint, key files, a digest of the password and the agent and
+    key-lookup flags), so a connection is only handed to callers that would
+    have authenticated the same way. Each connection is used by one caller
+    at a time; at most ``max_per_host`` are open to one ``(host, port)``,
+    further callers waiting (up to ``timeout`` seconds) for one to be
+    returned. When the limit is reached, an idle connection to the same host
+    made with other credentials is closed to make room.
+
+    Idle connections send a keepalive every ``keepalive`` seconds, and are
+    closed once idle for ``idle_timeout`` seconds or found dead. That
+    happens on every checkout, or when `reap` is called.
+
+    The counters ``hits`` (connections reused), ``misses`` (connections
+    made), ``evictions``, ``exhausted`` (checkouts that had to wait) and
+    ``wait_time`` (total seconds waited) show how well the pool works.
+
+    See `default_pool` for a process-wide instance.
+    """
+
+    def __init__(
+        self,
+        max_per_host=4,
+        idle_timeout=300.0,
+        keepalive=30,
+        timeout=None,
+        client_factory=None,
+    ):
+        """
+        :param int max_per_host: most connections open to one host and port
+        :param float idle_timeout: seconds after which idle connections close
+        :param int keepalive:
+            seconds between keepalive packets on quiet connections (0 to
+            turn them off)
+        :param float timeout:
+            seconds to wait for a connection when ``max_per_host`` are in use
+            (``None`` waits forever)
+        :param callable client_factory:
+            returns a new, unconnected `.SSHClient` with its host key policy
+            set up; by default one with the system host keys loaded
+        """
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.client_factory = client_factory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.exhausted = 0
+        self.wait_time = 0.0
+        self._lock = threading.Condition()
+        # key -> idle connections, most recently returned last
+        self._idle = {}
+        # (hostname, port) -> connections open or being opened
+        self._counts = {}
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def client(self, hostname, port=SSH_PORT, username=None, **kwargs):
+        """
+        Check out a connected `.SSHClient` for the duration of a ``with``
+        block, connecting if no idle one matches.
+
+        The arguments are those of `.SSHClient.connect`; all but the ones
+        naming the host and credentials only matter when a new connection
+        is made. The client must not be closed by the caller.
+        """
+        conn = self._checkout(hostname, port, username, kwargs)
+        try:
+            yield conn.client
+        finally:
+            self._checkin(conn)
+
+    @contextmanager
+    def sftp(self, hostname, port=SSH_PORT, username=None, **kwargs):
+        """
+        Like `client`, but yield an `.SFTPClient` on the pooled connection.
+        The SFTP session is kept open with the connection for reuse.
+        """
+        conn = self._checkout(hostname, port, username, kwargs)
+        try:
+            with conn.sessions().session() as sftp:
+                yield sftp
+        finally:
+            self._checkin(conn)
+
+    def reap(self):
+        """
+        Close connections that are dead or have been idle for longer than
+        ``idle_timeout``.
+        """
+        with self._lock:
+            stale = self._reap()
+        for conn in stale:
+            conn.close()
+
+    def close(self):
+        """
+        Close all idle connections; connections in use are closed when they
+        are returned.
+        """
+        with self._lock:
+            self._closed = True
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+            for conn in idle:
+                self._counts[conn.host] -= 1
+            self._lock.notify_all()
+        for conn in idle:
+            conn.close()
+
+    # ...internals...
+
+    def _checkout(self, hostname, port, username, kwargs):
+        if username is None:
+            username = getpass.getuser()
+        key = _identity(hostname, port, username, kwargs)
+        host = (hostname, port)
+        start = time.monotonic()
+        waited = False
+        while True:
+            stale = []
+            conn = None
+            claimed = False
+            with self._lock:
+                if self._closed:
+                    raise SSHException("Connection pool is closed")
+                stale.extend(self._reap())
+                idle = self._idle.get(key)
+                if idle:
+                    conn = idle.pop()
+                    self.hits += 1
+                    self.wait_time += time.monotonic() - start
+                elif self._counts.get(host, 0) < self.max_per_host:
+                    self._counts[host] = self._counts.get(host, 0) + 1
+                    self.misses += 1
+                    claimed = True
+                    self.wait_time += time.monotonic() - start
+                else:
+                    other = self._oldest_idle(host)
+                    if other is not None:
+                        self._evict(other)
+                        stale.append(other)
+                    elif not stale:
+                        if not waited:
+                            self.exhausted += 1
+                            waited = True
+                        remaining = None
+                        if self.timeout is not None:
+                            remaining = start + self.timeout - time.monotonic()
+                            if remaining <= 0:
+                                raise SSHException(
+                                    "Timed out waiting for a connection to "
+                                    "{}:{}".format(hostname, port)
+                                )
+                        self._lock.wait(remaining)
+                        continue
+            for old in stale:
+                old.close()
+            if conn is not None:
+                return conn
+            if claimed:
+                return self._connect(key, host, username, kwargs)
+            # Otherwise connections were closed, perhaps making room for a
+            # new one; go round again
+
+    def _connect(self, key, host, username, kwargs):
+        if self.client_factory is not None:
+            client = self.client_factory()
+        else:
+            client = SSHClient()
+            client.load_system_host_keys()
+        try:
+            client.connect(host[0], host[1], username, **kwargs)
+            if self.keepalive:
+                client.get_transport().set_keepalive(self.keepalive)
+        except Exception:
+            client.close()
+            self._release(host)
+            raise
+        return _Connection(client, key, host)
+
+    def _checkin(self, conn):
+        if self._closed or not conn.alive():
+            conn.close()
+            self._release(conn.host)
+            return
+        with self._lock:
+            conn.idle_since = time.monotonic()
+            self._idle.setdefault(conn.key, []).append(conn)
+            self._lock.notify_all()
+
+    def _release(self, host):
+        with self._lock:
+            self._counts[host] -= 1
+            self._lock.notify_all()
+
+    def _evict(self, conn):
+        self._idle[conn.key].remove(conn)
+        if not self._idle[conn.key]:
+            del self._idle[conn.key]
+        self._counts[conn.host] -= 1
+        self.evictions += 1
+        self._lock.notify_all()
+
+    def _reap(self):
+        """
+        Evict dead and expired idle connections, returning them to be
+        closed once the lock is released.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        stale = [
+            conn
+            for conns in self._idle.values()
+            for conn in conns
+            if conn.idle_since < deadline or not conn.alive()
+        ]
+        for conn in stale:
+            self._evict(conn)
+        return stale
+
+    def _oldest_idle(self, host):
+        candidates = [
+            conn
+            for conns in self._idle.values()
+            for conn in conns
+            if conn.host == host
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda conn: conn.idle_since)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool():
+    """
+    Return the process-wide `ConnectionPool`, creating it (with default
+    settings) on first use. Its connections are closed at exit.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
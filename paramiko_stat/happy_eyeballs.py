@@ -0,0 +1,109 @@
+"""
+Racing TCP connection attempts across addresses, as in RFC 8305 ("Happy
+Eyeballs"), for `.SSHClient.connect`.
+"""
+
+import errno
+import os
+import selectors
+import socket
+import time
+
+_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN)
+
+
+def interleave(to_try):
+    """
+    Reorder ``(family, address)`` pairs so that address families alternate,
+    starting with the family of the first pair (the resolver's preference)
+    and otherwise keeping the resolver's order.
+    """
+    by_family = {}
+    for af, addr in to_try:
+        by_family.setdefault(af, []).append((af, addr))
+    queues = list(by_family.values())
+    ordered = []
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def race_connect(to_try, timeout=None, delay=0.25):
+    """
+    Connect a TCP socket to whichever of the ``(family, address)`` pairs in
+    ``to_try`` answers first.
+
+    Attempts are started in `interleave` order, each ``delay`` seconds after
+    the one before or as soon as an attempt fails, whichever is sooner. The
+    first to complete wins and the others are abandoned.
+
+    :param float timeout:
+        seconds each attempt may take (``None`` for no limit); the winning
+        socket is left with this timeout set
+    :return:
+        ``(sock, errors)``, ``sock`` being the connected socket or ``None``
+        if every attempt failed, and ``errors`` a dict mapping each address
+        that failed to its exception
+    """
+    addresses = interleave(to_try)
+    errors = {}
+    # socket -> (address, deadline)
+    pending = {}
+    winner = None
+    selector = selectors.DefaultSelector()
+    next_start = time.monotonic()
+    try:
+        while winner is None and (addresses or pending):
+            now = time.monotonic()
+            if addresses and (now >= next_start or not pending):
+                af, addr = addresses.pop(0)
+                next_start = now + delay
+                sock = socket.socket(af, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                err = sock.connect_ex(addr)
+                if err == 0:
+                    winner = sock
+                elif err in _IN_PROGRESS:
+                    deadline = None if timeout is None else now + timeout
+                    pending[sock] = (addr, deadline)
+                    selector.register(sock, selectors.EVENT_WRITE)
+                else:
+                    sock.close()
+                    errors[addr] = socket.error(err, os.strerror(err))
+                    next_start = now
+                continue
+            wait = [deadline for addr, deadline in pending.values()]
+            if addresses:
+                wait.append(next_start)
+            wait = [deadline for deadline in wait if deadline is not None]
+            wait = max(min(wait) - now, 0) if wait else None
+            for key, events in selector.select(wait):
+                sock = key.fileobj
+                selector.unregister(sock)
+                addr, deadline = pending.pop(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err == 0 and winner is None:
+                    winner = sock
+                    continue
+                sock.close()
+                if err:
+                    errors[addr] = socket.error(err, os.strerror(err))
+                    next_start = now
+            now = time.monotonic()
+            for sock, (addr, deadline) in list(pending.items()):
+                if deadline is not None and deadline <= now:
+                    selector.unregister(sock)
+                    del pending[sock]
+                    sock.close()
+                    errors[addr] = socket.timeout("timed out")
+                    next_start = now
+    finally:
+        for sock in pending:
+            sock.close()
+        selector.close()
+    if winner is not None:
+        winner.setblocking(True)
+        winner.settimeout(timeout)
+    return winner, errors
@@ -0,0 +1,116 @@
+"""
+Bounded, time-limited cache of stat results for `.SFTPClient`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+#: Returned by `StatCache.get` when nothing usable is cached for a path.
+MISSING = object()
+
+
+class StatCache:
+    """
+    An LRU cache of ``stat``/``lstat`` results keyed by (remote path,
+    whether symlinks were followed).
+
+    Positive results (`.SFTPStat` tuples, as `.SFTPClient` stores them)
+    live for ``ttl`` seconds; negative results (the path could not be
+    stat'ed, stored as ``None``) live for ``negative_ttl`` seconds, which may
+    be ``0`` to not cache them at all.
+    Once more than ``max_entries`` results are held, the least recently used
+    one is evicted.
+
+    The ``hits``, ``negative_hits``, ``misses``, ``expirations`` and
+    ``evictions`` counters are there to help size the cache.
+    """
+
+    def __init__(self, ttl=1.0, max_entries=4096, negative_ttl=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_entries = max_entries
+        # (path, follow) -> (expiry, attr)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path, follow, count_miss=True):
+        """
+        Return the cached result for ``path`` (an `.SFTPStat`, or ``None``
+        for a cached failure), or `MISSING`. Without ``count_miss``, not
+        finding one isn't counted in ``misses``, for a caller that will try
+        the other key next.
+        """
+        key = (path, follow)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return MISSING
+            expiry, attr = entry
+            if expiry <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                if count_miss:
+                    self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            if attr is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+        return attr
+
+    def put(self, path, follow, attr):
+        """
+        Remember ``attr`` (``None`` for a failure) as the result for ``path``.
+        """
+        ttl = self.ttl if attr is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        key = (path, follow)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, attr)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, path, recursive=False):
+        """
+        Forget everything cached for ``path``, and with ``recursive`` also
+        for anything beneath it.
+        """
+        with self._lock:
+            self._entries.pop((path, True), None)
+            self._entries.pop((path, False), None)
+            if recursive:
+                prefix = path.rstrip(b"/") + b"/"
+                stale = [k for k in self._entries if k[0].startswith(prefix)]
+                for key in stale:
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Forget all cached results. The counters are left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def reset_counters(self):
+        """
+        Zero the hit/miss/expiration/eviction counters.
+        """
+        self.hits = self.negative_hits = self.misses = 0
+        self.expirations = self.evictions = 0
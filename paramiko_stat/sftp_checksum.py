@@ -0,0 +1,202 @@
+"""
+Hashing remote files where they are, for `.SFTPClient.checksum`.
+"""
+
+import hashlib
+import re
+import shlex
+
+from paramiko.sftp import (
+    CMD_CLOSE,
+    CMD_EXTENDED,
+    CMD_EXTENDED_REPLY,
+    CMD_HANDLE,
+    CMD_OPEN,
+    CMD_STATUS,
+    SFTP_FLAG_READ,
+    SFTPError,
+    int64,
+)
+from paramiko.sftp_attr import SFTPAttributes
+
+#: The command computing each algorithm's digest on servers without the
+#: ``check-file`` extension (from GNU coreutils).
+HASH_COMMANDS = {
+    "md5": "md5sum",
+    "sha1": "sha1sum",
+    "sha224": "sha224sum",
+    "sha256": "sha256sum",
+    "sha384": "sha384sum",
+    "sha512": "sha512sum",
+}
+
+#: Most paths (and bytes of paths) hashed by one command in a batch.
+EXEC_BATCH_PATHS = 64
+EXEC_BATCH_BYTES = 32768
+
+_escape = re.compile(rb"\\(.)")
+_unescaped = {b"n": b"\n", b"r": b"\r"}
+
+
+class _FileChecksum:
+    """
+    Hashes ranges of one file with the ``check-file`` extension
+    (``SSH_FXP_OPEN``, one ``check-file`` request per range,
+    ``SSH_FXP_CLOSE``) by reacting to replies as
+    `.SFTPClient._read_response` hands them over, so that many files can be
+    hashed at once over one channel.
+
+    When ``done`` is set, either ``digests`` holds a digest per range or
+    ``error`` the exception that stopped it. Ranges the server opened the
+    file for but wouldn't hash (paramiko's own server refuses anything under
+    256 bytes, for one) are left ``None`` in ``digests`` and listed in
+    ``refused``.
+    """
+
+    def __init__(self, client, path, algo, ranges):
+        self.path = path
+        self.digests = [None] * len(ranges)
+        self.error = None
+        self.refused = []
+        self.done = False
+        self._client = client
+        self._algo = algo
+        self._ranges = ranges
+        self._handle = None
+        self._checks = {}
+        self._close_num = None
+        client._async_request(
+            self, CMD_OPEN, path, SFTP_FLAG_READ, SFTPAttributes()
+        )
+
+    def _async_response(self, t, msg, num):
+        if num == self._close_num:
+            # Nothing useful to do about a failed close
+            self.done = True
+            return
+        try:
+            if self._handle is None:
+                if t == CMD_STATUS:
+                    self._client._convert_status(msg)
+                if t != CMD_HANDLE:
+                    raise SFTPError("Expected handle")
+                self._handle = msg.get_binary()
+                for i, (offset, length) in enumerate(self._ranges):
+                    check_num = self._client._async_request(
+                        self,
+                        CMD_EXTENDED,
+                        "check-file",
+                        self._handle,
+                        self._algo,
+                        int64(offset),
+                        int64(length),
+                        0,
+                    )
+                    self._checks[check_num] = i
+            else:
+                i = self._checks.pop(num)
+                if t == CMD_STATUS:
+                    # Hashing failed or isn't possible; let the caller
+                    # find another way
+                    self.refused.append(i)
+                elif t != CMD_EXTENDED_REPLY:
+                    raise SFTPError("Expected extended reply")
+                else:
+                    msg.get_text()  # extension
+                    msg.get_text()  # algorithm
+                    # No hash at all means the range held no data
+                    self.digests[i] = (
+                        msg.get_remainder() or hashlib.new(self._algo).digest()
+                    )
+        except (OSError, IOError, SFTPError) as e:
+            self.error = self.error or e
+            if self._handle is None:
+                self.done = True
+                return
+        if not self._checks:
+            self._close_num = self._client._async_request(
+                self, CMD_CLOSE, self._handle
+            )
+
+
+def run_command(transport, command):
+    """
+    Run ``command`` over a new exec channel of ``transport``.
+
+    :return: ``(exit status, stdout, stderr)``, the output as bytes
+    """
+    channel = transport.open_session()
+    try:
+        channel.exec_command(command)
+        stdout = channel.makefile("rb").read()
+        stderr = channel.makefile_stderr("rb").read()
+        return channel.recv_exit_status(), stdout, stderr
+    finally:
+        channel.close()
+
+
+def hash_command(algo, path, offset=0, length=0):
+    """
+    Return a shell command printing the digest of ``length`` bytes (0 for
+    all) of ``path`` from ``offset`` on, failing if it can't be read.
+    """
+    program = HASH_COMMANDS[algo]
+    quoted = shlex.quote(path)
+    if not offset and not length:
+        return "{} -- {}".format(program, quoted)
+    command = "tail -c +{} -- {}".format(offset + 1, quoted)
+    if length:
+        command += " | head -c {}".format(length)
+    return "[ -r {0} ] && [ ! -d {0} ] && {1} | {2}".format(
+        quoted, command, program
+    )
+
+
+def batch_commands(algo, paths):
+    """
+    Split ``paths`` into batches small enough for one command line each,
+    and yield ``(command, batch)`` for each.
+    """
+    program = HASH_COMMANDS[algo]
+    batch = []
+    quoted = []
+    size = 0
+    for path in paths:
+        if batch and (
+            len(batch) >= EXEC_BATCH_PATHS or size > EXEC_BATCH_BYTES
+        ):
+            yield "{} -- {}".format(program, " ".join(quoted)), batch
+            batch = []
+            quoted = []
+            size = 0
+        batch.append(path)
+        quoted.append(shlex.quote(path))
+        size += len(quoted[-1]) + 1
+    if batch:
+        yield "{} -- {}".format(program, " ".join(quoted)), batch
+
+
+def parse_sums(output):
+    """
+    Parse the output of ``sha256sum`` and friends into ``{name: digest}``,
+    undoing the escaping of names holding backslashes or newlines.
+    """
+    sums = {}
+    for line in output.split(b"\n"):
+        escaped = line.startswith(b"\\")
+        if escaped:
+            line = line[1:]
+        digest, sep, name = line.partition(b" ")
+        if not sep or not name:
+            continue
+        # " " for text mode, "*" for binary
+        name = name[1:]
+        if escaped:
+            name = _escape.sub(
+                lambda m: _unescaped.get(m.group(1), m.group(1)), name
+            )
+        try:
+            sums[name.decode("utf-8")] = bytes.fromhex(digest.decode())
+        except (UnicodeDecodeError, ValueError):
+            continue
+    return sums
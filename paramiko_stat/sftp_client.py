@@ -16,13 +16,449 @@
 # along with Paramiko; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA.
 
+import errno
+import os
+import posixpath
 import stat
+import sys
+from collections import deque
 
-from paramiko.common import DEBUG
+from paramiko.common import DEBUG, o777
+from paramiko.message import Message
+from paramiko.sftp import (
+    _VERSION,
+    CMD_ATTRS,
+    CMD_CLOSE,
+    CMD_EXTENDED,
+    CMD_EXTENDED_REPLY,
+    CMD_HANDLE,
+    CMD_INIT,
+    CMD_LSTAT,
+    CMD_MKDIR,
+    CMD_NAME,
+    CMD_OPENDIR,
+    CMD_READDIR,
+    CMD_REMOVE,
+    CMD_RMDIR,
+    CMD_STAT,
+    CMD_STATUS,
+    CMD_VERSION,
+    SFTPError,
+)
+from paramiko.sftp_attr import SFTPAttributes
 from paramiko.sftp_client import SFTPClient as _SFTPClient
+from paramiko.util import asbytes
+
+from .sftp_cache import MISSING, StatCache
+from .sftp_checksum import (
+    HASH_COMMANDS,
+    _FileChecksum,
+    batch_commands,
+    hash_command,
+    parse_sums,
+    run_command,
+)
+from .sftp_columns import DirColumns
+from .sftp_dirent import SFTPDirEntry
+from .sftp_glob import RECURSIVE, split_pattern
+from .sftp_kind import PathKind
+from .sftp_limits import SFTPLimits
+from .sftp_metrics import SFTPMetrics
+from .sftp_stat import SFTPStat
+from .sftp_sync import DOWNLOAD, UPLOAD, _Sync
+from .sftp_transfer import (
+    CHECKPOINT_SUFFIX,
+    PARTIAL_SUFFIX,
+    UPLOAD_CHECKPOINT_SUFFIX,
+    BufferDownload,
+    Checkpoint,
+    ParallelDownload,
+    ParallelUpload,
+    preallocate,
+    split_ranges,
+)
+
+
+class _ResponseCollector:
+    """
+    Holder for replies to pipelined requests.
+
+    `SFTPClient._read_response` hands every reply it reads to the object that
+    was registered for that request number, so all this has to do is keep
+    them around until the caller gets to them.
+    """
+
+    def __init__(self):
+        self.replies = {}
+
+    def _async_response(self, t, msg, num):
+        self.replies[num] = (t, msg)
+
+
+def _ancestors(path):
+    """
+    Return ``path`` and each of its parents, outermost first, leaving out the
+    root and anything ending in ``'.'`` or ``'..'`` (which must exist).
+    """
+    parts = posixpath.normpath(path).split("/")
+    return [
+        "/".join(parts[: i + 1])
+        for i, part in enumerate(parts)
+        if part not in ("", ".", "..")
+    ]
+
+
+def _names_from_msg(msg):
+    """
+    Parse an ``SSH_FXP_NAME`` reply to ``SSH_FXP_READDIR`` into a list of
+    `.SFTPAttributes`, leaving out ``'.'`` and ``'..'``.
+    """
+    entries = []
+    for i in range(msg.get_int()):
+        filename = msg.get_text()
+        longname = msg.get_text()
+        attr = SFTPAttributes._from_msg(msg, filename, longname)
+        if (filename != ".") and (filename != ".."):
+            entries.append(attr)
+    return entries
+
+
+class _DirListing:
+    """
+    Lists one directory (``SSH_FXP_OPENDIR``, ``SSH_FXP_READDIR`` until EOF,
+    ``SSH_FXP_CLOSE``) by reacting to replies as `SFTPClient._read_response`
+    hands them over, so that many directories can be read at once over one
+    channel.
+
+    When ``done`` is set, either ``entries`` holds the directory's
+    `.SFTPAttributes` or ``error`` the exception that stopped it.
+    """
+
+    def __init__(self, client, path, read_aheads):
+        self.path = path
+        self.entries = []
+        self.error = None
+        self.done = False
+        self._client = client
+        self._read_aheads = read_aheads
+        self._handle = None
+        self._reads = 0
+        self._eof = False
+        self._close_num = None
+        client._async_request(self, CMD_OPENDIR, path)
+
+    def abandon(self):
+        """
+        Stop reading; the handle is still closed once outstanding reads are
+        answered.
+        """
+        self._eof = True
+
+    def _async_response(self, t, msg, num):
+        if num == self._close_num:
+            # Nothing useful to do about a failed close
+            self.done = True
+            return
+        if self._handle is not None:
+            self._reads -= 1
+        try:
+            if t == CMD_STATUS:
+                self._client._convert_status(msg)
+            if self._handle is None:
+                if t != CMD_HANDLE:
+                    raise SFTPError("Expected handle")
+                self._handle = msg.get_binary()
+                for i in range(self._read_aheads):
+                    self._read()
+            else:
+                if t != CMD_NAME:
+                    raise SFTPError("Expected name response")
+                self.entries.extend(_names_from_msg(msg))
+                self._read()
+        except EOFError:
+            self._eof = True
+        except (OSError, IOError, SFTPError) as e:
+            self.error = self.error or e
+            self._eof = True
+            if self._handle is None:
+                self.done = True
+                return
+        if not self._reads and self._close_num is None:
+            self._close_num = self._client._async_request(
+                self, CMD_CLOSE, self._handle
+            )
+
+    def _read(self):
+        if not self._eof:
+            self._client._async_request(self, CMD_READDIR, self._handle)
+            self._reads += 1
+
+
+class _TreeRemoval:
+    """
+    Removes the directory ``top`` and everything below it, for
+    `SFTPClient.rmtree`.
+
+    Directories are read with `_DirListing` while ``SSH_FXP_REMOVE`` requests
+    for the entries already found are in flight, and each directory gets its
+    ``SSH_FXP_RMDIR`` as soon as the last of its entries is gone. Entry types
+    come from the ``SSH_FXP_READDIR`` attributes, which describe symlinks
+    themselves, so a symlink is removed rather than followed.
+    """
+
+    def __init__(self, client, top, onerror, window, listings, read_aheads):
+        self.top = top
+        self._client = client
+        self._onerror = onerror
+        self._window = window
+        self._max_listings = listings
+        self._read_aheads = read_aheads
+        # Directories still to read, the next one last
+        self._to_list = [top]
+        # (command, path) of removals still to send
+        self._to_remove = deque()
+        self._listings = {}
+        # Request number -> (command, path) of removals in flight
+        self._removing = {}
+        self._replies = deque()
+        # Directory -> number of its entries that aren't gone yet
+        self._left = {}
+        self._done = False
+
+    def run(self):
+        client = self._client
+        try:
+            while not self._done:
+                self._send()
+                client._read_response()
+                self._collect()
+        finally:
+            for listing in self._listings.values():
+                listing.abandon()
+            # Only left over after an error; wait for what's in flight
+            while len(self._replies) < len(self._removing) or not all(
+                listing.done for listing in self._listings.values()
+            ):
+                client._read_response()
+
+    # ...internals...
+
+    def _async_response(self, t, msg, num):
+        # Handled in _collect, so that onerror isn't called from inside
+        # _read_response
+        self._replies.append((num, t, msg))
+
+    def _send(self):
+        client = self._client
+        while self._to_remove and len(self._removing) < self._window:
+            t, path = self._to_remove.popleft()
+            num = client._async_request(self, t, client._adjust_cwd(path))
+            self._removing[num] = (t, path)
+        while self._to_list and len(self._listings) < self._max_listings:
+            path = self._to_list.pop()
+            self._listings[path] = _DirListing(
+                client, client._adjust_cwd(path), self._read_aheads
+            )
+
+    def _collect(self):
+        client = self._client
+        for path, listing in list(self._listings.items()):
+            if listing.done:
+                del self._listings[path]
+                self._listed(path, listing)
+        while self._replies:
+            num, t, msg = self._replies.popleft()
+            t_sent, path = self._removing.pop(num)
+            try:
+                if t != CMD_STATUS:
+                    raise SFTPError("Expected status")
+                client._convert_status(msg)
+            except (OSError, IOError) as e:
+                if t_sent == CMD_RMDIR:
+                    self._failed(client.rmdir, path, e)
+                else:
+                    self._failed(client.remove, path, e)
+            self._gone(path)
+
+    def _listed(self, path, listing):
+        client = self._client
+        if listing.error is not None:
+            # Still try to remove it, like shutil.rmtree
+            self._failed(client.listdir_attr, path, listing.error)
+        if not listing.entries:
+            self._to_remove.append((CMD_RMDIR, path))
+            return
+        self._left[path] = len(listing.entries)
+        for attr in listing.entries:
+            entry = SFTPDirEntry(
+                client, posixpath.join(path, attr.filename), attr
+            )
+            if entry.is_dir(follow_symlinks=False):
+                self._to_list.append(entry.path)
+            else:
+                self._to_remove.append((CMD_REMOVE, entry.path))
+
+    def _gone(self, path):
+        """
+        Note that ``path`` was removed (or failed to be), removing its
+        directory next if that was the last of its entries.
+        """
+        if path == self.top:
+            self._done = True
+            return
+        parent = posixpath.dirname(path)
+        self._left[parent] -= 1
+        if not self._left[parent]:
+            del self._left[parent]
+            self._to_remove.append((CMD_RMDIR, parent))
+
+    def _failed(self, function, path, error):
+        if getattr(error, "filename", None) is None:
+            error.filename = path
+        if self._onerror is None:
+            raise error
+        try:
+            raise error
+        except (OSError, IOError):
+            self._onerror(function, path, sys.exc_info())
 
 
 class SFTPClient(_SFTPClient):
+    #: Default number of ``SSH_FXP_STAT``/``SSH_FXP_LSTAT`` requests kept in
+    #: flight by the batch methods (`stat_many`, `exists_many`, ...).
+    stat_window = 64
+
+    #: Default number of ``SSH_FXP_READDIR`` requests kept in flight per
+    #: directory by `scandir`.
+    readdir_window = 8
+
+    #: Default number of directories `walk` reads at the same time.
+    walk_window = 8
+
+    #: Default number of ``SSH_FXP_REMOVE``/``SSH_FXP_RMDIR`` requests kept
+    #: in flight by `rmtree`.
+    remove_window = 64
+
+    #: Default size, in bytes, of the ranges `get_parallel` and
+    #: `put_parallel` split a file into.
+    transfer_range_size = 8 * 1024 * 1024
+
+    #: Default number of files `checksum_many` hashes at the same time with
+    #: the ``check-file`` extension.
+    checksum_window = 16
+
+    #: The server's `.SFTPLimits`, once `query_limits` has asked for them.
+    limits = SFTPLimits.DEFAULT
+
+    _stat_cache = None
+    _metrics = None
+
+    def __init__(self, sock):
+        #: Extensions the server announced in its ``SSH_FXP_VERSION``, as
+        #: ``{name: data}``.
+        self.extensions = {}
+        super().__init__(sock)
+
+    __init__.__doc__ = _SFTPClient.__init__.__doc__
+
+    def enable_stat_cache(self, ttl=1.0, max_entries=4096, negative_ttl=None):
+        """
+        Start caching the results of the existence predicates (`exists`,
+        `lexists`, `isfile`, `isdir`, `islink` and their batch versions).
+
+        Cached results are dropped automatically when this client changes
+        the path (`remove`, `rename`, `mkdir`, `rmdir`, `symlink`, `chmod`,
+        `utime`, opening for writing, ...). Changes made by anyone else, or
+        through a symlink pointing at a cached path, are only noticed once the
+        entry expires.
+
+        :param float ttl: seconds to keep a successful result
+        :param int max_entries:
+            maximum number of results kept; the least recently used one is
+            evicted beyond that
+        :param float negative_ttl:
+            seconds to keep a "does not exist" result (defaults to ``ttl``;
+            ``0`` disables caching them)
+        :return: the new `.StatCache`, whose counters can be inspected
+        """
+        self._stat_cache = StatCache(
+            ttl=ttl, max_entries=max_entries, negative_ttl=negative_ttl
+        )
+        return self._stat_cache
+
+    def disable_stat_cache(self):
+        """
+        Stop caching predicate results and drop anything already cached.
+        """
+        self._stat_cache = None
+
+    @property
+    def stat_cache(self):
+        """
+        The `.StatCache` in use, or ``None`` if caching is disabled.
+        """
+        return self._stat_cache
+
+    def enable_metrics(self):
+        """
+        Start counting the requests this client makes: per request type, the
+        replies received, bytes sent and received, errors by errno and a
+        latency histogram. Any previous counts are discarded.
+
+        :return: the new `.SFTPMetrics`, whose `~.SFTPMetrics.snapshot`
+            reports the counts
+        """
+        self._metrics = SFTPMetrics()
+        return self._metrics
+
+    def disable_metrics(self):
+        """
+        Stop counting requests.
+        """
+        self._metrics = None
+
+    @property
+    def metrics(self):
+        """
+        The `.SFTPMetrics` in use, or ``None`` if metrics are disabled.
+        """
+        return self._metrics
+
+    def query_limits(self):
+        """
+        Ask the server for its `.SFTPLimits` with the ``limits@openssh.com``
+        extension and use them from now on: files opened afterwards read and
+        write in chunks of the size the server allows, `getfo` keeps enough
+        reads in flight to fill the channel window, and `walk` keeps no more
+        directories open than the handle limit leaves room for.
+
+        Servers without the extension keep `.SFTPLimits.DEFAULT`. Clients
+        from `.Transport.open_sftp_client` have already asked.
+
+        :return: the `.SFTPLimits` now in use
+        """
+        if "limits@openssh.com" in self.extensions:
+            t, msg = self._request(CMD_EXTENDED, "limits@openssh.com")
+            if t != CMD_EXTENDED_REPLY:
+                raise SFTPError("Expected extended reply")
+            self.limits = SFTPLimits.from_reply(msg)
+        return self.limits
+
+    def path_kind(self, path):
+        """
+        Find out whether a path is a file, a directory, a symlink (and if so,
+        what it points to), a broken symlink or missing.
+
+        This costs one ``lstat`` request, plus a ``stat`` of the target if the
+        path turns out to be a symlink. `exists`, `lexists`, `isfile`, `isdir`
+        and `islink` are all answered from it, so code that needs more than
+        one of them should call this once instead.
+
+        :param str path: path to classify
+        :rtype: `.PathKind`
+        """
+        return self._path_kind(self._adjust_cwd(path), True)
+
     def exists(self, path):
         """
         Check a path to determine whether it exists, based on `stat`.
@@ -33,23 +469,7 @@ class SFTPClient(_SFTPClient):
             ``False`` otherwise
         .. versionadded:: 2.5
         """
-        path = self._adjust_cwd(path)
-        self._log(DEBUG, "exists({!r})".format(path))
-
-        try:
-            self.stat(path)
-        except (OSError, IOError) as e:
-            self._log(
-                DEBUG,
-                "{}: {} ({!r})".format(
-                    type(e).__name__,
-                    e.strerror,
-                    e.filename if e.filename is not None else path,
-                ),
-            )
-            return False
-
-        return True
+        return self._followed_kind(path).exists
 
     def lexists(self, path):
         """
@@ -62,23 +482,7 @@ class SFTPClient(_SFTPClient):
             ``False`` otherwise
         .. versionadded:: 2.5
         """
-        path = self._adjust_cwd(path)
-        self._log(DEBUG, "exists({!r})".format(path))
-
-        try:
-            self.lstat(path)
-        except (OSError, IOError) as e:
-            self._log(
-                DEBUG,
-                "{}: {} ({!r})".format(
-                    type(e).__name__,
-                    e.strerror,
-                    e.filename if e.filename is not None else path,
-                ),
-            )
-            return False
-
-        return True
+        return self._path_kind(self._adjust_cwd(path), False).lexists
 
     def isfile(self, path):
         """
@@ -89,23 +493,7 @@ class SFTPClient(_SFTPClient):
             ``False`` otherwise
         .. versionadded:: 2.5
         """
-        path = self._adjust_cwd(path)
-        self._log(DEBUG, "isfile({!r})".format(path))
-
-        try:
-            path_stat = self.stat(path)
-        except (OSError, IOError) as e:
-            self._log(
-                DEBUG,
-                "{}: {} ({!r})".format(
-                    type(e).__name__,
-                    e.strerror,
-                    e.filename if e.filename is not None else path,
-                ),
-            )
-            return False
-
-        return stat.S_ISREG(path_stat.st_mode)
+        return self._followed_kind(path).is_file
 
     def islink(self, path):
         """
@@ -116,23 +504,7 @@ class SFTPClient(_SFTPClient):
             ``False`` otherwise
         .. versionadded:: 2.5
         """
-        path = self._adjust_cwd(path)
-        self._log(DEBUG, "isfile({!r})".format(path))
-
-        try:
-            path_lstat = self.lstat(path)
-        except (OSError, IOError) as e:
-            self._log(
-                DEBUG,
-                "{}: {} ({!r})".format(
-                    type(e).__name__,
-                    e.strerror,
-                    e.filename if e.filename is not None else path,
-                ),
-            )
-            return False
-
-        return stat.S_ISLNK(path_lstat.st_mode)
+        return self._path_kind(self._adjust_cwd(path), False).is_symlink
 
     def isdir(self, path):
         """
@@ -143,23 +515,1560 @@ class SFTPClient(_SFTPClient):
             ``False`` otherwise
         .. versionadded:: 2.5
         """
+        return self._followed_kind(path).is_dir
+
+    def open(self, filename, mode="r", bufsize=-1):
+        try:
+            f = super().open(filename, mode, bufsize)
+            f.MAX_REQUEST_SIZE = self.limits.chunk_size(mode)
+            return f
+        finally:
+            if set(mode) & set("wax+"):
+                self._invalidate(filename)
+
+    open.__doc__ = _SFTPClient.open.__doc__
+
+    file = open
+
+    def getfo(
+        self,
+        remotepath,
+        fl,
+        callback=None,
+        prefetch=True,
+        max_concurrent_prefetch_requests=None,
+    ):
+        if (
+            max_concurrent_prefetch_requests is None
+            and self.limits is not SFTPLimits.DEFAULT
+        ):
+            max_concurrent_prefetch_requests = self._read_window()
+        return super().getfo(
+            remotepath,
+            fl,
+            callback=callback,
+            prefetch=prefetch,
+            max_concurrent_prefetch_requests=max_concurrent_prefetch_requests,
+        )
+
+    getfo.__doc__ = _SFTPClient.getfo.__doc__
+
+    def remove(self, path):
+        try:
+            super().remove(path)
+        finally:
+            self._invalidate(path)
+
+    remove.__doc__ = _SFTPClient.remove.__doc__
+
+    unlink = remove
+
+    def rename(self, oldpath, newpath):
+        try:
+            super().rename(oldpath, newpath)
+        finally:
+            self._invalidate(oldpath, recursive=True)
+            self._invalidate(newpath, recursive=True)
+
+    rename.__doc__ = _SFTPClient.rename.__doc__
+
+    def posix_rename(self, oldpath, newpath):
+        try:
+            super().posix_rename(oldpath, newpath)
+        finally:
+            self._invalidate(oldpath, recursive=True)
+            self._invalidate(newpath, recursive=True)
+
+    posix_rename.__doc__ = _SFTPClient.posix_rename.__doc__
+
+    def mkdir(self, path, mode=o777):
+        try:
+            super().mkdir(path, mode)
+        finally:
+            self._invalidate(path)
+
+    mkdir.__doc__ = _SFTPClient.mkdir.__doc__
+
+    def makedirs(self, path, mode=o777, exist_ok=False):
+        """
+        Create the folder ``path`` and any of its parents that are missing,
+        like `os.makedirs`.
+
+        All of ``path``'s ancestors are stat'ed in one pipelined batch to find
+        the deepest one that exists, and the missing folders below it are
+        then created with their ``SSH_FXP_MKDIR`` requests sent back to
+        back, so the whole call costs about two round-trips however deep
+        ``path`` is.
+
+        :param str path: name of the folder to create
+        :param int mode:
+            permissions (posix-style) for each newly-created folder
+        :param bool exist_ok:
+            if false, raise an error if ``path`` already exists
+        :rtype: list
+        :return: the folders created, parents first
+
+        :raises IOError:
+            if ``path`` exists (unless ``exist_ok`` is set and it is a
+            folder), if one of its parents isn't a folder, or if a folder
+            couldn't be created
+        """
+        chain = _ancestors(path)
+        if not chain:
+            if not exist_ok:
+                raise IOError(errno.EEXIST, "File exists", path)
+            return []
+        attrs = self.stat_many(chain, compact=True)
+        missing = []
+        for ancestor in reversed(chain):
+            attr = attrs[ancestor]
+            if attr is None:
+                missing.append(ancestor)
+                continue
+            if ancestor == chain[-1]:
+                if not exist_ok or not attr.is_dir:
+                    raise IOError(errno.EEXIST, "File exists", path)
+            elif not attr.is_dir:
+                raise IOError(errno.ENOTDIR, "Not a directory", ancestor)
+            break
+        missing.reverse()
+        created = self._create_dirs(missing, mode)
+        if not exist_ok and chain[-1] not in created:
+            # Someone else created it in the meantime
+            raise IOError(errno.EEXIST, "File exists", path)
+        return created
+
+    def makedirs_many(self, paths, mode=o777, window=None):
+        """
+        Create all of ``paths`` and whatever parents they are missing, as
+        for many `makedirs` calls with ``exist_ok`` set (say to lay out the
+        folders of a manifest before uploading to them).
+
+        The ancestors shared between ``paths`` are only looked at once: the
+        whole set of them is stat'ed in one batch, then the missing folders
+        are created parents first with up to ``window`` requests in flight.
+
+        :param paths: iterable of names of folders to create
+        :param int mode:
+            permissions (posix-style) for each newly-created folder
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :rtype: list
+        :return: the folders created, parents first
+
+        :raises IOError:
+            if one of ``paths`` or their parents exists but isn't a folder,
+            or if a folder couldn't be created
+        """
+        # dict to keep one of each, in order
+        ancestors = {}
+        for path in paths:
+            ancestors.update(dict.fromkeys(_ancestors(path)))
+        attrs = self.stat_many(ancestors, window, compact=True)
+        missing = []
+        for ancestor, attr in attrs.items():
+            if attr is None:
+                missing.append(ancestor)
+            elif not attr.is_dir:
+                raise IOError(errno.ENOTDIR, "Not a directory", ancestor)
+        missing.sort(key=lambda path: (path.count("/"), path))
+        return self._create_dirs(missing, mode, window)
+
+    def rmdir(self, path):
+        try:
+            super().rmdir(path)
+        finally:
+            self._invalidate(path, recursive=True)
+
+    rmdir.__doc__ = _SFTPClient.rmdir.__doc__
+
+    def symlink(self, source, dest):
+        try:
+            super().symlink(source, dest)
+        finally:
+            self._invalidate(dest)
+
+    symlink.__doc__ = _SFTPClient.symlink.__doc__
+
+    def chmod(self, path, mode):
+        try:
+            super().chmod(path, mode)
+        finally:
+            self._invalidate(path)
+
+    chmod.__doc__ = _SFTPClient.chmod.__doc__
+
+    def chown(self, path, uid, gid):
+        try:
+            super().chown(path, uid, gid)
+        finally:
+            self._invalidate(path)
+
+    chown.__doc__ = _SFTPClient.chown.__doc__
+
+    def utime(self, path, times):
+        try:
+            super().utime(path, times)
+        finally:
+            self._invalidate(path)
+
+    utime.__doc__ = _SFTPClient.utime.__doc__
+
+    def truncate(self, path, size):
+        try:
+            super().truncate(path, size)
+        finally:
+            self._invalidate(path)
+
+    truncate.__doc__ = _SFTPClient.truncate.__doc__
+
+    def rmtree(self, path, ignore_errors=False, onerror=None, window=None):
+        """
+        Delete the remote directory ``path`` and everything in it, like
+        `shutil.rmtree`.
+
+        Directories are read (``window`` of them at once, as in `walk`)
+        while up to ``window`` ``SSH_FXP_REMOVE`` requests for the entries
+        already found are in flight, and each directory is removed as soon
+        as it is empty, so the tree is deleted bottom-up without waiting for
+        each reply in turn. Entry types come from the ``SSH_FXP_READDIR``
+        attributes; symlinks are removed, never followed, and ``path``
+        itself may not be one.
+
+        With ``ignore_errors``, failures are ignored. Otherwise ``onerror``,
+        if given, is called as ``onerror(function, path, exc_info)`` with the
+        method that failed (`lstat`, `islink`, `listdir_attr`, `remove` or
+        `rmdir`), the path it failed on and the `sys.exc_info` of the
+        error, and the deletion carries on; without ``onerror`` the first
+        error is raised.
+
+        :param str path: directory to delete
+        :param bool ignore_errors: ignore failures to delete anything
+        :param callable onerror: called for each failure
+        :param int window:
+            maximum number of removals in flight (defaults to
+            `remove_window`)
+        """
+        if window is None:
+            window = self.remove_window
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(DEBUG, "rmtree({!r}, window={!r})".format(path, window))
+        if ignore_errors:
+
+            def onerror(function, path, exc_info):
+                pass
+
+        removal = _TreeRemoval(
+            self,
+            path.rstrip("/") or "/",
+            onerror,
+            window,
+            self._handle_window(self.walk_window),
+            self.readdir_window,
+        )
+        try:
+            try:
+                attr = self.lstat(path)
+            except (OSError, IOError) as e:
+                removal._failed(self.lstat, path, e)
+                return
+            if stat.S_ISLNK(attr.st_mode):
+                removal._failed(
+                    self.islink,
+                    path,
+                    OSError("Cannot call rmtree on a symbolic link"),
+                )
+                return
+            if not stat.S_ISDIR(attr.st_mode):
+                removal._failed(
+                    self.listdir_attr,
+                    path,
+                    IOError(errno.ENOTDIR, "Not a directory", path),
+                )
+                return
+            removal.run()
+        finally:
+            self._invalidate(path, recursive=True)
+
+    def stat_many(self, paths, window=None, compact=False):
+        """
+        Retrieve information about many files on the remote system at once.
+
+        Rather than waiting for each reply in turn like `stat`, up to
+        ``window`` requests are sent ahead and their replies collected as
+        they arrive, so a batch costs roughly one round-trip per ``window``
+        paths instead of one per path.
+
+        With ``compact``, results are `.SFTPStat` tuples, which take a
+        fraction of the memory of `.SFTPAttributes` when holding on to many
+        of them (but leave out extended attributes).
+
+        :param paths: iterable of paths to stat
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :param bool compact: return `.SFTPStat` tuples
+        :rtype: dict
+        :return:
+            a mapping of each path to its `.SFTPAttributes` (or `.SFTPStat`),
+            or to ``None`` if it could not be stat'ed (as in `exists`, a
+            broken symlink counts as missing)
+        """
+        return dict(self._pipelined_stat(CMD_STAT, paths, window, compact))
+
+    def lstat_many(self, paths, window=None, compact=False):
+        """
+        Batch version of `lstat`; see `stat_many` for details.
+
+        :param paths: iterable of paths to lstat
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :param bool compact: return `.SFTPStat` tuples
+        :rtype: dict
+        :return:
+            a mapping of each path to its `.SFTPAttributes` (or `.SFTPStat`),
+            or to ``None`` if it could not be lstat'ed
+        """
+        return dict(self._pipelined_stat(CMD_LSTAT, paths, window, compact))
+
+    def exists_many(self, paths, window=None):
+        """
+        Batch version of `exists`; see `stat_many` for details.
+
+        :param paths: iterable of paths to check
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :rtype: dict
+        :return: a mapping of each path to the result of `exists`
+        """
+        return {
+            path: attr is not None
+            for path, attr in self._pipelined_stat(
+                CMD_STAT, paths, window, compact=True
+            )
+        }
+
+    def lexists_many(self, paths, window=None):
+        """
+        Batch version of `lexists`; see `stat_many` for details.
+
+        :param paths: iterable of paths to check
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :rtype: dict
+        :return: a mapping of each path to the result of `lexists`
+        """
+        return {
+            path: attr is not None
+            for path, attr in self._pipelined_stat(
+                CMD_LSTAT, paths, window, compact=True
+            )
+        }
+
+    def isfile_many(self, paths, window=None):
+        """
+        Batch version of `isfile`; see `stat_many` for details.
+
+        :param paths: iterable of paths to check
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :rtype: dict
+        :return: a mapping of each path to the result of `isfile`
+        """
+        return {
+            path: attr is not None and attr.is_file
+            for path, attr in self._pipelined_stat(
+                CMD_STAT, paths, window, compact=True
+            )
+        }
+
+    def isdir_many(self, paths, window=None):
+        """
+        Batch version of `isdir`; see `stat_many` for details.
+
+        :param paths: iterable of paths to check
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :rtype: dict
+        :return: a mapping of each path to the result of `isdir`
+        """
+        return {
+            path: attr is not None and attr.is_dir
+            for path, attr in self._pipelined_stat(
+                CMD_STAT, paths, window, compact=True
+            )
+        }
+
+    def islink_many(self, paths, window=None):
+        """
+        Batch version of `islink`; see `stat_many` for details.
+
+        :param paths: iterable of paths to check
+        :param int window:
+            maximum number of requests in flight (defaults to `stat_window`)
+        :rtype: dict
+        :return: a mapping of each path to the result of `islink`
+        """
+        return {
+            path: attr is not None and attr.is_symlink
+            for path, attr in self._pipelined_stat(
+                CMD_LSTAT, paths, window, compact=True
+            )
+        }
+
+    def scandir(self, path=".", read_aheads=None):
+        """
+        Iterate over the entries of a remote directory, like `os.scandir`.
+
+        Entries are yielded as each ``SSH_FXP_READDIR`` reply arrives, with
+        ``read_aheads`` further reads already in flight, so even huge
+        directories are never held in memory at once. Each `.SFTPDirEntry`
+        answers ``is_file()``, ``is_dir()``, ``is_symlink()`` and ``stat()``
+        from the attributes in that reply; only following a symlink costs an
+        extra request. The special entries ``'.'`` and ``'..'`` are skipped.
+
+        :param str path: directory to scan (defaults to ``'.'``)
+        :param int read_aheads:
+            maximum number of ``SSH_FXP_READDIR`` requests in flight (defaults
+            to `readdir_window`)
+        :return: an iterator of `.SFTPDirEntry` objects
+        """
+        for attr in self._readdir(self._adjust_cwd(path), read_aheads):
+            yield SFTPDirEntry(self, posixpath.join(path, attr.filename), attr)
+
+    def listdir_columns(self, path=".", read_aheads=None):
+        """
+        List a remote directory into a compact `.DirColumns`: its entries'
+        names, sizes, modes, uids, gids and mtimes, each kept in one array.
+
+        Attributes are read straight from each ``SSH_FXP_READDIR`` reply
+        into the columns as it arrives, with ``read_aheads`` further reads
+        in flight, so no `.SFTPAttributes` is made for any entry. That keeps
+        listings of millions of entries down to tens of MB, and
+        `.DirColumns.select`/`.DirColumns.filter` pick out entries (say
+        regular files larger than some size modified after some time)
+        without making any either. As with `scandir`, the attributes are
+        those of the entries themselves, not of what symlinks point to, and
+        ``'.'`` and ``'..'`` are skipped.
+
+        :param str path: directory to list (defaults to ``'.'``)
+        :param int read_aheads:
+            maximum number of ``SSH_FXP_READDIR`` requests in flight (defaults
+            to `readdir_window`)
+        :rtype: `.DirColumns`
+        """
+        columns = DirColumns()
+        for msg in self._readdir_replies(self._adjust_cwd(path), read_aheads):
+            columns._add_names(msg)
+        return columns
+
+    def walk(
+        self,
+        top=".",
+        topdown=True,
+        onerror=None,
+        followlinks=False,
+        window=None,
+        read_aheads=None,
+    ):
+        """
+        Generate the names in a remote directory tree, like `os.walk`.
+
+        For each directory in the tree rooted at ``top`` (including ``top``
+        itself), yields a ``(dirpath, dirnames, filenames)`` 3-tuple. As with
+        `os.walk`, with ``topdown`` the caller may prune ``dirnames`` in place
+        to skip directories, symlinks to directories are listed in
+        ``dirnames`` but only descended into with ``followlinks``, and errors
+        listing a directory are passed to ``onerror`` (if given) and that
+        directory is skipped.
+
+        Instead of reading one directory at a time, up to ``window`` of the
+        directories the walk is about to reach are opened and read
+        concurrently over this one channel. Entry types come from the
+        ``SSH_FXP_READDIR`` attributes as in `scandir`, so only symlinks cost
+        an extra request. The order of the results only depends on the
+        listings the server returns, never on when its replies arrive.
+
+        :param str top: directory to start from
+        :param bool topdown:
+            yield a directory before (``True``) or after (``False``) its
+            subdirectories
+        :param callable onerror:
+            called with the `IOError` when a directory can't be listed
+        :param bool followlinks: descend into symlinks to directories
+        :param int window:
+            maximum number of directories read at once (defaults to
+            `walk_window`)
+        :param int read_aheads:
+            ``SSH_FXP_READDIR`` requests in flight per directory (defaults to
+            `readdir_window`)
+        """
+        if window is None:
+            window = self.walk_window
+        if read_aheads is None:
+            read_aheads = self.readdir_window
+        if window < 1 or read_aheads < 1:
+            raise ValueError("window and read_aheads must be at least 1")
+        window = self._handle_window(window)
+        # Directories still to visit, the next one last. Entries are
+        # (path, None) until listed; bottom-up, a listed directory goes back
+        # on the stack as (path, result) to be yielded after its children.
+        stack = [(top, None)]
+        listings = {}
+        try:
+            while stack:
+                self._start_listings(stack, listings, window, read_aheads)
+                path, result = stack.pop()
+                if result is not None:
+                    yield result
+                    continue
+                listing = listings.pop(path, None)
+                if listing is None:
+                    listing = _DirListing(
+                        self, self._adjust_cwd(path), read_aheads
+                    )
+                while not listing.done:
+                    self._read_response()
+                if listing.error is not None:
+                    if onerror is not None:
+                        error = listing.error
+                        if getattr(error, "filename", None) is None:
+                            error.filename = path
+                        onerror(error)
+                    continue
+                dirs = {}
+                nondirs = []
+                for attr in listing.entries:
+                    entry = SFTPDirEntry(
+                        self, posixpath.join(path, attr.filename), attr
+                    )
+                    if entry.is_dir():
+                        dirs[entry.name] = entry
+                    else:
+                        nondirs.append(entry.name)
+                dirnames = list(dirs)
+                if topdown:
+                    yield path, dirnames, nondirs
+                else:
+                    stack.append((path, (path, dirnames, nondirs)))
+                for name in reversed(dirnames):
+                    subdir = posixpath.join(path, name)
+                    entry = dirs.get(name)
+                    if entry is not None:
+                        is_symlink = entry.is_symlink()
+                    else:
+                        # Added to dirnames by the caller
+                        is_symlink = self.islink(subdir)
+                    if followlinks or not is_symlink:
+                        stack.append((subdir, None))
+        finally:
+            for listing in listings.values():
+                listing.abandon()
+            for listing in listings.values():
+                while not listing.done:
+                    self._read_response()
+
+    def glob(self, pattern, recursive=False):
+        """
+        Return a list of remote paths matching ``pattern``; see `iglob`.
+
+        :param str pattern: the pattern to match
+        :param bool recursive: let ``**`` match any number of directories
+        :rtype: list of str
+        """
+        return list(self.iglob(pattern, recursive=recursive))
+
+    def iglob(self, pattern, recursive=False):
+        """
+        Iterate over the remote paths matching ``pattern``, like
+        `glob.iglob`.
+
+        Only directories that could contain a match are listed: literal
+        segments of the pattern are checked with batched ``stat`` requests
+        (see `isdir_many`) rather than by listing their parents, and
+        wildcard segments are matched against `scandir` entries, whose types
+        need no extra requests. Matches are produced as they are found, so
+        memory use does not grow with the number of directories involved.
+
+        As with `glob.iglob`, wildcards don't match names starting with
+        ``.`` unless the pattern segment does, and a pattern ending in ``/``
+        only matches directories. With ``recursive``, ``**`` matches zero or
+        more directories (without descending into symlinks to directories).
+
+        :param str pattern: the pattern to match
+        :param bool recursive: let ``**`` match any number of directories
+        :return: an iterator of matching paths
+        """
+        root, steps, dir_only = split_pattern(pattern, recursive)
+        if not steps:
+            if root and self.isdir(root):
+                yield root
+            return
+        matches = iter([root])
+        for i, step in enumerate(steps):
+            need_dir = dir_only or i < len(steps) - 1
+            if isinstance(step, str):
+                matches = self._glob_literal(matches, step, need_dir)
+            elif step is RECURSIVE:
+                matches = self._glob_recursive(
+                    matches, need_dir, i == len(steps) - 1
+                )
+            else:
+                matches = self._glob_match(matches, step, need_dir)
+        for path in matches:
+            yield path + "/" if dir_only and not path.endswith("/") else path
+
+    def checksum(self, path, algo="sha256", ranges=None):
+        """
+        Return the digest of a remote file's contents without downloading
+        it.
+
+        The server does the hashing: through the ``check-file`` extension if
+        it announced support for ``algo``, or else (or if it then refuses)
+        by running ``<algo>sum`` (from GNU coreutils) over an exec channel
+        of the same transport.
+
+        :param str path: file to hash
+        :param str algo:
+            ``"md5"``, ``"sha1"``, ``"sha224"``, ``"sha256"``, ``"sha384"``
+            or ``"sha512"``
+        :param ranges:
+            ``(offset, length)`` pairs to hash separately instead of the
+            whole file; a length of 0 runs to the end of the file
+        :return:
+            the digest as bytes, or with ``ranges``, a list of one digest per
+            range
+
+        :raises: ``IOError`` -- if the file can't be read
+        """
+        if algo not in HASH_COMMANDS:
+            raise ValueError("Unsupported hash algorithm {!r}".format(algo))
+        whole = ranges is None
+        ranges = [(0, 0)] if whole else [tuple(r) for r in ranges]
+        adjusted = self._adjust_cwd(path)
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(DEBUG, "checksum({!r}, {!r})".format(path, algo))
+        if self._check_file_supports(algo):
+            check = _FileChecksum(self, adjusted, algo, ranges)
+            while not check.done:
+                self._read_response()
+            if check.error is not None:
+                if getattr(check.error, "filename", None) is None:
+                    check.error.filename = path
+                raise check.error
+            digests = check.digests
+            for i in check.refused:
+                digests[i] = self._exec_checksum(adjusted, algo, *ranges[i])
+        else:
+            digests = [
+                self._exec_checksum(adjusted, algo, offset, length)
+                for offset, length in ranges
+            ]
+        return digests[0] if whole else digests
+
+    def checksum_many(self, paths, algo="sha256", window=None):
+        """
+        Batch version of `checksum`, for comparing many files against a
+        manifest.
+
+        With the ``check-file`` extension, up to ``window`` files are opened
+        and hashed concurrently over this channel; otherwise (and for files
+        the server won't hash that way) each exec channel hashes a few dozen
+        files with one command.
+
+        :param paths: iterable of paths to hash
+        :param str algo: hash algorithm, as for `checksum`
+        :param int window:
+            maximum number of files hashed at once (defaults to
+            `checksum_window`)
+        :rtype: dict
+        :return:
+            a mapping of each path to its digest, or to ``None`` if it could
+            not be hashed
+        """
+        if algo not in HASH_COMMANDS:
+            raise ValueError("Unsupported hash algorithm {!r}".format(algo))
+        if window is None:
+            window = self.checksum_window
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(DEBUG, "checksum_many({!r})".format(algo))
+        if not self._check_file_supports(algo):
+            return self._exec_checksum_many(paths, algo)
+        window = self._handle_window(window)
+        digests = {}
+        refused = []
+        pending = deque()
+        paths = iter(paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                check = _FileChecksum(
+                    self, self._adjust_cwd(path), algo, [(0, 0)]
+                )
+                pending.append((path, check))
+            if not pending:
+                break
+            path, check = pending.popleft()
+            while not check.done:
+                self._read_response()
+            if check.refused:
+                refused.append(path)
+            digests[path] = None if check.error else check.digests[0]
+        if refused:
+            digests.update(self._exec_checksum_many(refused, algo))
+        return digests
+
+    def get_parallel(
+        self,
+        remotepath,
+        localpath,
+        channels=1,
+        range_size=None,
+        window=None,
+        resume=True,
+        callback=None,
+    ):
+        """
+        Copy a large remote file to the local host by reading many parts of
+        it at once, optionally over several SFTP channels, and resume an
+        earlier attempt that failed part way.
+
+        The file is split into ``range_size`` ranges, which ``channels``
+        SFTP sessions of this transport (this one and ``channels - 1`` new
+        ones) take in turn. Each session keeps ``window`` reads in flight
+        and writes every reply straight into place in a preallocated
+        ``localpath + ".part"``. Finished ranges are recorded in
+        ``localpath + ".part.ranges"``, so if the download fails it can pick
+        up where it left off, provided the remote file's size and
+        modification time haven't changed. Once every range is in, and the
+        remote file still has the size and modification time it started
+        with, the partial file is renamed to ``localpath``.
+
+        :param str remotepath: the remote file to copy
+        :param str localpath: the destination path on the local host
+        :param int channels: number of SFTP sessions reading at once
+        :param int range_size:
+            bytes per range (defaults to `transfer_range_size`), the unit of
+            work sharing and of resuming
+        :param int window:
+            reads in flight per session (defaults to enough to fill the
+            channel's window, as `getfo` does with known `limits`)
+        :param bool resume:
+            continue from a checkpoint left by an earlier attempt (else
+            start over)
+        :param callable callback:
+            optional callback function (form: ``func(int, int)``) that accepts
+            the bytes transferred so far and the total bytes to be
+            transferred; it may be called from several threads
+        :return: the size of the file
+        """
+        if range_size is None:
+            range_size = self.transfer_range_size
+        if window is None:
+            window = self._read_window()
+        if channels < 1 or range_size < 1 or window < 1:
+            raise ValueError(
+                "channels, range_size and window must be at least 1"
+            )
+        path = self._adjust_cwd(remotepath)
+        attr = self.stat(remotepath)
+        size = attr.st_size
+        ranges = split_ranges(size, range_size)
+        partial = localpath + PARTIAL_SUFFIX
+        checkpoint = Checkpoint(
+            localpath + CHECKPOINT_SUFFIX,
+            {
+                "path": path.decode("utf-8", "replace"),
+                "size": size,
+                "mtime": attr.st_mtime,
+                "range_size": range_size,
+            },
+        )
+        flags = os.O_WRONLY | getattr(os, "O_BINARY", 0)
+        done = checkpoint.load() if resume else None
+        if done is not None and os.path.exists(partial):
+            fd = os.open(partial, flags)
+        else:
+            done = set()
+            fd = os.open(partial, flags | os.O_CREAT | os.O_TRUNC)
+        clients = [self]
+        try:
+            preallocate(fd, size)
+            checkpoint.start(done)
+            for i in range(min(channels, len(ranges) - len(done)) - 1):
+                clients.append(self._open_session())
+            download = ParallelDownload(
+                clients,
+                path,
+                fd,
+                [
+                    (index, offset, length)
+                    for index, (offset, length) in enumerate(ranges)
+                    if index not in done
+                ],
+                window,
+                checkpoint,
+            )
+            already = sum(ranges[index][1] for index in done)
+            download.run(callback, size, already)
+            received = already + download.transferred
+            if received != size:
+                raise IOError(
+                    "size mismatch in get!  {} != {}".format(received, size)
+                )
+            # The ranges only cover the size stat() gave at the start
+            now = self.stat(remotepath)
+            if (now.st_size, now.st_mtime) != (size, attr.st_mtime):
+                raise IOError(
+                    "Remote file {!r} changed during download".format(
+                        remotepath
+                    )
+                )
+        finally:
+            os.close(fd)
+            checkpoint.close()
+            for client in clients[1:]:
+                client.close()
+        os.replace(partial, localpath)
+        checkpoint.remove()
+        return size
+
+    def readinto(self, path, buffer, offset=0, window=None):
+        """
+        Read a remote file, from ``offset`` on, into ``buffer`` (a
+        `bytearray`, `memoryview`, `mmap.mmap` or anything else writable
+        supporting the buffer protocol), like `io.RawIOBase.readinto`.
+
+        ``window`` reads are kept in flight, and each reply's payload is
+        copied straight from the packet into place, so no intermediate
+        `bytes` objects are built or joined however large the buffer.
+
+        :param str path: the remote file to read
+        :param buffer: where to put the data
+        :param int offset: where in the file to start
+        :param int window:
+            reads in flight (defaults to enough to fill the channel's window)
+        :return:
+            the number of bytes read, less than the buffer's size only at the
+            end of the file
+        """
+        view = memoryview(buffer).cast("B")
+        size = self.stat(path).st_size
+        count = max(0, min(len(view), size - offset))
+        self._read_into(path, view[:count], offset, window=window)
+        return count
+
+    def get_into(self, remotepath, buffer, channels=1, window=None):
+        """
+        Copy a whole remote file into ``buffer`` (a `bytearray`,
+        `memoryview`, `mmap.mmap`, ...) at least as large as the file; see
+        `readinto`. To download into a file without holding it in memory,
+        pass an `mmap.mmap` of a file already sized to match.
+
+        :param str remotepath: the remote file to copy
+        :param buffer: where to put the data
+        :param int channels:
+            number of SFTP sessions reading at once (see `get_parallel`)
+        :param int window: reads in flight per session
+        :return: the size of the file
+        :raises ValueError: if the buffer is too small
+        """
+        view = memoryview(buffer).cast("B")
+        size = self.stat(remotepath).st_size
+        if size > len(view):
+            raise ValueError(
+                "File is {} bytes, buffer only {}".format(size, len(view))
+            )
+        self._read_into(remotepath, view[:size], 0, channels, window)
+        return size
+
+    def put_parallel(
+        self,
+        localpath,
+        remotepath,
+        channels=1,
+        range_size=None,
+        window=None,
+        resume=True,
+        callback=None,
+    ):
+        """
+        Copy a large local file to the SFTP server with many writes in
+        flight, optionally over several SFTP channels, and resume an earlier
+        attempt that failed part way.
+
+        The counterpart of `get_parallel`: the file is split into
+        ``range_size`` ranges, shared out between ``channels`` SFTP sessions
+        of this transport, each keeping ``window`` writes of the server's
+        maximum write length in flight to ``remotepath + ".part"``. Ranges
+        the server has acknowledged are recorded locally in
+        ``localpath + ".upload.ranges"``. A later call with the local file
+        unchanged checks the remote partial file with `stat` and only sends
+        the ranges it is missing. Once everything is in and the size checks
+        out, the partial file is renamed into place, atomically if the
+        server supports ``posix-rename@openssh.com``.
+
+        :param str localpath: the local file to copy
+        :param str remotepath: the destination path on the SFTP server
+        :param int channels: number of SFTP sessions writing at once
+        :param int range_size:
+            bytes per range (defaults to `transfer_range_size`), the unit of
+            work sharing and of resuming
+        :param int window:
+            writes in flight per session (defaults to enough to fill the
+            channel's window)
+        :param bool resume:
+            continue from a checkpoint left by an earlier attempt (else
+            start over)
+        :param callable callback:
+            optional callback function (form: ``func(int, int)``) that accepts
+            the bytes transferred so far and the total bytes to be
+            transferred; it may be called from several threads
+        :return: an `.SFTPAttributes` object containing attributes about the
+            given file
+        """
+        if range_size is None:
+            range_size = self.transfer_range_size
+        if window is None:
+            window = self._write_window()
+        if channels < 1 or range_size < 1 or window < 1:
+            raise ValueError(
+                "channels, range_size and window must be at least 1"
+            )
+        st = os.stat(localpath)
+        size = st.st_size
+        ranges = split_ranges(size, range_size)
+        partial = remotepath + PARTIAL_SUFFIX
+        checkpoint = Checkpoint(
+            localpath + UPLOAD_CHECKPOINT_SUFFIX,
+            {
+                "path": self._adjust_cwd(remotepath).decode("utf-8"),
+                "size": size,
+                "mtime": st.st_mtime,
+                "range_size": range_size,
+            },
+        )
+        done = checkpoint.load() if resume else None
+        if done is not None:
+            try:
+                written = self.stat(partial).st_size
+            except IOError:
+                done = None
+            else:
+                # Anything past the end of the partial file needs sending
+                # again, whatever the checkpoint says
+                done = {
+                    index
+                    for index in done
+                    if index < len(ranges) and sum(ranges[index]) <= written
+                }
+        if done is None:
+            done = set()
+            self.open(partial, "wb").close()
+        fd = os.open(localpath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        clients = [self]
+        try:
+            checkpoint.start(done)
+            for i in range(min(channels, len(ranges) - len(done)) - 1):
+                clients.append(self._open_session())
+            upload = ParallelUpload(
+                clients,
+                self._adjust_cwd(partial),
+                fd,
+                [
+                    (index, offset, length)
+                    for index, (offset, length) in enumerate(ranges)
+                    if index not in done
+                ],
+                window,
+                checkpoint,
+            )
+            already = sum(ranges[index][1] for index in done)
+            upload.run(callback, size, already)
+        finally:
+            os.close(fd)
+            checkpoint.close()
+            for client in clients[1:]:
+                client.close()
+        written = self.stat(partial).st_size
+        if written != size:
+            raise IOError(
+                "size mismatch in put!  {} != {}".format(written, size)
+            )
+        if "posix-rename@openssh.com" in self.extensions:
+            self.posix_rename(partial, remotepath)
+        else:
+            try:
+                self.rename(partial, remotepath)
+            except IOError:
+                # SFTP v3 rename won't replace an existing file; anything
+                # else is a real failure
+                if not self.lexists(remotepath):
+                    raise
+                self.remove(remotepath)
+                self.rename(partial, remotepath)
+        checkpoint.remove()
+        return self.stat(remotepath)
+
+    def sync_tree(
+        self,
+        remote,
+        local,
+        direction=DOWNLOAD,
+        delete=False,
+        checksum=None,
+        workers=4,
+    ):
+        """
+        Mirror a directory tree between this server and the local machine,
+        transferring only the files that changed.
+
+        Both trees are listed first: the remote one with `walk` plus one
+        `stat_many` batch for the files' sizes and times. A file is sent if
+        it is missing from the target or differs in size or modification
+        time (whole seconds); with ``checksum``, files of the same size are
+        compared by content instead, with `checksum_many` on the remote
+        side. Changed files are sent over up to ``workers`` SFTP sessions of
+        this transport at once, and keep their permission bits, access and
+        modification times. Symlinked files are copied as files; symlinks to
+        directories are not followed.
+
+        :param str remote: the remote directory
+        :param str local: the local directory
+        :param str direction:
+            ``"download"`` to make ``local`` match ``remote``, or
+            ``"upload"`` for the other way round
+        :param bool delete:
+            also delete files and directories only found in the target
+        :param str checksum:
+            hash algorithm (see `checksum`) to compare files of the same size
+            with, instead of their modification times
+        :param int workers: number of files transferred at once
+        :return:
+            a `.SyncSummary` of what was sent, skipped and deleted; files
+            that couldn't be transferred or deleted are listed in its
+            ``errors`` rather than stopping the sync
+        :raises: ``IOError`` -- if the source is not a directory
+        """
+        if direction not in (DOWNLOAD, UPLOAD):
+            raise ValueError("direction must be 'download' or 'upload'")
+        if checksum is not None and checksum not in HASH_COMMANDS:
+            raise ValueError(
+                "Unsupported hash algorithm {!r}".format(checksum)
+            )
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(
+                DEBUG,
+                "sync_tree({!r}, {!r}, {!r})".format(remote, local, direction),
+            )
+        remote = self._adjust_cwd(remote).decode("utf-8")
+        sync = _Sync(self, remote, local, direction, delete, checksum)
+        return sync.run(workers)
+
+    # ...internals...
+
+    def _send_version(self):
+        m = Message()
+        m.add_int(_VERSION)
+        self._send_packet(CMD_INIT, m)
+        t, data = self._read_packet()
+        if t != CMD_VERSION:
+            raise SFTPError("Incompatible sftp protocol")
+        msg = Message(data)
+        version = msg.get_int()
+        extensions = {}
+        while msg.get_remainder():
+            name = msg.get_text()
+            extensions[name] = msg.get_binary()
+        self.extensions = extensions
+        return version
+
+    def _check_file_supports(self, algo):
+        """
+        Whether the server announced ``check-file`` support for ``algo``.
+        """
+        algos = self.extensions.get("check-file", b"").split(b",")
+        return algo.encode() in algos
+
+    def _exec_checksum(self, path, algo, offset=0, length=0):
+        """
+        Hash (part of) the already cwd-adjusted ``path`` with a command run
+        over an exec channel.
+        """
+        transport = self.sock.get_transport()
+        name = path.decode("utf-8")
+        status, out, err = run_command(
+            transport, hash_command(algo, name, offset, length)
+        )
+        if status == 0:
+            try:
+                return bytes.fromhex(out.split()[0].decode())
+            except (IndexError, UnicodeDecodeError, ValueError):
+                raise SFTPError("Unexpected output from {!r}".format(algo))
+        # Let stat() raise the error for a missing or unreadable file
+        self.stat(name)
+        raise IOError(
+            errno.EIO,
+            err.decode("utf-8", "replace").strip() or "Hashing failed",
+            name,
+        )
+
+    def _exec_checksum_many(self, paths, algo):
+        """
+        `checksum_many` for servers without ``check-file``: hash batches of
+        paths with one command each.
+        """
+        transport = self.sock.get_transport()
+        adjusted = {}
+        for path in paths:
+            adjusted[path] = self._adjust_cwd(path).decode("utf-8")
+        sums = {}
+        for command, batch in batch_commands(
+            algo, dict.fromkeys(adjusted.values())
+        ):
+            # Files that couldn't be hashed are just missing from the output
+            status, out, err = run_command(transport, command)
+            sums.update(parse_sums(out))
+        return {path: sums.get(name) for path, name in adjusted.items()}
+
+    def _read_window(self):
+        """
+        Number of reads of `limits`' ``max_read_length`` it takes to fill
+        the channel's receive window.
+        """
+        window = self.sock.in_window_size
+        return max(1, -(-window // self.limits.max_read_length))
+
+    def _write_window(self):
+        """
+        Number of writes of `limits`' ``max_write_length`` it takes to fill
+        the channel's send window.
+        """
+        window = self.sock.out_window_size
+        return max(1, -(-window // self.limits.max_write_length))
+
+    def _open_session(self):
+        """
+        Open another SFTP session over this client's transport, of this
+        client's class and sized to the server's limits, whatever kind of
+        `.Transport` it is.
+        """
+        client = type(self).from_transport(self.sock.get_transport())
+        try:
+            client.query_limits()
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    def _read_into(self, path, view, offset, channels=1, window=None):
+        """
+        Fill ``view`` from the remote file ``path`` starting at ``offset``.
+        """
+        if window is None:
+            window = self._read_window()
+        if channels < 1 or window < 1:
+            raise ValueError("channels and window must be at least 1")
+        if view.readonly:
+            raise TypeError("buffer must be writable")
+        ranges = [
+            (index, offset + start, length)
+            for index, (start, length) in enumerate(
+                split_ranges(len(view), self.transfer_range_size)
+            )
+        ]
+        clients = [self]
+        try:
+            for i in range(min(channels, len(ranges)) - 1):
+                clients.append(self._open_session())
+            BufferDownload(
+                clients, self._adjust_cwd(path), view, offset, ranges, window
+            ).run()
+        finally:
+            for client in clients[1:]:
+                client.close()
+
+    def _handle_window(self, window):
+        """
+        Cap a number of directories to keep open at once so that they use at
+        most half of the server's handle limit, leaving the rest for files.
+        """
+        handles = self.limits.max_open_handles
+        if handles is None:
+            return window
+        return max(1, min(window, handles // 2))
+
+    def _glob_literal(self, dirnames, literal, need_dir):
+        """
+        Yield ``dirname/literal`` for each of ``dirnames`` where that exists
+        (and is a directory, with ``need_dir``), checking a batch of
+        `stat_window` paths at a time.
+        """
+        check = self.isdir_many if need_dir else self.lexists_many
+        batch = []
+        for dirname in dirnames:
+            batch.append(posixpath.join(dirname, literal))
+            if len(batch) >= self.stat_window:
+                for path, found in check(batch).items():
+                    if found:
+                        yield path
+                batch = []
+        if batch:
+            for path, found in check(batch).items():
+                if found:
+                    yield path
+
+    def _glob_match(self, dirnames, match, need_dir):
+        """
+        Yield the entries of each of ``dirnames`` whose name satisfies
+        ``match`` (and which are directories, with ``need_dir``).
+        """
+        for dirname in dirnames:
+            try:
+                for entry in self.scandir(dirname or "."):
+                    if match(entry.name) and (not need_dir or entry.is_dir()):
+                        yield posixpath.join(dirname, entry.name)
+            except (OSError, IOError):
+                # Not a directory, or not one we may read
+                continue
+
+    def _glob_recursive(self, dirnames, need_dir, last):
+        """
+        Expand ``**``: yield each of ``dirnames`` and every directory below
+        it (plus files too unless ``need_dir``), skipping hidden names.
+        """
+        for dirname in dirnames:
+            if dirname:
+                yield posixpath.join(dirname, "") if last else dirname
+            elif not last:
+                # The relative root, for later steps to join onto; like
+                # glob.iglob, it's never a match itself
+                yield dirname
+            top = dirname or "."
+            for path, subdirs, files in self.walk(top):
+                subdirs[:] = [d for d in subdirs if not d.startswith(".")]
+                names = (
+                    subdirs
+                    if need_dir
+                    else subdirs + [f for f in files if not f.startswith(".")]
+                )
+                for name in names:
+                    found = posixpath.join(path, name)
+                    if not dirname:
+                        # Undo walk()'s "./" for relative patterns
+                        found = found[2:]
+                    yield found
+
+    def _start_listings(self, stack, listings, window, read_aheads):
+        """
+        Start reading the next directories ``walk`` will visit, as long as
+        fewer than ``window`` are being read.
+        """
+        busy = sum(1 for listing in listings.values() if not listing.done)
+        for path, result in reversed(stack):
+            if busy >= window:
+                break
+            if result is None and path not in listings:
+                listings[path] = _DirListing(
+                    self, self._adjust_cwd(path), read_aheads
+                )
+                busy += 1
+
+    def _send_packet(self, t, packet):
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.sent(t, asbytes(packet))
+        super()._send_packet(t, packet)
+
+    def _read_packet(self):
+        t, data = super()._read_packet()
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.received(t, data)
+        return t, data
+
+    def _readdir(self, path, read_aheads=None):
+        """
+        Open the already cwd-adjusted directory ``path`` and yield an
+        `.SFTPAttributes` (with ``filename`` and ``longname`` set) for each
+        entry but ``'.'`` and ``'..'``, keeping ``read_aheads`` reads queued.
+        """
+        for msg in self._readdir_replies(path, read_aheads):
+            for attr in _names_from_msg(msg):
+                yield attr
+
+    def _readdir_replies(self, path, read_aheads=None):
+        """
+        Open the already cwd-adjusted directory ``path`` and yield each
+        ``SSH_FXP_NAME`` reply to reading it, keeping ``read_aheads`` reads
+        queued.
+        """
+        if read_aheads is None:
+            read_aheads = self.readdir_window
+        if read_aheads < 1:
+            raise ValueError("read_aheads must be at least 1")
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(DEBUG, "scandir({!r})".format(path))
+        t, msg = self._request(CMD_OPENDIR, path)
+        if t != CMD_HANDLE:
+            raise SFTPError("Expected handle")
+        handle = msg.get_binary()
+        collector = _ResponseCollector()
+        pending = deque()
+        eof = False
+        try:
+            while True:
+                while not eof and len(pending) < read_aheads:
+                    pending.append(
+                        self._async_request(collector, CMD_READDIR, handle)
+                    )
+                if not pending:
+                    return
+                num = pending.popleft()
+                while num not in collector.replies:
+                    self._read_response()
+                t, msg = collector.replies.pop(num)
+                if t == CMD_STATUS:
+                    try:
+                        self._convert_status(msg)
+                    except EOFError:
+                        eof = True
+                        continue
+                if t != CMD_NAME:
+                    raise SFTPError("Expected name response")
+                yield msg
+        finally:
+            # Any reads still in flight are answered before the close is
+            self._request(CMD_CLOSE, handle)
+
+    def _path_kind(self, path, follow):
+        """
+        `path_kind` for an already cwd-adjusted ``path``. Unless ``follow``
+        is set, a symlink's target is not looked up, leaving ``stat`` unset.
+        """
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(DEBUG, "path_kind({!r})".format(path))
+        path_lstat = self._lookup(path, False)
+        if path_lstat is None or not stat.S_ISLNK(path_lstat.st_mode):
+            if path_lstat is not None and self._stat_cache is not None:
+                # Not a symlink, so stat() would say just the same
+                self._stat_cache.put(path, True, path_lstat)
+            return PathKind.from_lstat(path_lstat)
+        if not follow:
+            return PathKind(PathKind.SYMLINK, path_lstat, None)
+        path_stat = self._lookup(path, True)
+        if path_stat is None:
+            return PathKind(PathKind.BROKEN_SYMLINK, path_lstat, None)
+        return PathKind(PathKind.SYMLINK, path_lstat, path_stat)
+
+    def _followed_kind(self, path):
+        """
+        `path_kind` for `exists`, `isfile` and `isdir`, which only look at
+        where ``path`` leads: a result already cached for the followed stat
+        (say by `stat_many`) answers them without a request, though its
+        ``kind`` can't tell a symlink apart.
+        """
         path = self._adjust_cwd(path)
-        self._log(DEBUG, "isfile({!r})".format(path))
+        cache = self._stat_cache
+        if cache is not None:
+            path_stat = cache.get(path, True, count_miss=False)
+            if path_stat is not MISSING:
+                return PathKind.from_lstat(path_stat)
+        return self._path_kind(path, True)
 
+    def _lookup(self, path, follow):
+        """
+        Stat (``follow``) or lstat an already cwd-adjusted ``path``, going
+        through the stat cache if there is one. Returns an `.SFTPStat`, or
+        ``None`` instead of raising if the path can't be stat'ed.
+        """
+        cache = self._stat_cache
+        if cache is not None:
+            attr = cache.get(path, follow)
+            if attr is not MISSING:
+                return attr
         try:
-            path_stat = self.stat(path)
+            t, msg = self._request(CMD_STAT if follow else CMD_LSTAT, path)
         except (OSError, IOError) as e:
+            if self.logger.isEnabledFor(DEBUG):
+                self._log(
+                    DEBUG,
+                    "{}: {} ({!r})".format(
+                        type(e).__name__,
+                        e.strerror,
+                        e.filename if e.filename is not None else path,
+                    ),
+                )
+            attr = None
+        else:
+            if t != CMD_ATTRS:
+                raise SFTPError("Expected attributes")
+            attr = SFTPStat.from_msg(msg)
+        if cache is not None:
+            cache.put(path, follow, attr)
+        return attr
+
+    def _invalidate(self, path, recursive=False):
+        """
+        Drop cached stat results for ``path`` (and with ``recursive``,
+        everything beneath it) after this client changed it.
+        """
+        cache = self._stat_cache
+        if cache is not None:
+            cache.invalidate(self._adjust_cwd(path), recursive)
+
+    def _pipelined_stat(self, t, paths, window=None, compact=False):
+        """
+        Send ``t`` (``CMD_STAT`` or ``CMD_LSTAT``) for each of ``paths``,
+        keeping at most ``window`` requests outstanding, and yield
+        ``(path, attr)`` pairs in request order. ``attr`` is an
+        `.SFTPAttributes` (an `.SFTPStat` with ``compact``), or ``None``
+        where the server answered with an error status.
+        """
+        if window is None:
+            window = self.stat_window
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if self.logger.isEnabledFor(DEBUG):
+            self._log(DEBUG, "stat_many(window={!r})".format(window))
+        cache = self._stat_cache
+        follow = t == CMD_STAT
+        collector = _ResponseCollector()
+        # (request number, or None if answered from the cache, path, adjusted
+        # path, cached result)
+        pending = deque()
+        paths = iter(paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                adjusted = self._adjust_cwd(path)
+                if cache is not None:
+                    attr = cache.get(adjusted, follow)
+                    if attr is not MISSING:
+                        if attr is not None and not compact:
+                            attr = attr.to_attributes()
+                        pending.append((None, path, adjusted, attr))
+                        continue
+                num = self._async_request(collector, t, adjusted)
+                pending.append((num, path, adjusted, None))
+            if not pending:
+                return
+            num, path, adjusted, attr = pending.popleft()
+            if num is not None:
+                while num not in collector.replies:
+                    self._read_response()
+                attr = self._attrs_from_reply(
+                    *collector.replies.pop(num), compact=compact
+                )
+                if cache is not None:
+                    kept = attr
+                    if attr is not None and not compact:
+                        kept = SFTPStat.from_attributes(attr)
+                    cache.put(adjusted, follow, kept)
+                    if (
+                        not follow
+                        and kept is not None
+                        and not stat.S_ISLNK(kept.st_mode)
+                    ):
+                        # Not a symlink, so stat() and lstat() agree
+                        cache.put(adjusted, not follow, kept)
+            yield path, attr
+
+    def _create_dirs(self, paths, mode, window=None):
+        """
+        Create the folders ``paths`` (parents before children), keeping at
+        most ``window`` ``SSH_FXP_MKDIR`` requests outstanding, and return the
+        ones this call created.
+
+        Servers handle requests in the order they arrive, so a parent is
+        normally made before the request for its child is looked at; one
+        that failed anyway is retried on its own once all replies are in.
+        A folder someone else created in the meantime isn't an error.
+        """
+        if window is None:
+            window = self.stat_window
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if self.logger.isEnabledFor(DEBUG):
             self._log(
                 DEBUG,
-                "{}: {} ({!r})".format(
-                    type(e).__name__,
-                    e.strerror,
-                    e.filename if e.filename is not None else path,
-                ),
+                "makedirs({} folders, window={!r})".format(len(paths), window),
             )
-            return False
+        attr = SFTPAttributes()
+        attr.st_mode = mode
+        collector = _ResponseCollector()
+        # (request number, path)
+        pending = deque()
+        created = []
+        failed = []
+        paths = iter(paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                    break
+                num = self._async_request(
+                    collector, CMD_MKDIR, self._adjust_cwd(path), attr
+                )
+                pending.append((num, path))
+            if not pending:
+                break
+            num, path = pending.popleft()
+            while num not in collector.replies:
+                self._read_response()
+            t, msg = collector.replies.pop(num)
+            self._invalidate(path)
+            try:
+                if t != CMD_STATUS:
+                    raise SFTPError("Expected status")
+                self._convert_status(msg)
+            except (OSError, IOError):
+                failed.append(path)
+                continue
+            created.append(path)
+        for path in failed:
+            try:
+                super().mkdir(path, mode)
+            except (OSError, IOError) as e:
+                self._invalidate(path)
+                if not self.isdir(path):
+                    raise IOError(e.errno, e.strerror or str(e), path)
+                continue
+            self._invalidate(path)
+            created.append(path)
+        return created
 
-        return stat.S_ISDIR(path_stat.st_mode)
+    def _attrs_from_reply(self, t, msg, compact=False):
+        """
+        Turn a reply to ``CMD_STAT``/``CMD_LSTAT`` into an `.SFTPAttributes`
+        (an `.SFTPStat` with ``compact``), or ``None`` if the server reported
+        an error.
+        """
+        if t == CMD_STATUS:
+            try:
+                self._convert_status(msg)
+            except (OSError, IOError):
+                return None
+        if t != CMD_ATTRS:
+            raise SFTPError("Expected attributes")
+        if compact:
+            return SFTPStat.from_msg(msg)
+        return SFTPAttributes._from_msg(msg)
 
 
 class SFTP(SFTPClient):
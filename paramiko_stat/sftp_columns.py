@@ -0,0 +1,277 @@
+"""
+Directory listings kept as compact columns of numbers instead of one
+`.SFTPAttributes` per entry, for `.SFTPClient.listdir_columns`.
+"""
+
+import stat
+from array import array
+
+from paramiko.sftp_attr import SFTPAttributes
+
+from .sftp_kind import PathKind
+from .sftp_stat import read_attrs
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#: Stands in for a size or mtime the server left out.
+NO_VALUE = -1
+#: Stands in for a uid or gid the server left out.
+NO_ID = 0xFFFFFFFF
+
+_KIND_BITS = {
+    PathKind.FILE: stat.S_IFREG,
+    PathKind.DIR: stat.S_IFDIR,
+    PathKind.SYMLINK: stat.S_IFLNK,
+}
+
+
+class DirColumns:
+    """
+    The entries of a directory as columns: `sizes`, `modes`, `uids`,
+    `gids` and `mtimes` are `array.array` objects with one item per entry,
+    and the names are kept encoded back to back in a single buffer (see
+    `name` and `names`). A million entries take a few tens of MB, where as
+    many `.SFTPAttributes` would take several hundred.
+
+    Like the attributes ``SSH_FXP_READDIR`` returns, these describe the
+    entries themselves: a symlink has the mode and size of the link.
+    Values the server left out are `NO_VALUE` (sizes and mtimes), `NO_ID`
+    (uids and gids) or 0 (modes).
+    """
+
+    def __init__(self):
+        #: Sizes in bytes.
+        self.sizes = array("q")
+        #: ``st_mode`` values, type bits included.
+        self.modes = array("I")
+        #: Owner ids.
+        self.uids = array("I")
+        #: Group ids.
+        self.gids = array("I")
+        #: Modification times, in seconds since the epoch.
+        self.mtimes = array("q")
+        self._names = bytearray()
+        # Where each name ends in _names
+        self._ends = array("Q")
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __repr__(self):
+        return "<DirColumns: {} entries>".format(len(self))
+
+    def name(self, index):
+        """
+        Return the name of entry ``index``.
+        """
+        start, end = self._span(index)
+        return self._names[start:end].decode("utf-8")
+
+    def names(self):
+        """
+        Iterate over the names of the entries, in order.
+        """
+        start = 0
+        for end in self._ends:
+            yield self._names[start:end].decode("utf-8")
+            start = end
+
+    def attributes(self, index):
+        """
+        Return entry ``index`` as an `.SFTPAttributes`, with ``filename``
+        and the values held in columns set.
+        """
+        attr = SFTPAttributes()
+        attr.filename = self.name(index)
+        if self.sizes[index] != NO_VALUE:
+            attr.st_size = self.sizes[index]
+        if self.uids[index] != NO_ID:
+            attr.st_uid = self.uids[index]
+            attr.st_gid = self.gids[index]
+        if self.modes[index]:
+            attr.st_mode = self.modes[index]
+        if self.mtimes[index] != NO_VALUE:
+            attr.st_mtime = self.mtimes[index]
+        return attr
+
+    def select(
+        self,
+        kind=None,
+        min_size=None,
+        max_size=None,
+        modified_after=None,
+        modified_before=None,
+    ):
+        """
+        Return the indices, as an `array.array`, of the entries matching all
+        the conditions given: ``kind`` is `.PathKind.FILE`, `.PathKind.DIR`
+        or `.PathKind.SYMLINK`, sizes are inclusive and times exclusive. An
+        entry missing a value a condition needs doesn't match.
+
+        With NumPy installed, each condition is a boolean mask over a whole
+        column (viewed in place, not copied). Otherwise the entries are
+        narrowed down one condition at a time, keeping the indices still in
+        the running in an `array.array` rather than a list.
+        """
+        if kind is not None:
+            try:
+                bits = _KIND_BITS[kind]
+            except KeyError:
+                raise ValueError("Unsupported kind {!r}".format(kind))
+        by_size = min_size is not None or max_size is not None
+        low = max(min_size or 0, 0)
+        high = max_size if max_size is not None else float("inf")
+        by_mtime = modified_after is not None or modified_before is not None
+        after = NO_VALUE if modified_after is None else modified_after
+        before = float("inf") if modified_before is None else modified_before
+        if numpy is not None:
+            if not len(self):
+                return array("Q")
+            mask = numpy.ones(len(self), dtype=bool)
+            if kind is not None:
+                modes = _view(self.modes)
+                # What stat.S_IFMT masks off
+                mask &= (modes & 0o170000) == bits
+            if by_size:
+                sizes = _view(self.sizes)
+                mask &= (sizes >= low) & (sizes <= high)
+            if by_mtime:
+                mtimes = _view(self.mtimes)
+                mask &= (mtimes != NO_VALUE) & (mtimes > after)
+                mask &= mtimes < before
+            matches = array("Q")
+            matches.frombytes(
+                numpy.flatnonzero(mask).astype(matches.typecode).tobytes()
+            )
+            return matches
+        matches = array("Q", range(len(self)))
+        if kind is not None:
+            modes = self.modes
+            matches = array(
+                "Q", (i for i in matches if stat.S_IFMT(modes[i]) == bits)
+            )
+        if by_size:
+            sizes = self.sizes
+            matches = array(
+                "Q", (i for i in matches if low <= sizes[i] <= high)
+            )
+        if by_mtime:
+            mtimes = self.mtimes
+            matches = array(
+                "Q",
+                (
+                    i
+                    for i in matches
+                    if mtimes[i] != NO_VALUE and after < mtimes[i] < before
+                ),
+            )
+        return matches
+
+    def filter(self, **conditions):
+        """
+        Return a new `DirColumns` holding only the entries matching
+        ``conditions``; see `select`.
+        """
+        return self.take(self.select(**conditions))
+
+    def take(self, indices):
+        """
+        Return a new `DirColumns` holding the entries at ``indices``, in
+        that order.
+        """
+        result = DirColumns()
+        for index in indices:
+            start, end = self._span(index)
+            result._append(
+                self._names[start:end],
+                self.sizes[index],
+                self.uids[index],
+                self.gids[index],
+                self.modes[index],
+                self.mtimes[index],
+            )
+        return result
+
+    def to_numpy(self):
+        """
+        Return the columns as a NumPy structured array with fields
+        ``size``, ``mode``, ``uid``, ``gid`` and ``mtime``; row ``i`` is
+        entry ``i`` (whose name is ``name(i)``).
+
+        :raises ImportError: if NumPy isn't installed
+        """
+        if numpy is None:
+            raise ImportError("DirColumns.to_numpy() needs NumPy")
+        result = numpy.empty(
+            len(self),
+            dtype=[
+                ("size", "i8"),
+                ("mode", "u4"),
+                ("uid", "u4"),
+                ("gid", "u4"),
+                ("mtime", "i8"),
+            ],
+        )
+        if len(self):
+            for field, column in (
+                ("size", self.sizes),
+                ("mode", self.modes),
+                ("uid", self.uids),
+                ("gid", self.gids),
+                ("mtime", self.mtimes),
+            ):
+                result[field] = numpy.frombuffer(column, dtype=column.typecode)
+        return result
+
+    # ...internals...
+
+    def _add_names(self, msg):
+        """
+        Append the entries of an ``SSH_FXP_NAME`` reply to ``SSH_FXP_READDIR``
+        but ``'.'`` and ``'..'``, reading their attributes straight off the
+        message rather than through `.SFTPAttributes`.
+        """
+        for i in range(msg.get_int()):
+            filename = msg.get_binary()
+            # longname
+            msg.get_binary()
+            size, uid, gid, mode, atime, mtime = read_attrs(msg)
+            if filename in (b".", b".."):
+                continue
+            self._append(
+                filename,
+                NO_VALUE if size is None else size,
+                NO_ID if uid is None else uid,
+                NO_ID if gid is None else gid,
+                mode or 0,
+                NO_VALUE if mtime is None else mtime,
+            )
+
+    def _span(self, index):
+        """
+        Return where the name of entry ``index`` starts and ends in
+        ``_names``.
+        """
+        if index < 0:
+            index += len(self)
+        end = self._ends[index]
+        return (self._ends[index - 1] if index else 0), end
+
+    def _append(self, name, size, uid, gid, mode, mtime):
+        self._names += name
+        self._ends.append(len(self._names))
+        self.sizes.append(size)
+        self.uids.append(uid)
+        self.gids.append(gid)
+        self.modes.append(mode)
+        self.mtimes.append(mtime)
+
+
+def _view(column):
+    """
+    Return the `array.array` ``column`` as a NumPy array sharing its memory.
+    """
+    return numpy.frombuffer(column, dtype=column.typecode)
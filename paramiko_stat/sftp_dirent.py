@@ -0,0 +1,100 @@
+"""
+Directory entries yielded by `.SFTPClient.scandir`.
+"""
+
+import errno
+import stat
+
+_UNRESOLVED = object()
+
+
+class SFTPDirEntry:
+    """
+    A remote directory entry, modelled on `os.DirEntry`.
+
+    The type checks and `stat` are answered from the attributes that came
+    back with the ``SSH_FXP_READDIR`` reply, which describe the entry itself
+    rather than what it points to. Only following a symlink needs another
+    request, and its result is remembered on the entry.
+    """
+
+    __slots__ = ("name", "path", "_client", "_lstat", "_stat")
+
+    def __init__(self, client, path, attr):
+        #: The entry's filename, relative to the directory being scanned.
+        self.name = attr.filename
+        #: The entry's path: the directory passed to `.SFTPClient.scandir`
+        #: joined with `name`.
+        self.path = path
+        self._client = client
+        self._lstat = attr
+        self._stat = _UNRESOLVED
+
+    def __repr__(self):
+        return "<SFTPDirEntry {!r}>".format(self.name)
+
+    def __fspath__(self):
+        return self.path
+
+    def is_symlink(self):
+        """
+        Return ``True`` if the entry is a symlink, broken or not.
+        """
+        return stat.S_ISLNK(self._mode(False))
+
+    def is_dir(self, follow_symlinks=True):
+        """
+        Return ``True`` if the entry is a directory or, with
+        ``follow_symlinks``, a symlink to one.
+        """
+        return stat.S_ISDIR(self._mode(follow_symlinks))
+
+    def is_file(self, follow_symlinks=True):
+        """
+        Return ``True`` if the entry is a regular file or, with
+        ``follow_symlinks``, a symlink to one.
+        """
+        return stat.S_ISREG(self._mode(follow_symlinks))
+
+    def stat(self, follow_symlinks=True):
+        """
+        Return the entry's `.SFTPAttributes`, following a symlink entry to
+        its target unless ``follow_symlinks`` is ``False``.
+
+        :raises IOError: if the entry is a broken symlink
+        """
+        if follow_symlinks:
+            attr = self._resolve()
+            if attr is None:
+                raise IOError(errno.ENOENT, "No such file", self.path)
+            return attr
+        return self._own_stat()
+
+    def _own_stat(self):
+        if self._lstat.st_mode is None:
+            # Server left the permissions out of its READDIR reply
+            found = self._client._lookup(
+                self._client._adjust_cwd(self.path), False
+            )
+            if found is not None:
+                self._lstat = found.to_attributes()
+                self._lstat.filename = self.name
+        return self._lstat
+
+    def _resolve(self):
+        if self._stat is _UNRESOLVED:
+            attr = self._own_stat()
+            if attr.st_mode is not None and stat.S_ISLNK(attr.st_mode):
+                # _lookup hands back an SFTPStat
+                found = self._client._lookup(
+                    self._client._adjust_cwd(self.path), True
+                )
+                attr = None if found is None else found.to_attributes()
+            self._stat = attr
+        return self._stat
+
+    def _mode(self, follow_symlinks):
+        attr = self._resolve() if follow_symlinks else self._own_stat()
+        if attr is None or attr.st_mode is None:
+            return 0
+        return attr.st_mode
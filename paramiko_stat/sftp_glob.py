@@ -0,0 +1,63 @@
+"""
+Pattern parsing for `.SFTPClient.glob` and `.SFTPClient.iglob`.
+"""
+
+import fnmatch
+import re
+
+_magic_check = re.compile("[*?[]")
+
+#: Marks a ``**`` segment in the output of `split_pattern`.
+RECURSIVE = object()
+
+
+def has_magic(s):
+    """
+    Return ``True`` if ``s`` contains any of the wildcards ``*?[``.
+    """
+    return _magic_check.search(s) is not None
+
+
+def split_pattern(pattern, recursive=False):
+    """
+    Split a glob pattern into the root to start matching from and a list of
+    steps.
+
+    Runs of literal path segments are merged into a single string step;
+    a segment containing wildcards becomes a compiled matcher (a callable
+    taking a name), and with ``recursive`` a ``**`` segment becomes
+    `RECURSIVE`. Empty segments (from ``//`` or a trailing ``/``) are
+    dropped.
+
+    :return: ``(root, steps, dir_only)``, ``root`` being ``'/'`` for
+        absolute patterns and ``''`` otherwise, and ``dir_only`` telling
+        whether the pattern ended with ``/``
+    """
+    root = "/" if pattern.startswith("/") else ""
+    dir_only = pattern.endswith("/")
+    steps = []
+    for segment in pattern.split("/"):
+        if not segment:
+            continue
+        if recursive and segment == "**":
+            if not steps or steps[-1] is not RECURSIVE:
+                steps.append(RECURSIVE)
+        elif has_magic(segment):
+            steps.append(_compile(segment))
+        elif steps and isinstance(steps[-1], str):
+            steps[-1] += "/" + segment
+        else:
+            steps.append(segment)
+    return root, steps, dir_only
+
+
+def _compile(segment):
+    match = re.compile(fnmatch.translate(segment)).match
+    if segment.startswith("."):
+        return match
+
+    def match_visible(name):
+        # As with the glob module, wildcards don't match hidden names
+        return not name.startswith(".") and match(name)
+
+    return match_visible
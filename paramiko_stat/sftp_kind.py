@@ -0,0 +1,78 @@
+"""
+Classification of remote paths, as returned by `.SFTPClient.path_kind`.
+"""
+
+import stat
+from collections import namedtuple
+
+
+class PathKind(namedtuple("PathKind", ["kind", "lstat", "stat"])):
+    """
+    What a remote path turned out to be.
+
+    ``kind`` is one of the string constants below. ``lstat`` holds the
+    attributes (an `.SFTPStat`) of the path itself and ``stat`` those of
+    whatever it resolves to, following symlinks; for anything but a symlink
+    they are the same object. ``lstat`` is ``None`` for a missing path and
+    ``stat`` is ``None`` for a missing path or a broken symlink.
+    """
+
+    __slots__ = ()
+
+    FILE = "file"
+    DIR = "dir"
+    SYMLINK = "symlink"
+    BROKEN_SYMLINK = "broken_symlink"
+    OTHER = "other"
+    MISSING = "missing"
+
+    @classmethod
+    def from_lstat(cls, lstat):
+        """
+        Classify a path that is known not to be a symlink from its ``lstat``
+        attributes (``None`` meaning it does not exist).
+        """
+        if lstat is None:
+            return cls(cls.MISSING, None, None)
+        if stat.S_ISREG(lstat.st_mode):
+            kind = cls.FILE
+        elif stat.S_ISDIR(lstat.st_mode):
+            kind = cls.DIR
+        else:
+            kind = cls.OTHER
+        return cls(kind, lstat, lstat)
+
+    @property
+    def exists(self):
+        """
+        ``True`` unless the path is missing or a broken symlink.
+        """
+        return self.stat is not None
+
+    @property
+    def lexists(self):
+        """
+        ``True`` unless the path is missing.
+        """
+        return self.lstat is not None
+
+    @property
+    def is_file(self):
+        """
+        ``True`` if the path is, or is a symlink to, a regular file.
+        """
+        return self.stat is not None and stat.S_ISREG(self.stat.st_mode)
+
+    @property
+    def is_dir(self):
+        """
+        ``True`` if the path is, or is a symlink to, a directory.
+        """
+        return self.stat is not None and stat.S_ISDIR(self.stat.st_mode)
+
+    @property
+    def is_symlink(self):
+        """
+        ``True`` if the path itself is a symlink, broken or not.
+        """
+        return self.kind in (self.SYMLINK, self.BROKEN_SYMLINK)
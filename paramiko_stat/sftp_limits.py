@@ -0,0 +1,61 @@
+"""
+Server limits reported by the ``limits@openssh.com`` SFTP extension.
+"""
+
+from collections import namedtuple
+from typing import ClassVar
+
+
+class SFTPLimits(
+    namedtuple(
+        "SFTPLimits",
+        [
+            "max_packet_length",
+            "max_read_length",
+            "max_write_length",
+            "max_open_handles",
+        ],
+    )
+):
+    """
+    How much an SFTP server accepts: the longest packet, the most data one
+    ``SSH_FXP_READ`` returns and one ``SSH_FXP_WRITE`` may carry (in bytes),
+    and how many handles may be open at once (``None`` if unlimited or
+    unknown).
+
+    `DEFAULT` holds the conservative values used for servers that don't
+    report their limits; they match what paramiko has always used.
+    """
+
+    __slots__ = ()
+
+    #: Limits assumed for servers that don't report theirs.
+    DEFAULT: ClassVar["SFTPLimits"]
+
+    @classmethod
+    def from_reply(cls, msg):
+        """
+        Parse the ``SSH_FXP_EXTENDED_REPLY`` to a ``limits@openssh.com``
+        request. Limits the server leaves at 0 (unknown) fall back to
+        `DEFAULT`.
+        """
+        packet, read, write, handles = (msg.get_int64() for i in range(4))
+        return cls(
+            packet or cls.DEFAULT.max_packet_length,
+            read or cls.DEFAULT.max_read_length,
+            write or cls.DEFAULT.max_write_length,
+            handles or None,
+        )
+
+    def chunk_size(self, mode):
+        """
+        Return the largest request to make on a file opened with ``mode``.
+        """
+        if "r" in mode and "+" not in mode:
+            return self.max_read_length
+        if "+" in mode:
+            return min(self.max_read_length, self.max_write_length)
+        return self.max_write_length
+
+
+SFTPLimits.DEFAULT = SFTPLimits(34000, 32768, 32768, None)
@@ -0,0 +1,173 @@
+"""
+Per-request-type counters and latency histograms for `.SFTPClient`.
+"""
+
+import errno
+import struct
+import threading
+import time
+from bisect import bisect_left
+
+from paramiko.sftp import (
+    CMD_NAMES,
+    CMD_STATUS,
+    SFTP_BAD_MESSAGE,
+    SFTP_CONNECTION_LOST,
+    SFTP_EOF,
+    SFTP_NO_CONNECTION,
+    SFTP_NO_SUCH_FILE,
+    SFTP_OK,
+    SFTP_OP_UNSUPPORTED,
+    SFTP_PERMISSION_DENIED,
+)
+
+#: The errno recorded for each SFTP error status (any other counts as EIO).
+STATUS_ERRNO = {
+    SFTP_NO_SUCH_FILE: errno.ENOENT,
+    SFTP_PERMISSION_DENIED: errno.EACCES,
+    SFTP_BAD_MESSAGE: errno.EBADMSG,
+    SFTP_NO_CONNECTION: errno.ENOTCONN,
+    SFTP_CONNECTION_LOST: errno.ECONNRESET,
+    SFTP_OP_UNSUPPORTED: errno.EOPNOTSUPP,
+}
+
+_unpack_int = struct.Struct(">I").unpack_from
+
+
+class _Operation:
+    __slots__ = (
+        "count",
+        "bytes_sent",
+        "bytes_received",
+        "errors",
+        "latency_sum",
+        "latency_max",
+        "histogram",
+    )
+
+    def __init__(self, buckets):
+        self.count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors = {}
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        # One more bucket than bounds, for latencies above the last
+        self.histogram = [0] * (buckets + 1)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "errors": dict(self.errors),
+            "latency_sum": self.latency_sum,
+            "latency_max": self.latency_max,
+            "histogram": list(self.histogram),
+        }
+
+
+class SFTPMetrics:
+    """
+    Counts the requests an `.SFTPClient` makes, by type: how many were
+    answered, the bytes sent and received, errors by errno, and a histogram
+    of the time from sending each request to reading its reply.
+
+    Recording costs a few dictionary operations and a bisection per request;
+    nothing is formatted until `snapshot` is called.
+
+    Use `.SFTPClient.enable_metrics` rather than instantiating this directly.
+    """
+
+    #: Upper bounds (in seconds) of the latency histogram buckets; a final
+    #: bucket counts everything slower.
+    BUCKETS = (
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # request type -> _Operation
+        self._operations = {}
+        # request number -> (request type, time sent)
+        self._pending = {}
+        self.started = time.monotonic()
+
+    def sent(self, t, packet):
+        """
+        Record that request ``t`` was sent as ``packet`` (the bytes after the
+        type, starting with the request number).
+        """
+        now = time.monotonic()
+        with self._lock:
+            op = self._operations.get(t)
+            if op is None:
+                op = self._operations[t] = _Operation(len(self.BUCKETS))
+            op.bytes_sent += len(packet)
+            self._pending[_unpack_int(packet)[0]] = (t, now)
+
+    def received(self, t, data):
+        """
+        Record that reply ``t`` arrived as ``data`` (starting with the
+        request number).
+        """
+        now = time.monotonic()
+        with self._lock:
+            request = self._pending.pop(_unpack_int(data)[0], None)
+            if request is None:
+                return
+            op = self._operations[request[0]]
+            latency = now - request[1]
+            op.count += 1
+            op.bytes_received += len(data)
+            op.latency_sum += latency
+            if latency > op.latency_max:
+                op.latency_max = latency
+            op.histogram[bisect_left(self.BUCKETS, latency)] += 1
+            if t == CMD_STATUS:
+                code = _unpack_int(data, 4)[0]
+                if code != SFTP_OK and code != SFTP_EOF:
+                    code = STATUS_ERRNO.get(code, errno.EIO)
+                    op.errors[code] = op.errors.get(code, 0) + 1
+
+    def snapshot(self):
+        """
+        Return the counts so far, as a `dict` keyed by request name
+        (``"stat"``, ``"read"``, ...). Each value is a `dict` with
+        ``count`` (replies received), ``bytes_sent``, ``bytes_received``,
+        ``errors`` (errno to count), ``latency_sum``, ``latency_max`` (in
+        seconds) and ``histogram`` (counts per bucket of `BUCKETS`, plus one
+        for slower replies).
+        """
+        with self._lock:
+            return {
+                CMD_NAMES.get(t, str(t)): op.snapshot()
+                for t, op in self._operations.items()
+            }
+
+    def reset(self):
+        """
+        Zero all counts. Requests still in flight are counted when their
+        replies arrive.
+        """
+        with self._lock:
+            self._operations = {
+                t: _Operation(len(self.BUCKETS))
+                for t, when in self._pending.values()
+            }
+            self.started = time.monotonic()
@@ -0,0 +1,265 @@
+"""
+Directory tree traversal spread over several SFTP channels of one transport.
+"""
+
+import posixpath
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .sftp_client import _DirListing
+from .sftp_dirent import SFTPDirEntry
+
+# Markers for the items workers put on the results queue
+_RESULT, _ERROR, _FATAL, _DONE = range(4)
+
+
+class ChannelStats:
+    """
+    Work done by one channel of a `ParallelWalk`.
+    """
+
+    def __init__(self, name):
+        #: The channel's name, as in the transport's log messages.
+        self.name = name
+        #: Number of directories listed.
+        self.directories = 0
+        #: Number of directory entries read.
+        self.entries = 0
+        #: Number of directories taken from another channel's queue.
+        self.steals = 0
+        #: Seconds spent waiting on the server rather than idle.
+        self.busy = 0.0
+
+    def __repr__(self):
+        return (
+            "<ChannelStats {} dirs={} entries={} steals={} "
+            "entries/s={:.0f}>".format(
+                self.name,
+                self.directories,
+                self.entries,
+                self.steals,
+                self.entries_per_second,
+            )
+        )
+
+    @property
+    def entries_per_second(self):
+        """
+        Entries read per busy second.
+        """
+        return self.entries / self.busy if self.busy else 0.0
+
+
+class ParallelWalk:
+    """
+    Walk a remote tree with ``channels`` SFTP sessions of one `.Transport`,
+    each on its own thread.
+
+    Every channel keeps a queue of directories it discovered and works
+    through it depth-first; a channel that runs dry steals the oldest
+    directory from another's queue. Each channel reads up to ``window`` of
+    its directories at once, as `.SFTPClient.walk` does.
+
+    Iterating yields ``(dirpath, dirnames, filenames)`` tuples like
+    `.SFTPClient.walk` with ``topdown``, except that they come in whatever
+    order the channels finish them and ``dirnames`` cannot be pruned. At most
+    ``queue_depth`` results are buffered for the consumer before the channels
+    wait. Per-channel figures are in `stats`.
+
+    Use `.Transport.parallel_walk` rather than instantiating this directly.
+    """
+
+    def __init__(
+        self,
+        transport,
+        top,
+        channels=4,
+        queue_depth=1024,
+        onerror=None,
+        followlinks=False,
+        window=None,
+        read_aheads=None,
+    ):
+        if channels < 1 or queue_depth < 1:
+            raise ValueError("channels and queue_depth must be at least 1")
+        self._onerror = onerror
+        self._followlinks = followlinks
+        self._clients = []
+        try:
+            for i in range(channels):
+                self._clients.append(transport.open_sftp_client())
+        except Exception:
+            self._close_clients()
+            raise
+        self._window = window or self._clients[0].walk_window
+        self._read_aheads = read_aheads or self._clients[0].readdir_window
+        #: A `.ChannelStats` per channel.
+        self.stats = [
+            ChannelStats(client.get_channel().get_name())
+            for client in self._clients
+        ]
+        self._queues = [deque() for client in self._clients]
+        self._queues[0].append(top)
+        # Directories queued or being listed; the walk ends when it hits 0
+        self._pending = 1
+        self._stopped = False
+        self._lock = threading.Condition()
+        self._results = queue.Queue(queue_depth)
+        self._executor = ThreadPoolExecutor(
+            max_workers=channels, thread_name_prefix="parallel_walk"
+        )
+        self._workers = [
+            self._executor.submit(self._work, i)
+            for i in range(len(self._clients))
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        running = len(self._workers)
+        try:
+            while running:
+                kind, value = self._results.get()
+                if kind == _RESULT:
+                    yield value
+                elif kind == _ERROR:
+                    if self._onerror is not None:
+                        self._onerror(value)
+                elif kind == _FATAL:
+                    raise value
+                else:
+                    running -= 1
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stop the walk (if still running) and close the channels.
+        """
+        with self._lock:
+            self._stopped = True
+            self._lock.notify_all()
+        while not all(worker.done() for worker in self._workers):
+            # Unblock workers waiting for room on the results queue
+            try:
+                self._results.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        self._executor.shutdown()
+        self._close_clients()
+
+    def _close_clients(self):
+        for client in self._clients:
+            client.close()
+
+    def _put(self, kind, value):
+        while not self._stopped:
+            try:
+                self._results.put((kind, value), timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+    def _take(self, i, block):
+        """
+        Next directory for channel ``i``: its own most recent one, else the
+        oldest one from another channel. ``None`` when the walk is over, or
+        when there is nothing to do and ``block`` is false.
+        """
+        queues = self._queues
+        with self._lock:
+            while True:
+                if self._stopped or not self._pending:
+                    return None
+                if queues[i]:
+                    return queues[i].pop()
+                for j in range(1, len(queues)):
+                    victim = queues[(i + j) % len(queues)]
+                    if victim:
+                        self.stats[i].steals += 1
+                        return victim.popleft()
+                if not block:
+                    return None
+                self._lock.wait()
+
+    def _finished(self, i, subdirs):
+        with self._lock:
+            # Reversed so the first subdirectory is the next one popped
+            self._queues[i].extend(reversed(subdirs))
+            self._pending += len(subdirs) - 1
+            self._lock.notify_all()
+
+    def _work(self, i):
+        client = self._clients[i]
+        stats = self.stats[i]
+        window = client._handle_window(self._window)
+        active = deque()
+        try:
+            while True:
+                while len(active) < window:
+                    path = self._take(i, block=not active)
+                    if path is None:
+                        break
+                    listing = _DirListing(
+                        client, client._adjust_cwd(path), self._read_aheads
+                    )
+                    active.append((path, listing))
+                if not active:
+                    return
+                path, listing = active.popleft()
+                start = time.perf_counter()
+                while not listing.done:
+                    client._read_response()
+                subdirs = self._process(client, path, listing)
+                stats.busy += time.perf_counter() - start
+                stats.directories += 1
+                stats.entries += len(listing.entries)
+                self._finished(i, subdirs)
+        except Exception as e:
+            with self._lock:
+                self._stopped = True
+                self._lock.notify_all()
+            # Not through _put, which gives up once the walk is stopped
+            self._results.put((_FATAL, e))
+        finally:
+            for path, listing in active:
+                listing.abandon()
+            try:
+                for path, listing in active:
+                    while not listing.done:
+                        client._read_response()
+            finally:
+                self._results.put((_DONE, None))
+
+    def _process(self, client, path, listing):
+        """
+        Report a finished listing and return the subdirectories to walk.
+        """
+        if listing.error is not None:
+            error = listing.error
+            if getattr(error, "filename", None) is None:
+                error.filename = path
+            self._put(_ERROR, error)
+            return []
+        dirnames = []
+        filenames = []
+        subdirs = []
+        for attr in listing.entries:
+            entry = SFTPDirEntry(
+                client, posixpath.join(path, attr.filename), attr
+            )
+            if entry.is_dir():
+                dirnames.append(entry.name)
+                if self._followlinks or not entry.is_symlink():
+                    subdirs.append(entry.path)
+            else:
+                filenames.append(entry.name)
+        self._put(_RESULT, (path, dirnames, filenames))
+        return subdirs
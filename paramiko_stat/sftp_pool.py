@@ -0,0 +1,221 @@
+"""
+A pool of SFTP sessions sharing one `.Transport`.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from paramiko.ssh_exception import SSHException
+
+
+class SFTPSessionPool:
+    """
+    Keeps open `.SFTPClient` sessions on one transport for reuse, so that
+    short tasks don't each pay for opening a channel and starting the
+    ``sftp`` subsystem.
+
+    At most ``max_size`` sessions are open at once; ``min_size`` of them are
+    opened up front and kept even when idle, while any others are closed
+    after ``idle_timeout`` seconds unused. A session that has been idle for
+    more than ``ping_after`` seconds is checked with a round-trip before it
+    is handed out, and one whose channel has closed is replaced.
+
+    The counters (``checkouts``, ``created``, ``discarded``, ``exhausted``,
+    ``wait_time``) show how the pool is used; ``exhausted`` counts checkouts
+    that had to wait for a session to be returned, and ``wait_time`` the
+    total seconds spent waiting.
+
+    Use `.Transport.open_sftp_pool` rather than instantiating this directly.
+    """
+
+    def __init__(
+        self,
+        transport,
+        max_size=4,
+        min_size=0,
+        idle_timeout=60.0,
+        ping_after=10.0,
+        timeout=None,
+    ):
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError("need 0 <= min_size <= max_size and max_size > 0")
+        self.transport = transport
+        self.max_size = max_size
+        self.min_size = min_size
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.timeout = timeout
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.exhausted = 0
+        self.wait_time = 0.0
+        self._lock = threading.Condition()
+        # (client, time it was returned), most recently returned last
+        self._idle = []
+        # Sessions open or being opened, whether idle or checked out
+        self._size = 0
+        self._closed = False
+        for i in range(min_size):
+            self._size += 1
+            self._idle.append((self._open(), time.monotonic()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def size(self):
+        """
+        Number of sessions currently open, idle or not.
+        """
+        return self._size
+
+    @property
+    def idle(self):
+        """
+        Number of sessions waiting to be checked out.
+        """
+        return len(self._idle)
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Check out a session for the duration of a ``with`` block.
+
+        :param float timeout:
+            seconds to wait for a session if all are in use (defaults to the
+            pool's ``timeout``; ``None`` waits forever)
+        :raises SSHException: if no session became free in time
+        """
+        client = self.checkout(timeout)
+        try:
+            yield client
+        finally:
+            self.checkin(client)
+
+    def checkout(self, timeout=None):
+        """
+        Take a session out of the pool; it must be given back with
+        `checkin`. Prefer `session`.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise SSHException("SFTP session pool is closed")
+                    self._reap()
+                    if self._idle:
+                        client, since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        client = since = None
+                        break
+                    if not waited:
+                        self.exhausted += 1
+                        waited = True
+                    remaining = None
+                    if timeout is not None:
+                        remaining = start + timeout - time.monotonic()
+                        if remaining <= 0:
+                            raise SSHException(
+                                "Timed out waiting for an SFTP session"
+                            )
+                    self._lock.wait(remaining)
+            if client is None:
+                try:
+                    client = self._open()
+                except Exception:
+                    self._release()
+                    raise
+            elif not self._healthy(client, since):
+                client.close()
+                with self._lock:
+                    self.discarded += 1
+                self._release()
+                continue
+            with self._lock:
+                self.checkouts += 1
+                self.wait_time += time.monotonic() - start
+            return client
+
+    def checkin(self, client):
+        """
+        Give back a session obtained from `checkout`. Its working directory
+        is reset; if its channel has closed it is dropped instead.
+        """
+        client.chdir(None)
+        if self._closed or client.get_channel().closed:
+            client.close()
+            with self._lock:
+                self.discarded += 1
+            self._release()
+            return
+        with self._lock:
+            self._idle.append((client, time.monotonic()))
+            self._lock.notify()
+
+    def reap(self):
+        """
+        Close sessions that have been idle for longer than ``idle_timeout``
+        (keeping ``min_size`` open). This also happens on every checkout.
+        """
+        with self._lock:
+            self._reap()
+
+    def close(self):
+        """
+        Close all idle sessions; sessions still checked out are closed when
+        they are returned.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for client, since in idle:
+            client.close()
+
+    # ...internals...
+
+    def _open(self):
+        client = self.transport.open_sftp_client()
+        with self._lock:
+            self.created += 1
+        return client
+
+    def _release(self):
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    def _reap(self):
+        # Oldest idle sessions come first
+        deadline = time.monotonic() - self.idle_timeout
+        while (
+            self._idle
+            and self._idle[0][1] < deadline
+            and self._size > self.min_size
+        ):
+            client, since = self._idle.pop(0)
+            client.close()
+            self._size -= 1
+            self._lock.notify()
+
+    def _healthy(self, client, since):
+        if client.get_channel().closed or not self.transport.is_active():
+            return False
+        if time.monotonic() - since > self.ping_after:
+            try:
+                client.normalize(".")
+            except Exception:
+                return False
+        return True
@@ -0,0 +1,109 @@
+"""
+A compact stat result, for holding the attributes of many paths at once.
+"""
+
+import stat
+from collections import namedtuple
+
+from paramiko.sftp_attr import SFTPAttributes
+
+
+def read_attrs(msg):
+    """
+    Read an SFTP ``ATTRS`` structure off ``msg`` and return its
+    ``(st_size, st_uid, st_gid, st_mode, st_atime, st_mtime)``, each
+    ``None`` if the server left it out. Extended attributes are skipped.
+    """
+    flags = msg.get_int()
+    size = uid = gid = mode = atime = mtime = None
+    if flags & SFTPAttributes.FLAG_SIZE:
+        size = msg.get_int64()
+    if flags & SFTPAttributes.FLAG_UIDGID:
+        uid = msg.get_int()
+        gid = msg.get_int()
+    if flags & SFTPAttributes.FLAG_PERMISSIONS:
+        mode = msg.get_int()
+    if flags & SFTPAttributes.FLAG_AMTIME:
+        atime = msg.get_int()
+        mtime = msg.get_int()
+    if flags & SFTPAttributes.FLAG_EXTENDED:
+        for i in range(msg.get_int()):
+            msg.get_binary()
+            msg.get_binary()
+    return size, uid, gid, mode, atime, mtime
+
+
+class SFTPStat(
+    namedtuple(
+        "SFTPStat",
+        ["st_size", "st_uid", "st_gid", "st_mode", "st_atime", "st_mtime"],
+    )
+):
+    """
+    The result of a ``stat``/``lstat``, as a tuple: the same ``st_*``
+    values as an `.SFTPAttributes` (``None`` where the server left one
+    out), in a fraction of the memory. This is what the stat cache holds,
+    what `.SFTPClient.path_kind` returns and what `.SFTPClient.stat_many`
+    returns with ``compact``.
+
+    Extended attributes, a filename and a longname are never kept; use
+    `to_attributes` where an `.SFTPAttributes` is needed.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_msg(cls, msg):
+        """
+        Parse the ``SSH_FXP_ATTRS`` reply ``msg``.
+        """
+        return cls(*read_attrs(msg))
+
+    @classmethod
+    def from_attributes(cls, attr):
+        """
+        Make an `SFTPStat` from the `.SFTPAttributes` ``attr``.
+        """
+        return cls(
+            attr.st_size,
+            attr.st_uid,
+            attr.st_gid,
+            attr.st_mode,
+            attr.st_atime,
+            attr.st_mtime,
+        )
+
+    def to_attributes(self):
+        """
+        Return these values as a new `.SFTPAttributes`.
+        """
+        attr = SFTPAttributes()
+        attr.st_size = self.st_size
+        attr.st_uid = self.st_uid
+        attr.st_gid = self.st_gid
+        attr.st_mode = self.st_mode
+        attr.st_atime = self.st_atime
+        attr.st_mtime = self.st_mtime
+        return attr
+
+    @property
+    def is_file(self):
+        """
+        ``True`` for a regular file, as `.SFTPClient.isfile` decides.
+        """
+        return self.st_mode is not None and stat.S_ISREG(self.st_mode)
+
+    @property
+    def is_dir(self):
+        """
+        ``True`` for a directory, as `.SFTPClient.isdir` decides.
+        """
+        return self.st_mode is not None and stat.S_ISDIR(self.st_mode)
+
+    @property
+    def is_symlink(self):
+        """
+        ``True`` for a symlink (so only from an ``lstat``), as
+        `.SFTPClient.islink` decides.
+        """
+        return self.st_mode is not None and stat.S_ISLNK(self.st_mode)
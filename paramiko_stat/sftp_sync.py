@@ -0,0 +1,301 @@
+"""
+Mirroring a directory tree between the local and remote sides, for
+`.SFTPClient.sync_tree`.
+"""
+
+import errno
+import hashlib
+import os
+import posixpath
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .sftp_pool import SFTPSessionPool
+
+DOWNLOAD = "download"
+UPLOAD = "upload"
+
+
+class SyncSummary:
+    """
+    What a `.SFTPClient.sync_tree` call did.
+    """
+
+    def __init__(self):
+        #: Number of files transferred.
+        self.files_sent = 0
+        #: Bytes in the files transferred.
+        self.bytes_sent = 0
+        #: Number of files left alone because they were already up to date.
+        self.files_skipped = 0
+        #: Bytes in the files left alone.
+        self.bytes_skipped = 0
+        #: Number of files and directories deleted from the target.
+        self.deleted = 0
+        #: Number of directories created on the target.
+        self.dirs_created = 0
+        #: ``(path, exception)`` for each file that couldn't be synced.
+        self.errors = []
+
+    def __repr__(self):
+        return (
+            "<SyncSummary sent={} ({} bytes) skipped={} ({} bytes) "
+            "deleted={} dirs_created={} errors={}>".format(
+                self.files_sent,
+                self.bytes_sent,
+                self.files_skipped,
+                self.bytes_skipped,
+                self.deleted,
+                self.dirs_created,
+                len(self.errors),
+            )
+        )
+
+
+def local_tree(top):
+    """
+    Return ``(dirs, files)`` for the local tree at ``top``: the relative
+    paths of its directories and a mapping of the relative path of each
+    regular file to its `os.stat_result`. Symlinks are followed for files
+    but not descended into for directories.
+    """
+    dirs = set()
+    files = {}
+    if not os.path.isdir(top):
+        return dirs, files
+    for dirpath, dirnames, filenames in os.walk(top):
+        rel = os.path.relpath(dirpath, top)
+        rel = "" if rel == "." else rel.replace(os.sep, "/")
+        for name in dirnames:
+            if not os.path.islink(os.path.join(dirpath, name)):
+                dirs.add(posixpath.join(rel, name))
+        for name in filenames:
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                files[posixpath.join(rel, name)] = st
+    return dirs, files
+
+
+def remote_tree(client, top):
+    """
+    Like `local_tree`, for the remote tree at ``top`` (already
+    cwd-adjusted): directories come from a `.SFTPClient.walk`, less the
+    symlinks one compact `.SFTPClient.lstat_many` batch finds among them,
+    and the files' `.SFTPStat` from one compact `.SFTPClient.stat_many`
+    batch.
+    """
+    dir_paths = {}
+    paths = {}
+    if not client.isdir(top):
+        return set(), {}
+    for dirpath, dirnames, filenames in client.walk(top):
+        rel = posixpath.relpath(dirpath, top)
+        rel = "" if rel == "." else rel
+        for name in dirnames:
+            dir_paths[posixpath.join(dirpath, name)] = posixpath.join(
+                rel, name
+            )
+        for name in filenames:
+            paths[posixpath.join(dirpath, name)] = posixpath.join(rel, name)
+    # walk() lists symlinks to directories without descending into them
+    dirs = set()
+    for path, attr in client.lstat_many(dir_paths, compact=True).items():
+        if attr is not None and not attr.is_symlink:
+            dirs.add(dir_paths[path])
+    files = {}
+    for path, attr in client.stat_many(paths, compact=True).items():
+        if attr is not None and attr.is_file:
+            files[paths[path]] = attr
+    return dirs, files
+
+
+def local_checksum(path, algo):
+    digest = hashlib.new(algo)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class _Sync:
+    """
+    One `.SFTPClient.sync_tree` run; see there.
+    """
+
+    def __init__(self, client, remote, local, direction, delete, checksum):
+        self.client = client
+        self.remote = remote
+        self.local = local
+        self.direction = direction
+        self.delete = delete
+        self.checksum = checksum
+        self.summary = SyncSummary()
+        self._lock = threading.Lock()
+
+    def run(self, workers):
+        client = self.client
+        if self.direction == DOWNLOAD:
+            # Raises if it's missing, before anything gets deleted
+            if not stat.S_ISDIR(client.stat(self.remote).st_mode):
+                raise IOError(errno.ENOTDIR, "Not a directory", self.remote)
+        elif not os.path.isdir(self.local):
+            raise IOError(errno.ENOTDIR, "Not a directory", self.local)
+        remote_dirs, remote_files = remote_tree(client, self.remote)
+        local_dirs, local_files = local_tree(self.local)
+        if self.direction == DOWNLOAD:
+            source_dirs, source_files = remote_dirs, remote_files
+            target_dirs, target_files = local_dirs, local_files
+        else:
+            source_dirs, source_files = local_dirs, local_files
+            target_dirs, target_files = remote_dirs, remote_files
+
+        changed = self._changed(source_files, target_files)
+        for rel in sorted(source_files.keys() - set(changed)):
+            self.summary.files_skipped += 1
+            self.summary.bytes_skipped += source_files[rel].st_size
+        if self.delete:
+            self._delete(
+                target_dirs - source_dirs,
+                target_files.keys() - source_files.keys(),
+            )
+        self._make_dirs(sorted(source_dirs - target_dirs))
+        self._transfer([(rel, source_files[rel]) for rel in changed], workers)
+        return self.summary
+
+    # ...internals...
+
+    def _changed(self, source_files, target_files):
+        """
+        Return the relative paths of the source files that need sending, in
+        order.
+        """
+        changed = []
+        same_size = []
+        for rel in sorted(source_files):
+            source = source_files[rel]
+            target = target_files.get(rel)
+            if target is None or source.st_size != target.st_size:
+                changed.append(rel)
+            elif self.checksum:
+                same_size.append(rel)
+            elif int(source.st_mtime) != int(target.st_mtime):
+                changed.append(rel)
+        if same_size:
+            remote = self.client.checksum_many(
+                [posixpath.join(self.remote, rel) for rel in same_size],
+                self.checksum,
+            )
+            for rel in same_size:
+                digest = remote[posixpath.join(self.remote, rel)]
+                local = os.path.join(self.local, *rel.split("/"))
+                try:
+                    matches = digest == local_checksum(local, self.checksum)
+                except OSError:
+                    matches = False
+                if not matches:
+                    changed.append(rel)
+            changed.sort()
+        return changed
+
+    def _make_dirs(self, rels):
+        """
+        Create the target's top directory if need be, then the directories
+        ``rels`` (parents first) below it.
+        """
+        client = self.client
+        download = self.direction == DOWNLOAD
+        if download:
+            top_exists = os.path.isdir(self.local)
+        else:
+            top_exists = client.isdir(self.remote)
+        # "" stands for the top directory
+        for rel in ([] if top_exists else [""]) + list(rels):
+            try:
+                if download and rel:
+                    os.mkdir(os.path.join(self.local, *rel.split("/")))
+                elif download:
+                    os.makedirs(self.local)
+                else:
+                    client.mkdir(posixpath.join(self.remote, rel).rstrip("/"))
+            except (OSError, IOError) as e:
+                self.summary.errors.append((rel, e))
+                continue
+            self.summary.dirs_created += 1
+
+    def _delete(self, dirs, files):
+        """
+        Delete the target's ``files``, then its ``dirs`` deepest first.
+        """
+        client = self.client
+        download = self.direction == DOWNLOAD
+        for rel in sorted(files):
+            try:
+                if download:
+                    os.remove(os.path.join(self.local, *rel.split("/")))
+                else:
+                    client.remove(posixpath.join(self.remote, rel))
+            except (OSError, IOError) as e:
+                self.summary.errors.append((rel, e))
+                continue
+            self.summary.deleted += 1
+        for rel in sorted(dirs, key=lambda rel: rel.count("/"), reverse=True):
+            try:
+                if download:
+                    shutil.rmtree(os.path.join(self.local, *rel.split("/")))
+                else:
+                    client.rmdir(posixpath.join(self.remote, rel))
+            except (OSError, IOError) as e:
+                self.summary.errors.append((rel, e))
+                continue
+            self.summary.deleted += 1
+
+    def _transfer(self, todo, workers):
+        if not todo:
+            return
+        if workers <= 1 or len(todo) == 1:
+            for rel, attr in todo:
+                self._send(self.client, rel, attr)
+            return
+        transport = self.client.get_channel().get_transport()
+        with SFTPSessionPool(transport, max_size=workers) as pool:
+
+            def send(item):
+                with pool.session() as session:
+                    self._send(session, *item)
+
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="sync_tree"
+            ) as executor:
+                # list() to wait for them all; errors are recorded
+                list(executor.map(send, todo))
+
+    def _send(self, client, rel, attr):
+        remote = posixpath.join(self.remote, rel)
+        local = os.path.join(self.local, *rel.split("/"))
+        mode = stat.S_IMODE(attr.st_mode)
+        times = (attr.st_atime, attr.st_mtime)
+        # Servers may leave the times out
+        keep_times = None not in times
+        try:
+            if self.direction == DOWNLOAD:
+                client.get(remote, local)
+                os.chmod(local, mode)
+                if keep_times:
+                    os.utime(local, times)
+            else:
+                client.put(local, remote)
+                client.chmod(remote, mode)
+                if keep_times:
+                    client.utime(remote, times)
+        except (OSError, IOError) as e:
+            with self._lock:
+                self.summary.errors.append((rel, e))
+            return
+        with self._lock:
+            self.summary.files_sent += 1
+            self.summary.bytes_sent += attr.st_size
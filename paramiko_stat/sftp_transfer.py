@@ -0,0 +1,454 @@
+"""
+Transfers of one large file split into ranges, several in flight at once and
+resumable after a failure, for `.SFTPClient.get_parallel` and
+`.SFTPClient.put_parallel`.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Type
+
+from paramiko.sftp import (
+    CMD_CLOSE,
+    CMD_DATA,
+    CMD_HANDLE,
+    CMD_OPEN,
+    CMD_READ,
+    CMD_STATUS,
+    CMD_WRITE,
+    SFTP_FLAG_READ,
+    SFTP_FLAG_WRITE,
+    SFTPError,
+    int64,
+)
+from paramiko.sftp_attr import SFTPAttributes
+
+#: Suffixes of the file a transfer is written to until it completes, and of
+#: the (local) checkpoint recording which of its ranges are done.
+PARTIAL_SUFFIX = ".part"
+CHECKPOINT_SUFFIX = ".part.ranges"
+UPLOAD_CHECKPOINT_SUFFIX = ".upload.ranges"
+
+
+def split_ranges(size, range_size):
+    """
+    Return the ``(offset, length)`` ranges covering ``size`` bytes.
+    """
+    return [
+        (offset, min(range_size, size - offset))
+        for offset in range(0, size, range_size)
+    ]
+
+
+def pwrite(fd, data, offset, lock):
+    """
+    `os.pwrite`, or a seek and write under ``lock`` where that's missing.
+    """
+    if hasattr(os, "pwrite"):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+        return
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+
+def pread(fd, size, offset, lock):
+    """
+    `os.pread`, or a seek and read under ``lock`` where that's missing.
+    """
+    if hasattr(os, "pread"):
+        data = b""
+        while len(data) < size:
+            block = os.pread(fd, size - len(data), offset + len(data))
+            if not block:
+                break
+            data += block
+        return data
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        data = b""
+        while len(data) < size:
+            block = os.read(fd, size - len(data))
+            if not block:
+                break
+            data += block
+        return data
+
+
+def preallocate(fd, size):
+    """
+    Make the file ``fd`` ``size`` bytes long, reserving the space where the
+    OS can.
+    """
+    os.ftruncate(fd, size)
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            # Not supported by this filesystem; the truncate will do
+            pass
+
+
+class Checkpoint:
+    """
+    The ranges of an interrupted transfer that are done, kept in a file so
+    that the transfer can be resumed.
+
+    The first line is a JSON ``identity`` of the transfer (what the source
+    was and how it was split up); each further line is the index of a range
+    that is done. Ranges are recorded once their data was handed to the OS,
+    so a checkpoint survives the connection dropping or the process dying,
+    though not the machine crashing.
+    """
+
+    def __init__(self, path, identity):
+        self.path = path
+        self.identity = identity
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        """
+        Return the indices of the ranges recorded as done, or ``None`` if
+        there is no checkpoint for a transfer with this identity.
+        """
+        try:
+            with open(self.path) as f:
+                lines = f.read().split("\n")
+        except (OSError, IOError):
+            return None
+        try:
+            if json.loads(lines[0]) != self.identity:
+                return None
+        except ValueError:
+            return None
+        # The last line may have been cut short
+        return {int(line) for line in lines[1:-1] if line.isdigit()}
+
+    def start(self, done=()):
+        """
+        Start recording, keeping ``done`` from a previous attempt.
+        """
+        self._file = open(self.path, "w")
+        self._file.write(json.dumps(self.identity, sort_keys=True) + "\n")
+        for index in sorted(done):
+            self._file.write("{}\n".format(index))
+        self._file.flush()
+
+    def record(self, index):
+        with self._lock:
+            self._file.write("{}\n".format(index))
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ParallelTransfer:
+    """
+    Transfer of one file in ranges over one or more clients; see
+    `.SFTPClient.get_parallel` and `.SFTPClient.put_parallel`.
+
+    ``path`` is the remote file and ``fd`` the local one. ``ranges`` are
+    ``(index, offset, length)`` triples; each client takes the next one
+    whenever it has room for more requests.
+    """
+
+    #: The `_RangeWorker` subclass moving data over each client; each
+    #: subclass sets it.
+    worker: Type["_RangeWorker"]
+
+    def __init__(self, clients, path, fd, ranges, window, checkpoint):
+        self.clients = clients
+        self.path = path
+        self.fd = fd
+        self.window = window
+        self.checkpoint = checkpoint
+        self.error = None
+        #: Bytes moved by this attempt.
+        self.transferred = 0
+        self._ranges = deque(ranges)
+        self._lock = threading.Lock()
+        self._callback = None
+        self._total = self._already = 0
+
+    def run(self, callback=None, total=0, already=0):
+        """
+        Move all the ranges, each client on its own thread (the first on
+        the calling one), and raise the first error any of them hit.
+        ``callback`` is called with the bytes done so far (counting the
+        ``already`` done before) and the ``total``.
+        """
+        self._callback = callback
+        self._total = total
+        self._already = already
+        workers = [self.worker(self, client) for client in self.clients]
+        threads = [
+            threading.Thread(
+                target=worker.run,
+                name="{} ({})".format(
+                    type(self).__name__, worker.client.get_channel().get_name()
+                ),
+                daemon=True,
+            )
+            for worker in workers[1:]
+        ]
+        for thread in threads:
+            thread.start()
+        workers[0].run()
+        for thread in threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+    # ...internals...
+
+    def _next_range(self):
+        with self._lock:
+            if self.error is not None or not self._ranges:
+                return None
+            return self._ranges.popleft()
+
+    def _failed(self, error):
+        with self._lock:
+            self.error = self.error or error
+
+    def _progressed(self, size):
+        with self._lock:
+            self.transferred += size
+            done = self._already + self.transferred
+        if self._callback is not None:
+            self._callback(done, self._total)
+
+    def _range_done(self, index):
+        if self.checkpoint is not None:
+            self.checkpoint.record(index)
+
+
+class _RangeWorker:
+    """
+    Moves ranges of a `ParallelTransfer` over one client, keeping
+    ``window`` requests in flight. Subclasses say how the file is opened,
+    how big each request may be, and how to send one and handle its reply.
+    """
+
+    #: ``SSH_FXP_OPEN`` flags for the remote file.
+    flags = 0
+
+    def __init__(self, transfer, client):
+        self.transfer = transfer
+        self.client = client
+        self._replies = {}
+
+    def run(self):
+        transfer = self.transfer
+        client = self.client
+        handle = None
+        try:
+            t, msg = client._request(
+                CMD_OPEN, transfer.path, self.flags, SFTPAttributes()
+            )
+            if t != CMD_HANDLE:
+                raise SFTPError("Expected handle")
+            handle = msg.get_binary()
+            self._move(handle)
+        except Exception as e:
+            transfer._failed(e)
+        finally:
+            if handle is not None:
+                try:
+                    client._request(CMD_CLOSE, handle)
+                except Exception as e:
+                    # A failed close may lose buffered writes
+                    if self.flags & SFTP_FLAG_WRITE:
+                        transfer._failed(e)
+
+    def _async_response(self, t, msg, num):
+        self._replies[num] = (t, msg)
+
+    def _move(self, handle):
+        transfer = self.transfer
+        client = self.client
+        chunk = self._chunk_size()
+        # (range index, offset, length) of requests still to send
+        pieces = deque()
+        # Bytes still to move for each range taken, by index
+        remaining = {}
+        # (request number, range index, offset, length)
+        pending = deque()
+        while True:
+            while len(pending) < transfer.window:
+                if not pieces:
+                    taken = transfer._next_range()
+                    if taken is None:
+                        break
+                    index, offset, length = taken
+                    remaining[index] = length
+                    for start in range(offset, offset + length, chunk):
+                        end = min(start + chunk, offset + length)
+                        pieces.append((index, start, end - start))
+                index, offset, length = pieces.popleft()
+                num = self._send(handle, offset, length)
+                pending.append((num, index, offset, length))
+            if not pending:
+                return
+            num, index, offset, length = pending.popleft()
+            while num not in self._replies:
+                client._read_response()
+            t, msg = self._replies.pop(num)
+            count = self._received(t, msg, offset, length)
+            if count < length:
+                # Only partly done; ask for the rest
+                pieces.appendleft((index, offset + count, length - count))
+            remaining[index] -= count
+            transfer._progressed(count)
+            if not remaining[index]:
+                del remaining[index]
+                transfer._range_done(index)
+            if transfer.error is not None:
+                # Another channel failed; stop early
+                return
+
+    def _chunk_size(self):
+        raise NotImplementedError
+
+    def _send(self, handle, offset, length):
+        """
+        Send the request for ``length`` bytes at ``offset`` and return its
+        number.
+        """
+        raise NotImplementedError
+
+    def _received(self, t, msg, offset, length):
+        """
+        Handle the reply to the request for ``length`` bytes at ``offset``,
+        returning how many of them are done.
+        """
+        raise NotImplementedError
+
+
+class _RangeReader(_RangeWorker):
+    """
+    Reads ranges with ``SSH_FXP_READ``, writing each reply into place in the
+    local file as it arrives.
+    """
+
+    flags = SFTP_FLAG_READ
+
+    def _chunk_size(self):
+        return self.client.limits.max_read_length
+
+    def _send(self, handle, offset, length):
+        return self.client._async_request(
+            self, CMD_READ, handle, int64(offset), length
+        )
+
+    def _received(self, t, msg, offset, length):
+        transfer = self.transfer
+        self._check_data(t, msg)
+        data = msg.get_string()
+        if not data:
+            raise SFTPError("Empty read before end of file")
+        pwrite(transfer.fd, data, offset, transfer._lock)
+        return len(data)
+
+    def _check_data(self, t, msg):
+        """
+        Raise unless the reply ``t`` is ``SSH_FXP_DATA``.
+        """
+        if t == CMD_STATUS:
+            try:
+                self.client._convert_status(msg)
+            except EOFError:
+                raise IOError(
+                    "Remote file {!r} shrank during download".format(
+                        self.transfer.path
+                    )
+                )
+        if t != CMD_DATA:
+            raise SFTPError("Expected data")
+
+
+class _RangeBufferReader(_RangeReader):
+    """
+    Reads ranges with ``SSH_FXP_READ``, copying each payload straight from
+    the packet into the caller's buffer without making a `bytes` of it.
+    """
+
+    def _received(self, t, msg, offset, length):
+        transfer = self.transfer
+        self._check_data(t, msg)
+        count = min(msg.get_int(), length)
+        if not count:
+            raise SFTPError("Empty read before end of file")
+        start = msg.packet.tell()
+        position = offset - transfer.base
+        # A BytesIO made from bytes hands the same object back here, so the
+        # slice copies nothing
+        payload = memoryview(msg.packet.getvalue())[start:]
+        transfer.view[position:][:count] = payload[:count]
+        return count
+
+
+class _RangeWriter(_RangeWorker):
+    """
+    Writes ranges of the local file with ``SSH_FXP_WRITE``.
+    """
+
+    flags = SFTP_FLAG_WRITE
+
+    def _chunk_size(self):
+        return self.client.limits.max_write_length
+
+    def _send(self, handle, offset, length):
+        transfer = self.transfer
+        data = pread(transfer.fd, length, offset, transfer._lock)
+        if len(data) < length:
+            raise IOError("Local file shrank during upload")
+        return self.client._async_request(
+            self, CMD_WRITE, handle, int64(offset), data
+        )
+
+    def _received(self, t, msg, offset, length):
+        if t != CMD_STATUS:
+            raise SFTPError("Expected status")
+        self.client._convert_status(msg)
+        return length
+
+
+class ParallelDownload(ParallelTransfer):
+    worker = _RangeReader
+
+
+class ParallelUpload(ParallelTransfer):
+    worker = _RangeWriter
+
+
+class BufferDownload(ParallelTransfer):
+    """
+    Download into ``view``, a writable byte `memoryview`, whose first byte
+    holds the file's byte at offset ``base``.
+    """
+
+    worker = _RangeBufferReader
+
+    def __init__(self, clients, path, view, base, ranges, window):
+        super().__init__(clients, path, None, ranges, window, None)
+        self.view = view
+        self.base = base
@@ -17,20 +17,180 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA.
 
 
+import time
+
 from paramiko.transport import Transport as _Transport
 
 from .sftp_client import SFTPClient
+from .sftp_parallel import ParallelWalk
+from .sftp_pool import SFTPSessionPool
 
 
 class Transport(_Transport):
+    #: `time.monotonic` time at which the remote banner was read.
+    banner_received = None
+
+    #: Name of the method that completed authentication, once it has.
+    auth_method = None
+
+    #: Fingerprint of the key that completed public key authentication.
+    auth_key = None
+
+    def auth_none(self, username):
+        result = super().auth_none(username)
+        self._record_auth("none")
+        return result
+
+    auth_none.__doc__ = _Transport.auth_none.__doc__
+
+    def auth_password(self, username, password, event=None, fallback=True):
+        result = super().auth_password(username, password, event, fallback)
+        self._record_auth("password")
+        return result
+
+    auth_password.__doc__ = _Transport.auth_password.__doc__
+
+    def auth_publickey(self, username, key, event=None):
+        result = super().auth_publickey(username, key, event)
+        self._record_auth("publickey", key)
+        return result
+
+    auth_publickey.__doc__ = _Transport.auth_publickey.__doc__
+
+    def auth_interactive(self, username, handler, submethods=""):
+        result = super().auth_interactive(username, handler, submethods)
+        self._record_auth("keyboard-interactive")
+        return result
+
+    auth_interactive.__doc__ = _Transport.auth_interactive.__doc__
+
+    def auth_gssapi_with_mic(self, username, gss_host, gss_deleg_creds):
+        result = super().auth_gssapi_with_mic(
+            username, gss_host, gss_deleg_creds
+        )
+        self._record_auth("gssapi-with-mic")
+        return result
+
+    auth_gssapi_with_mic.__doc__ = _Transport.auth_gssapi_with_mic.__doc__
+
+    def auth_gssapi_keyex(self, username):
+        result = super().auth_gssapi_keyex(username)
+        self._record_auth("gssapi-keyex")
+        return result
+
+    auth_gssapi_keyex.__doc__ = _Transport.auth_gssapi_keyex.__doc__
+
     def open_sftp_client(self):
         """
         Create an SFTP client channel from an open transport.  On success, an
         SFTP session will be opened with the remote host, and a new
-        `.SFTPClient` object will be returned.
+        `.SFTPClient` object will be returned, already sized to the server's
+        limits (see `.SFTPClient.query_limits`).
 
         :return:
             a new `.SFTPClient` referring to an sftp session (channel) across
             this transport
         """
-        return SFTPClient.from_transport(self)
+        client = SFTPClient.from_transport(self)
+        try:
+            client.query_limits()
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    def open_sftp_pool(
+        self,
+        max_size=4,
+        min_size=0,
+        idle_timeout=60.0,
+        ping_after=10.0,
+        timeout=None,
+    ):
+        """
+        Create a pool of reusable SFTP sessions on this transport.
+
+        Sessions are checked out with ``with pool.session() as sftp:`` and
+        handed back, with their working directory reset, at the end of the
+        block (see `.SFTPSessionPool`).
+
+        :param int max_size: most sessions open at once
+        :param int min_size:
+            sessions opened straight away and kept open while idle
+        :param float idle_timeout:
+            seconds after which further idle sessions are closed
+        :param float ping_after:
+            seconds idle after which a session is checked with a round-trip
+            before being handed out
+        :param float timeout:
+            default seconds to wait for a session when all are in use
+            (``None`` waits forever)
+        :return: a new `.SFTPSessionPool`
+        """
+        return SFTPSessionPool(
+            self,
+            max_size=max_size,
+            min_size=min_size,
+            idle_timeout=idle_timeout,
+            ping_after=ping_after,
+            timeout=timeout,
+        )
+
+    def parallel_walk(
+        self,
+        top=".",
+        channels=4,
+        queue_depth=1024,
+        onerror=None,
+        followlinks=False,
+        window=None,
+        read_aheads=None,
+    ):
+        """
+        Walk a remote directory tree using several SFTP channels at once.
+
+        ``channels`` SFTP sessions are opened on this transport and the
+        directories found are shared out between them (see `.ParallelWalk`).
+        The result yields ``(dirpath, dirnames, filenames)`` tuples like
+        `.SFTPClient.walk`, in no particular order, and closes the sessions
+        once exhausted; use it as a context manager to close them early.
+
+        :param str top: directory to start from
+        :param int channels: number of SFTP channels to open
+        :param int queue_depth:
+            number of results buffered before the channels wait for the
+            consumer
+        :param callable onerror:
+            called with the `IOError` when a directory can't be listed
+        :param bool followlinks: descend into symlinks to directories
+        :param int window:
+            directories read at once per channel (see `.SFTPClient.walk`)
+        :param int read_aheads:
+            ``SSH_FXP_READDIR`` requests in flight per directory
+        :return:
+            a `.ParallelWalk`, whose ``stats`` attribute reports the work
+            each channel did
+        """
+        return ParallelWalk(
+            self,
+            top,
+            channels=channels,
+            queue_depth=queue_depth,
+            onerror=onerror,
+            followlinks=followlinks,
+            window=window,
+            read_aheads=read_aheads,
+        )
+
+    # ...internals...
+
+    def _check_banner(self):
+        super()._check_banner()
+        self.banner_received = time.monotonic()
+
+    def _record_auth(self, method, key=None):
+        # Only a call that completed authentication counts; with partial
+        # success (multi-factor) it's the last one
+        if self.is_authenticated():
+            self.auth_method = method
+            self.auth_key = None if key is None else key.fingerprint
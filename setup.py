@@ -39,7 +39,7 @@ setup(
     long_description=read("README.md"),
     long_description_content_type="text/markdown",
     author="William Barnhart, Gordon P. Hemsley",
-    packages=find_packages(exclude=["tests", ".github"]),
+    packages=find_packages(exclude=["tests", "benchmarks", ".github"]),
     install_requires=read_requirements("requirements.txt"),
     extras_require={"test": read_requirements("requirements-test.txt")},
 )
@@ -1,6 +1,7 @@
 import logging
 import os
 import shutil
+import socket
 import threading
 
 import pytest
@@ -87,6 +88,42 @@ def sftp_server():
     # point of the "join all threads from threading module" crap in test.py?
 
 
+@pytest.fixture
+def ssh_server():
+    """
+    Run an SSH server, accepting any password and serving SFTP, on a TCP
+    port on localhost. Yields its ``(host, port)``.
+    """
+    host_key = RSAKey.from_private_key_file(_support("test_rsa.key"))
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+    listener.settimeout(0.1)
+    stopping = threading.Event()
+    transports = []
+
+    def serve():
+        while not stopping.is_set():
+            try:
+                sock, addr = listener.accept()
+            except socket.timeout:
+                continue
+            ts = Transport(sock)
+            ts.add_server_key(host_key)
+            ts.set_subsystem_handler("sftp", SFTPServer, StubSFTPServer)
+            ts.start_server(threading.Event(), StubServer())
+            transports.append(ts)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield listener.getsockname()
+    stopping.set()
+    thread.join()
+    listener.close()
+    for ts in transports:
+        ts.close()
+
+
 @pytest.fixture
 def sftp(sftp_server):
     """
@@ -103,3 +140,19 @@ def sftp(sftp_server):
     yield client
     # Clean up - as in make_sftp_folder, we assume local-only exec for now.
     shutil.rmtree(client.FOLDER, ignore_errors=True)
+
+
+@pytest.fixture
+def sent_requests(sftp, monkeypatch):
+    """
+    Record the type of every request the ``sftp`` client sends.
+    """
+    sent = []
+    original = sftp._async_request
+
+    def recording(fileobj, t, *args):
+        sent.append(t)
+        return original(fileobj, t, *args)
+
+    monkeypatch.setattr(sftp, "_async_request", recording)
+    yield sent
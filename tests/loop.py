@@ -16,30 +16,150 @@
 # along with Paramiko; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA.
 
+import random
 import socket
 import threading
+import time
+from collections import deque
 
 from paramiko.util import asbytes
 
 
+class Link:
+    """
+    One direction of an emulated network link, delaying what a `LoopSocket`
+    sends before it reaches the other end.
+
+    Each send is held for the time it takes to serialise onto a link of
+    ``bandwidth`` bytes per second (counting ``header`` bytes of overhead
+    per ``mtu``-sized packet), queued behind anything still being
+    serialised, then for ``delay`` seconds plus a random extra of up to
+    ``jitter`` seconds. Data is delivered in order, as over TCP, so jitter
+    never reorders it. The sender is never blocked: the send buffer is
+    unlimited.
+
+    Pass ``seed`` for reproducible jitter.
+    """
+
+    def __init__(
+        self,
+        delay=0.0,
+        jitter=0.0,
+        bandwidth=None,
+        mtu=1500,
+        header=40,
+        seed=None,
+    ):
+        self.delay = delay
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.mtu = mtu
+        self.header = header
+        self._random = random.Random(seed)
+        self._cv = threading.Condition()
+        # (delivery time, data, callable to deliver it with)
+        self._queue = deque()
+        # When the link has finished serialising what was sent so far
+        self._free_at = 0.0
+        self._last_delivery = 0.0
+        self._closed = False
+        self._thread = None
+
+    def serialisation_delay(self, size):
+        """
+        Return the seconds it takes to put ``size`` bytes onto the link.
+        """
+        if self.bandwidth is None:
+            return 0.0
+        packets = max(1, -(-size // (self.mtu - self.header)))
+        return (size + packets * self.header) / float(self.bandwidth)
+
+    def transmit(self, data, deliver):
+        """
+        Call ``deliver(data)`` once ``data`` has crossed the link.
+        """
+        now = time.monotonic()
+        with self._cv:
+            if self._closed:
+                return
+            self._free_at = max(now, self._free_at)
+            self._free_at += self.serialisation_delay(len(data))
+            at = self._free_at + self.delay
+            if self.jitter:
+                at += self._random.uniform(0, self.jitter)
+            at = self._last_delivery = max(at, self._last_delivery)
+            self._queue.append((at, data, deliver))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def close(self):
+        """
+        Stop delivering; anything still in flight is dropped.
+        """
+        with self._cv:
+            self._closed = True
+            self._queue.clear()
+            self._cv.notify()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._closed:
+                        return
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._cv.wait(wait)
+                at, data, deliver = self._queue.popleft()
+            deliver(data)
+
+
 class LoopSocket:
     """
     A LoopSocket looks like a normal socket, but all data written to it is
     delivered on the read-end of another LoopSocket, and vice versa.  It's
     like a software "socketpair".
+
+    Given a `Link`, data sent is delayed by it on the way.
     """
 
-    def __init__(self):
+    def __init__(self, link=None):
         self.__in_buffer = bytes()
         self.__lock = threading.Lock()
         self.__cv = threading.Condition(self.__lock)
         self.__timeout = None
         self.__mate = None
+        self.__link = link
         self._closed = False
 
+    @classmethod
+    def pair(cls, **link):
+        """
+        Return two linked LoopSockets. Keyword arguments, if any, set up an
+        emulated `Link` (the same in both directions, with its own queue
+        each way).
+        """
+        if link:
+            a = cls(Link(**link))
+            if link.get("seed") is not None:
+                link = dict(link, seed=link["seed"] + 1)
+            b = cls(Link(**link))
+        else:
+            a, b = cls(), cls()
+        a.link(b)
+        return a, b
+
     def close(self):
         self.__unlink()
         self._closed = True
+        if self.__link is not None:
+            self.__link.close()
         try:
             self.__lock.acquire()
             self.__in_buffer = bytes()
@@ -51,7 +171,10 @@ class LoopSocket:
         if self.__mate is None:
             # EOF
             raise EOFError()
-        self.__mate.__feed(data)
+        if self.__link is not None:
+            self.__link.transmit(data, self.__mate.__feed)
+        else:
+            self.__mate.__feed(data)
         return len(data)
 
     def recv(self, n):
@@ -21,6 +21,8 @@ A stub SFTP server for loopback SFTP testing.
 """
 
 import os
+import subprocess
+import threading
 
 from paramiko import (
     AUTH_SUCCESSFUL,
@@ -34,6 +36,15 @@ from paramiko import (
     SFTPServerInterface,
 )
 from paramiko.common import o666
+from paramiko.message import Message
+from paramiko.sftp import (
+    _VERSION,
+    CMD_EXTENDED,
+    CMD_EXTENDED_REPLY,
+    CMD_INIT,
+    CMD_VERSION,
+    SFTPError,
+)
 
 
 class StubServer(ServerInterface):
@@ -41,9 +52,32 @@ class StubServer(ServerInterface):
         # all are allowed
         return AUTH_SUCCESSFUL
 
+    def check_auth_publickey(self, username, key):
+        # all are allowed
+        return AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password,publickey"
+
     def check_channel_request(self, kind, chanid):
         return OPEN_SUCCEEDED
 
+    def check_channel_exec_request(self, channel, command):
+        # Run it locally, from the same root as StubSFTPServer
+        def run():
+            try:
+                done = subprocess.run(
+                    command.decode("utf-8"), shell=True, capture_output=True
+                )
+                channel.sendall_stderr(done.stderr)
+                channel.sendall(done.stdout)
+                channel.send_exit_status(done.returncode)
+            finally:
+                channel.close()
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
 
 class StubSFTPHandle(SFTPHandle):
     def stat(self):
@@ -76,8 +110,10 @@ class StubSFTPServer(SFTPServerInterface):
             out = []
             flist = os.listdir(path)
             for fname in flist:
+                # Like OpenSSH's sftp-server, describe the entries themselves
+                # rather than what symlinks point to
                 attr = SFTPAttributes.from_stat(
-                    os.stat(os.path.join(path, fname))
+                    os.lstat(os.path.join(path, fname))
                 )
                 attr.filename = fname
                 out.append(attr)
@@ -228,3 +264,35 @@ class StubSFTPServer(SFTPServerInterface):
             else:
                 symlink = "<error>"
         return symlink
+
+
+class LimitsSFTPServer(SFTPServer):
+    """
+    An `SFTPServer` that also announces and answers ``limits@openssh.com``
+    with `LIMITS` (packet, read and write lengths and open handles).
+    """
+
+    LIMITS = (1 << 18, 1 << 17, 1 << 17, 16)
+
+    def _send_server_version(self):
+        t, data = self._read_packet()
+        if t != CMD_INIT:
+            raise SFTPError("Incompatible sftp protocol")
+        msg = Message()
+        msg.add_int(_VERSION)
+        msg.add("check-file", "md5,sha1", "limits@openssh.com", "1")
+        self._send_packet(CMD_VERSION, msg)
+        return Message(data).get_int()
+
+    def _process(self, t, request_number, msg):
+        if t == CMD_EXTENDED and msg.get_text() == "limits@openssh.com":
+            reply = Message()
+            reply.add_int(request_number)
+            for limit in self.LIMITS:
+                reply.add_int64(limit)
+            self._send_packet(CMD_EXTENDED_REPLY, reply)
+            return
+        if t == CMD_EXTENDED:
+            msg.rewind()
+            msg.get_int()
+        super()._process(t, request_number, msg)
@@ -0,0 +1,132 @@
+"""
+Tests for `AsyncSFTPClient`.
+"""
+
+import asyncio
+import os
+
+import pytest
+from paramiko.ssh_exception import SSHException
+
+from paramiko_stat.aio_sftp_client import AsyncSFTPClient
+
+from .util import slow
+
+
+def run(sftp_server, test):
+    """
+    Run ``test(client)`` on a fresh event loop with an `AsyncSFTPClient`
+    on its own channel.
+    """
+
+    async def main():
+        async with await AsyncSFTPClient.from_transport(sftp_server) as aio:
+            return await test(aio)
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def tree(sftp):
+    top = sftp.FOLDER
+    os.mkdir(os.path.join(top, "dir"))
+    for i in range(50):
+        with open(os.path.join(top, "f{}".format(i)), "w"):
+            pass
+    os.symlink("dir", os.path.join(top, "link"))
+    os.symlink("nowhere", os.path.join(top, "broken"))
+    return top
+
+
+@slow
+class TestAsyncSFTPClient(object):
+    def test_concurrent_predicates(self, sftp, sftp_server, tree):
+        names = ["f{}".format(i) for i in range(50)] + [
+            "dir",
+            "link",
+            "broken",
+            "missing",
+        ]
+        paths = ["{}/{}".format(tree, name) for name in names]
+
+        async def test(aio):
+            results = {}
+            for name in ("exists", "lexists", "isfile", "isdir", "islink"):
+                method = getattr(aio, name)
+                results[name] = await asyncio.gather(
+                    *(method(path) for path in paths)
+                )
+            return results
+
+        results = run(sftp_server, test)
+        for name, values in results.items():
+            single = getattr(sftp, name)
+            assert values == [single(path) for path in paths], name
+
+    def test_stat_errors(self, sftp_server, tree):
+        async def test(aio):
+            with pytest.raises(IOError):
+                await aio.stat("{}/missing".format(tree))
+            return await aio.lstat("{}/link".format(tree))
+
+        assert (
+            run(sftp_server, test).st_mode
+            == os.lstat(os.path.join(tree, "link")).st_mode
+        )
+
+    def test_listdir_attr(self, sftp_server, tree):
+        async def test(aio):
+            return await aio.listdir_attr(tree)
+
+        names = sorted(attr.filename for attr in run(sftp_server, test))
+        assert names == sorted(os.listdir(tree))
+
+    @pytest.mark.parametrize("size", [0, 100, 32768 * 3 + 17])
+    def test_read_file(self, sftp_server, tree, size):
+        data = os.urandom(size)
+        with open(os.path.join(tree, "data"), "wb") as f:
+            f.write(data)
+
+        async def test(aio):
+            return await aio.read_file("{}/data".format(tree))
+
+        assert run(sftp_server, test) == data
+
+    def test_seek_and_partial_reads(self, sftp_server, tree):
+        data = os.urandom(100000)
+        with open(os.path.join(tree, "data"), "wb") as f:
+            f.write(data)
+
+        async def test(aio):
+            async with await aio.open("{}/data".format(tree)) as f:
+                f.seek(50000)
+                first = await f.read(40000)
+                rest = await f.read()
+                beyond = await f.read(10)
+                return first, rest, beyond, f.tell()
+
+        first, rest, beyond, pos = run(sftp_server, test)
+        assert first == data[50000:90000]
+        assert rest == data[90000:]
+        assert beyond == b""
+        assert pos == len(data)
+
+    def test_cancelled_request_does_not_disturb_others(
+        self, sftp_server, tree
+    ):
+        async def test(aio):
+            task = asyncio.ensure_future(aio.exists(tree))
+            await asyncio.sleep(0)
+            task.cancel()
+            return await aio.isdir("{}/dir".format(tree))
+
+        assert run(sftp_server, test)
+
+    def test_requests_fail_once_closed(self, sftp_server, tree):
+        async def test(aio):
+            aio.close()
+            await asyncio.sleep(0.1)
+            with pytest.raises(SSHException):
+                await aio.exists(tree)
+
+        run(sftp_server, test)
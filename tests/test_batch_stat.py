@@ -0,0 +1,69 @@
+"""
+Tests for the pipelined batch stat methods (``stat_many``, ``exists_many``
+and friends).
+"""
+
+import stat
+
+import pytest
+
+from .util import slow
+
+
+@pytest.fixture
+def tree(sftp):
+    """
+    Populate the remote test folder with a file, a directory, a symlink to
+    each and a broken symlink. Yields a dict of name -> remote path.
+    """
+    paths = {
+        name: "{}/{}".format(sftp.FOLDER, name)
+        for name in (
+            "file",
+            "dir",
+            "link_to_file",
+            "link_to_dir",
+            "broken_link",
+            "missing",
+        )
+    }
+    sftp.open(paths["file"], "w").close()
+    sftp.mkdir(paths["dir"])
+    sftp.symlink("file", paths["link_to_file"])
+    sftp.symlink("dir", paths["link_to_dir"])
+    sftp.symlink("nowhere", paths["broken_link"])
+    yield paths
+
+
+@slow
+class TestBatchStat(object):
+    @pytest.mark.parametrize("window", [1, 2, 64])
+    def test_predicates_match_single_path_versions(self, sftp, tree, window):
+        paths = list(tree.values())
+        for name in ("exists", "lexists", "isfile", "isdir", "islink"):
+            batch = getattr(sftp, name + "_many")(paths, window=window)
+            single = getattr(sftp, name)
+            assert batch == {path: single(path) for path in paths}, name
+
+    def test_exists_vs_lexists_on_broken_symlink(self, sftp, tree):
+        path = tree["broken_link"]
+        assert sftp.exists_many([path]) == {path: False}
+        assert sftp.lexists_many([path]) == {path: True}
+
+    def test_stat_many_returns_attributes_or_none(self, sftp, tree):
+        with sftp.open(tree["file"], "w") as f:
+            f.write(b"hello")
+        result = sftp.stat_many(iter([tree["file"], tree["missing"]]))
+        assert result[tree["file"]].st_size == 5
+        assert result[tree["missing"]] is None
+
+    def test_lstat_many_does_not_follow_symlinks(self, sftp, tree):
+        result = sftp.lstat_many([tree["link_to_file"]])
+        assert stat.S_ISLNK(result[tree["link_to_file"]].st_mode)
+
+    def test_empty_batch(self, sftp):
+        assert sftp.exists_many([]) == {}
+
+    def test_window_must_be_positive(self, sftp):
+        with pytest.raises(ValueError):
+            sftp.exists_many(["x"], window=0)
@@ -0,0 +1,28 @@
+"""
+Tests for the regression check in ``benchmarks.suite``.
+"""
+
+from benchmarks.suite import compare
+
+
+def results(**values):
+    return {
+        "results": {
+            name.replace("_", "."): {"value": value, "unit": unit}
+            for name, (value, unit) in values.items()
+        }
+    }
+
+
+def test_compare_respects_direction():
+    baseline = results(a_rate=(100.0, "ops/s"), a_p50=(1.0, "ms"))
+    current = results(a_rate=(70.0, "ops/s"), a_p50=(0.5, "ms"))
+    rows = {row[0]: row for row in compare(current, baseline, 0.2)}
+    assert rows["a.rate"][3:] == (-0.3, True)
+    assert rows["a.p50"][3:] == (0.5, False)
+
+
+def test_compare_skips_unmatched_results():
+    baseline = results(a_rate=(100.0, "ops/s"), b_rate=(1.0, "MB/s"))
+    current = results(a_rate=(90.0, "ops/s"), c_rate=(1.0, "MB/s"))
+    assert [row[0] for row in compare(current, baseline, 0.2)] == ["a.rate"]
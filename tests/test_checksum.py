@@ -0,0 +1,115 @@
+"""
+Tests for `SFTPClient.checksum` and `SFTPClient.checksum_many`.
+"""
+
+import errno
+import hashlib
+import os
+
+import pytest
+from paramiko.sftp import CMD_EXTENDED
+
+from .util import slow
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return data
+
+
+def digest(algo, data):
+    return hashlib.new(algo, data).digest()
+
+
+@pytest.fixture
+def data(sftp):
+    return write(sftp.FOLDER + "/data", os.urandom(100000))
+
+
+class TestCheckFile(object):
+    """
+    The stub server announces ``check-file`` for md5 and sha1.
+    """
+
+    def test_whole_file(self, sftp, data, sent_requests):
+        assert sftp.checksum(sftp.FOLDER + "/data", "sha1") == digest(
+            "sha1", data
+        )
+        assert CMD_EXTENDED in sent_requests
+
+    def test_ranges(self, sftp, data):
+        ranges = [(0, 1000), (1000, 50000), (90000, 0)]
+        assert sftp.checksum(sftp.FOLDER + "/data", "md5", ranges) == [
+            digest("md5", data[:1000]),
+            digest("md5", data[1000:51000]),
+            digest("md5", data[90000:]),
+        ]
+
+    def test_refused_ranges_are_hashed_by_exec(self, sftp, data):
+        # The stub server won't hash less than 256 bytes
+        ranges = [(0, 100), (100, 1000)]
+        assert sftp.checksum(sftp.FOLDER + "/data", "md5", ranges) == [
+            digest("md5", data[:100]),
+            digest("md5", data[100:1100]),
+        ]
+
+    def test_empty_file(self, sftp):
+        write(sftp.FOLDER + "/empty", b"")
+        assert sftp.checksum(sftp.FOLDER + "/empty", "md5") == digest(
+            "md5", b""
+        )
+
+    def test_missing_file(self, sftp):
+        with pytest.raises(IOError) as info:
+            sftp.checksum(sftp.FOLDER + "/missing", "md5")
+        assert info.value.errno == errno.ENOENT
+        assert info.value.filename == sftp.FOLDER + "/missing"
+
+    def test_many(self, sftp):
+        files = {}
+        for i in range(40):
+            path = "{}/f{}".format(sftp.FOLDER, i)
+            files[path] = digest("sha1", write(path, os.urandom(i * 100)))
+        paths = list(files) + [sftp.FOLDER + "/missing"]
+        assert sftp.checksum_many(paths, "sha1", window=4) == dict(
+            files, **{sftp.FOLDER + "/missing": None}
+        )
+
+    def test_unknown_algorithm(self, sftp):
+        with pytest.raises(ValueError):
+            sftp.checksum(sftp.FOLDER + "/data", "crc32")
+
+
+@slow
+class TestExecFallback(object):
+    """
+    sha256 isn't announced, so it's computed by ``sha256sum`` on the server.
+    """
+
+    def test_whole_file(self, sftp, data, sent_requests):
+        assert sftp.checksum(sftp.FOLDER + "/data") == digest("sha256", data)
+        assert CMD_EXTENDED not in sent_requests
+
+    def test_ranges(self, sftp, data):
+        ranges = [(0, 10), (10, 0), (99990, 100)]
+        assert sftp.checksum(sftp.FOLDER + "/data", ranges=ranges) == [
+            digest("sha256", data[:10]),
+            digest("sha256", data[10:]),
+            digest("sha256", data[99990:]),
+        ]
+
+    def test_missing_file(self, sftp):
+        with pytest.raises(IOError) as info:
+            sftp.checksum(sftp.FOLDER + "/missing", ranges=[(5, 5)])
+        assert info.value.errno == errno.ENOENT
+
+    def test_many(self, sftp):
+        files = {}
+        for name in ["plain", "with space", "new\nline", "back\\slash"]:
+            path = "{}/{}".format(sftp.FOLDER, name)
+            files[path] = digest("sha256", write(path, name.encode() * 3))
+        paths = list(files) + [sftp.FOLDER + "/missing"]
+        assert sftp.checksum_many(paths) == dict(
+            files, **{sftp.FOLDER + "/missing": None}
+        )
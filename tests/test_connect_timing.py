@@ -0,0 +1,87 @@
+"""
+Tests for `SSHClient.connect_timing`.
+"""
+
+import socket
+
+import pytest
+from paramiko import AutoAddPolicy, RSAKey
+
+from paramiko_stat import ConnectTiming, SSHClient
+
+from .util import _support, slow
+
+
+def connect(port, **kwargs):
+    client = SSHClient()
+    client.set_missing_host_key_policy(AutoAddPolicy())
+    kwargs.setdefault("password", "pygmalion")
+    client.connect(
+        "127.0.0.1",
+        port,
+        username="slowdive",
+        allow_agent=False,
+        look_for_keys=False,
+        **kwargs
+    )
+    return client
+
+
+def test_durations_follow_marks():
+    timing = ConnectTiming("example.com", 22)
+    timing.mark("dns", timing.started + 1)
+    timing.mark("tcp", timing.started + 3)
+    assert timing.durations == {"dns": 1, "tcp": 2}
+    assert timing.total == 3
+    assert timing.as_dict()["tcp"] == 2
+
+
+@slow
+class TestConnectTiming(object):
+    def test_phases_are_recorded(self, ssh_server):
+        seen = []
+        client = connect(ssh_server[1], timing_callback=seen.append)
+        timing = client.connect_timing
+        assert seen == [timing]
+        assert list(timing.durations) == list(ConnectTiming.PHASES)
+        assert all(d >= 0 for d in timing.durations.values())
+        assert timing.total == pytest.approx(sum(timing.durations.values()))
+        assert timing.address == ssh_server
+        assert (timing.auth_method, timing.auth_key) == ("password", None)
+        assert timing.error is None
+        client.close()
+
+    def test_publickey(self, ssh_server):
+        key = RSAKey.from_private_key_file(_support("test_rsa.key"))
+        client = connect(ssh_server[1], pkey=key, password=None)
+        timing = client.connect_timing
+        assert timing.auth_method == "publickey"
+        assert timing.auth_key == key.fingerprint
+        client.close()
+
+    def test_given_socket_skips_dns_and_tcp(self, ssh_server):
+        client = connect(
+            ssh_server[1], sock=socket.create_connection(ssh_server)
+        )
+        assert list(client.connect_timing.durations) == [
+            "banner",
+            "kex",
+            "hostkey",
+            "auth",
+        ]
+        client.close()
+
+    def test_callback_sees_failures(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        seen = []
+        with pytest.raises(socket.error):
+            connect(port, timing_callback=seen.append)
+        assert list(seen[0].durations) == ["dns"]
+        assert isinstance(seen[0].error, socket.error)
+
+    def test_transport_records_auth(self, sftp_server):
+        assert sftp_server.auth_method == "password"
+        assert sftp_server.banner_received is not None
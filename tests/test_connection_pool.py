@@ -0,0 +1,119 @@
+"""
+Tests for `ConnectionPool`.
+"""
+
+import threading
+import time
+
+import pytest
+from paramiko import AutoAddPolicy
+from paramiko.ssh_exception import SSHException
+
+from paramiko_stat import SSHClient
+from paramiko_stat.connection_pool import ConnectionPool
+
+from .util import slow
+
+AUTH = dict(
+    username="slowdive",
+    password="pygmalion",
+    allow_agent=False,
+    look_for_keys=False,
+)
+
+
+def trusting_client():
+    client = SSHClient()
+    client.set_missing_host_key_policy(AutoAddPolicy())
+    return client
+
+
+@pytest.fixture
+def pool():
+    with ConnectionPool(
+        max_per_host=2, timeout=5, client_factory=trusting_client
+    ) as pool:
+        yield pool
+
+
+@slow
+class TestConnectionPool(object):
+    def test_connections_are_reused(self, pool, ssh_server):
+        host, port = ssh_server
+        with pool.client(host, port, **AUTH) as first:
+            transport = first.get_transport()
+        with pool.client(host, port, **AUTH) as second:
+            assert second.get_transport() is transport
+        assert (pool.hits, pool.misses) == (1, 1)
+
+    def test_credentials_are_part_of_the_key(self, pool, ssh_server):
+        host, port = ssh_server
+        with pool.client(host, port, **AUTH) as first:
+            pass
+        other = dict(AUTH, password="other")
+        with pool.client(host, port, **other) as second:
+            assert second is not first
+        assert pool.misses == 2
+
+    def test_keepalive_is_enabled(self, pool, ssh_server):
+        host, port = ssh_server
+        with pool.client(host, port, **AUTH) as client:
+            packetizer = client.get_transport().packetizer
+            assert packetizer._Packetizer__keepalive_interval == 30
+
+    def test_per_host_limit(self, pool, ssh_server):
+        host, port = ssh_server
+        pool.timeout = 0.2
+        with pool.client(host, port, **AUTH):
+            with pool.client(host, port, **AUTH):
+                with pytest.raises(SSHException):
+                    with pool.client(host, port, **AUTH):
+                        pass
+        assert pool.exhausted == 1
+
+    def test_waiters_get_returned_connections(self, pool, ssh_server):
+        host, port = ssh_server
+        pool.max_per_host = 1
+        got = []
+
+        def task():
+            with pool.client(host, port, **AUTH) as client:
+                got.append(client)
+
+        with pool.client(host, port, **AUTH) as held:
+            thread = threading.Thread(target=task)
+            thread.start()
+            time.sleep(0.2)
+        thread.join()
+        assert got == [held]
+        assert pool.exhausted == 1
+
+    def test_idle_connection_with_other_credentials_makes_room(
+        self, pool, ssh_server
+    ):
+        host, port = ssh_server
+        pool.max_per_host = 1
+        with pool.client(host, port, **AUTH) as first:
+            pass
+        with pool.client(host, port, **dict(AUTH, password="other")):
+            assert first.get_transport() is None
+        assert pool.evictions == 1
+
+    def test_dead_and_idle_connections_are_evicted(self, pool, ssh_server):
+        host, port = ssh_server
+        with pool.client(host, port, **AUTH) as first:
+            pass
+        first.close()
+        with pool.client(host, port, **AUTH) as second:
+            assert second is not first
+        pool.idle_timeout = 0
+        pool.reap()
+        assert second.get_transport() is None
+        assert pool.evictions == 2
+
+    def test_sftp(self, pool, ssh_server):
+        host, port = ssh_server
+        with pool.sftp(host, port, **AUTH) as first:
+            assert first.normalize(".")
+        with pool.sftp(host, port, **AUTH) as second:
+            assert second is first
@@ -0,0 +1,82 @@
+"""
+Tests for `SFTPClient.readinto` and `SFTPClient.get_into`.
+"""
+
+import mmap
+import os
+
+import paramiko
+import pytest
+
+from .util import slow
+
+
+@pytest.fixture
+def remote(sftp):
+    path = sftp.FOLDER + "/data"
+    with open(path, "wb") as f:
+        f.write(os.urandom(300000))
+    return path
+
+
+def contents(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@slow
+class TestGetInto(object):
+    def test_bytearray(self, sftp, remote):
+        buffer = bytearray(400000)
+        assert sftp.get_into(remote, buffer) == 300000
+        assert bytes(buffer[:300000]) == contents(remote)
+        assert not any(buffer[300000:])
+
+    def test_mmap(self, sftp, remote, tmp_path):
+        local = str(tmp_path / "copy")
+        with open(local, "w+b") as f:
+            f.truncate(300000)
+            with mmap.mmap(f.fileno(), 300000) as mapped:
+                sftp.get_into(remote, mapped)
+        assert contents(local) == contents(remote)
+
+    def test_several_channels(self, sftp, remote, monkeypatch):
+        monkeypatch.setattr(sftp, "transfer_range_size", 50000)
+        buffer = bytearray(300000)
+        sftp.get_into(remote, memoryview(buffer), channels=3, window=2)
+        assert bytes(buffer) == contents(remote)
+
+    def test_plain_paramiko_transport(
+        self, sftp, sftp_server, remote, monkeypatch
+    ):
+        # What paramiko's own Transport.open_sftp_client() hands back
+        monkeypatch.setattr(
+            sftp_server,
+            "open_sftp_client",
+            lambda: paramiko.SFTPClient.from_transport(sftp_server),
+        )
+        monkeypatch.setattr(sftp, "transfer_range_size", 50000)
+        buffer = bytearray(300000)
+        sftp.get_into(remote, buffer, channels=2)
+        assert bytes(buffer) == contents(remote)
+
+    def test_buffer_too_small(self, sftp, remote):
+        with pytest.raises(ValueError):
+            sftp.get_into(remote, bytearray(10))
+
+    def test_read_only_buffer(self, sftp, remote):
+        with pytest.raises(TypeError):
+            sftp.get_into(remote, bytes(300000))
+
+    def test_readinto(self, sftp, remote):
+        data = contents(remote)
+        buffer = bytearray(100000)
+        assert sftp.readinto(remote, buffer, offset=150000) == 100000
+        assert bytes(buffer) == data[150000:250000]
+        assert sftp.readinto(remote, buffer, offset=250000) == 50000
+        assert bytes(buffer[:50000]) == data[250000:]
+        assert sftp.readinto(remote, buffer, offset=300000) == 0
+
+    def test_readinto_missing_file(self, sftp):
+        with pytest.raises(IOError):
+            sftp.readinto(sftp.FOLDER + "/missing", bytearray(10))
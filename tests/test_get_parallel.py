@@ -0,0 +1,136 @@
+"""
+Tests for `SFTPClient.get_parallel`.
+"""
+
+import os
+
+import paramiko
+import pytest
+
+from .util import slow
+
+
+class Interrupt(Exception):
+    pass
+
+
+@pytest.fixture
+def remote(sftp):
+    path = sftp.FOLDER + "/big"
+    with open(path, "wb") as f:
+        f.write(os.urandom(1000000))
+    return path
+
+
+def contents(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@slow
+class TestGetParallel(object):
+    @pytest.mark.parametrize("channels", [1, 3])
+    def test_download(self, sftp, remote, tmp_path, channels):
+        local = str(tmp_path / "copy")
+        size = sftp.get_parallel(
+            remote, local, channels=channels, range_size=100000, window=4
+        )
+        assert size == 1000000
+        assert contents(local) == contents(remote)
+        assert os.listdir(str(tmp_path)) == ["copy"]
+
+    def test_plain_paramiko_transport(
+        self, sftp, sftp_server, remote, tmp_path, monkeypatch
+    ):
+        # What paramiko's own Transport.open_sftp_client() hands back
+        monkeypatch.setattr(
+            sftp_server,
+            "open_sftp_client",
+            lambda: paramiko.SFTPClient.from_transport(sftp_server),
+        )
+        local = str(tmp_path / "copy")
+        sftp.get_parallel(remote, local, channels=2, range_size=100000)
+        assert contents(local) == contents(remote)
+
+    def test_empty_file(self, sftp, tmp_path):
+        open(sftp.FOLDER + "/empty", "wb").close()
+        local = str(tmp_path / "copy")
+        assert sftp.get_parallel(sftp.FOLDER + "/empty", local) == 0
+        assert contents(local) == b""
+
+    def test_progress(self, sftp, remote, tmp_path):
+        seen = []
+        sftp.get_parallel(
+            remote,
+            str(tmp_path / "copy"),
+            range_size=300000,
+            callback=lambda done, total: seen.append((done, total)),
+        )
+        assert seen[-1] == (1000000, 1000000)
+        assert [done for done, total in seen] == sorted(
+            done for done, total in seen
+        )
+
+    def test_resume(self, sftp, remote, tmp_path):
+        local = str(tmp_path / "copy")
+
+        def interrupt(done, total):
+            if done >= 400000:
+                raise Interrupt()
+
+        with pytest.raises(Interrupt):
+            sftp.get_parallel(
+                remote, local, range_size=100000, window=2, callback=interrupt
+            )
+        assert not os.path.exists(local)
+        assert os.path.getsize(local + ".part") == 1000000
+        seen = []
+        sftp.get_parallel(
+            remote,
+            local,
+            range_size=100000,
+            callback=lambda done, total: seen.append(done),
+        )
+        # At least the first three ranges weren't fetched again
+        assert seen[0] > 300000
+        assert contents(local) == contents(remote)
+        assert sorted(os.listdir(str(tmp_path))) == ["copy"]
+
+    def test_changed_source_starts_over(self, sftp, remote, tmp_path):
+        local = str(tmp_path / "copy")
+
+        def interrupt(done, total):
+            raise Interrupt()
+
+        with pytest.raises(Interrupt):
+            sftp.get_parallel(
+                remote, local, range_size=100000, callback=interrupt
+            )
+        with open(remote, "ab") as f:
+            f.write(b"more")
+        seen = []
+        sftp.get_parallel(
+            remote,
+            local,
+            range_size=100000,
+            callback=lambda done, total: seen.append(done),
+        )
+        assert seen[0] <= 100000
+        assert contents(local) == contents(remote)
+
+    def test_source_changed_during_download(self, sftp, remote, tmp_path):
+        local = str(tmp_path / "copy")
+
+        def grow(done, total):
+            if done == total:
+                with open(remote, "ab") as f:
+                    f.write(b"more")
+
+        with pytest.raises(IOError, match="changed during download"):
+            sftp.get_parallel(remote, local, range_size=100000, callback=grow)
+        assert not os.path.exists(local)
+
+    def test_missing_file(self, sftp, tmp_path):
+        with pytest.raises(IOError):
+            sftp.get_parallel(sftp.FOLDER + "/missing", str(tmp_path / "x"))
+        assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,101 @@
+"""
+Tests for `SFTPClient.glob` and `SFTPClient.iglob`, checked against the
+standard library's `glob` run on the stub server's local files.
+"""
+
+import glob
+import os
+
+import pytest
+from paramiko.sftp import CMD_OPENDIR
+
+from paramiko_stat.sftp_glob import RECURSIVE, split_pattern
+
+from .util import slow
+
+
+@pytest.fixture
+def tree(sftp):
+    top = sftp.FOLDER
+    for day in ("2026-10-01", "2026-10-02", "2026-11-01"):
+        for source in ("alpha", "beta", ".hidden"):
+            d = os.path.join(top, source, day)
+            os.makedirs(d)
+            for name in ("part-0.parquet", "part-1.parquet", "_SUCCESS"):
+                with open(os.path.join(d, name), "w"):
+                    pass
+    with open(os.path.join(top, "alpha", "2026-10-05"), "w"):
+        pass
+    return top
+
+
+class TestSplitPattern(object):
+    def test_literal_runs_are_merged(self):
+        root, steps, dir_only = split_pattern("/data/x/*/y/z")
+        assert root == "/"
+        assert steps[0] == "data/x"
+        assert steps[1]("anything")
+        assert steps[2] == "y/z"
+        assert not dir_only
+
+    def test_recursive(self):
+        root, steps, dir_only = split_pattern("a/**/**/b/", recursive=True)
+        assert (root, steps, dir_only) == ("", ["a", RECURSIVE, "b"], True)
+        assert split_pattern("a/**", recursive=False)[1][1]("x")
+
+
+@slow
+class TestGlob(object):
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            "*/2026-10-*/part-*.parquet",
+            "alpha/2026-10-0?/_SUCCESS",
+            "*/2026-10-0[1-2]/",
+            "alpha/2026-10-*",
+            ".*/*/part-0.parquet",
+            "beta/2026-11-01/part-1.parquet",
+            "nope/*/part-*.parquet",
+            "*/2026-10-01/missing",
+        ],
+    )
+    def test_matches_stdlib(self, sftp, tree, pattern):
+        pattern = "{}/{}".format(tree, pattern)
+        assert sorted(sftp.glob(pattern)) == sorted(glob.glob(pattern))
+
+    @pytest.mark.parametrize(
+        "pattern", ["**/_SUCCESS", "alpha/**", "**/2026-11-01/", "beta/**/*"]
+    )
+    def test_recursive_matches_stdlib(self, sftp, tree, pattern):
+        pattern = "{}/{}".format(tree, pattern)
+        expected = sorted(glob.glob(pattern, recursive=True))
+        assert sorted(sftp.glob(pattern, recursive=True)) == expected
+
+    def test_relative_to_cwd(self, sftp, tree):
+        sftp.chdir(tree)
+        assert sorted(sftp.glob("alpha/*")) == sorted(
+            os.path.relpath(p, tree)
+            for p in glob.glob(os.path.join(tree, "alpha/*"))
+        )
+
+    @pytest.mark.parametrize(
+        "pattern",
+        ["**/alpha", "**/_SUCCESS", "**", "**/", "**/2026-1*", "*/**/*.x"],
+    )
+    def test_recursive_relative_to_cwd(self, sftp, tree, monkeypatch, pattern):
+        with open(os.path.join(tree, "_SUCCESS"), "w"):
+            pass
+        with open(os.path.join(tree, "alpha", "top.x"), "w"):
+            pass
+        sftp.chdir(tree)
+        monkeypatch.chdir(tree)
+        expected = sorted(glob.glob(pattern, recursive=True))
+        assert sorted(sftp.glob(pattern, recursive=True)) == expected
+
+    def test_literal_segments_are_not_listed(self, sftp, tree, sent_requests):
+        list(sftp.iglob("{}/*/2026-10-01/part-0.parquet".format(tree)))
+        assert sent_requests.count(CMD_OPENDIR) == 1
+
+    def test_iglob_is_lazy(self, sftp, tree):
+        matches = sftp.iglob("{}/*/*/*.parquet".format(tree))
+        assert next(matches).endswith(".parquet")
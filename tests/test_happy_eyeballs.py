@@ -0,0 +1,164 @@
+"""
+Tests for racing connects (``SSHClient.connect(happy_eyeballs_delay=...)``).
+"""
+
+import errno
+import socket
+import time
+
+import pytest
+from paramiko import AutoAddPolicy
+from paramiko.ssh_exception import NoValidConnectionsError
+
+from paramiko_stat import SSHClient
+from paramiko_stat.happy_eyeballs import interleave, race_connect
+
+from .util import slow
+
+V4, V6 = socket.AF_INET, socket.AF_INET6
+
+
+@pytest.fixture
+def blackhole():
+    """
+    Yield a localhost address whose connects hang: a listener whose backlog
+    has been filled, so further SYNs are dropped.
+    """
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(0)
+    addr = listener.getsockname()
+    held = []
+    for i in range(3):
+        sock = socket.socket()
+        sock.setblocking(False)
+        sock.connect_ex(addr)
+        held.append(sock)
+    time.sleep(0.1)
+    yield addr
+    for sock in held:
+        sock.close()
+    listener.close()
+
+
+@pytest.fixture
+def refused():
+    """
+    Yield a localhost address that refuses connections.
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    addr = sock.getsockname()
+    sock.close()
+    return addr
+
+
+@pytest.fixture
+def unreachable():
+    """
+    Yield an address whose connects fail straight away, before any packet
+    is sent, rather than in progress like ``refused``.
+    """
+    addr = ("255.255.255.255", 22)
+    sock = socket.socket()
+    sock.setblocking(False)
+    err = sock.connect_ex(addr)
+    sock.close()
+    if err in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+        pytest.skip("connecting to {} doesn't fail at once".format(addr[0]))
+    return addr
+
+
+def test_interleave_alternates_families():
+    to_try = [(V6, "a"), (V6, "b"), (V6, "c"), (V4, "x"), (V4, "y")]
+    assert [addr for af, addr in interleave(to_try)] == [
+        "a",
+        "x",
+        "b",
+        "y",
+        "c",
+    ]
+
+
+class TestRaceConnect(object):
+    def test_stalled_address_does_not_hold_up_the_next(
+        self, blackhole, ssh_server
+    ):
+        start = time.monotonic()
+        sock, errors = race_connect(
+            [(V4, blackhole), (V4, ssh_server)], timeout=10, delay=0.1
+        )
+        assert time.monotonic() - start < 5
+        assert sock.getpeername() == ssh_server
+        assert sock.gettimeout() == 10
+        assert errors == {}
+        sock.close()
+
+    def test_failure_starts_the_next_attempt(self, refused, ssh_server):
+        sock, errors = race_connect(
+            [(V4, refused), (V4, ssh_server)], timeout=10, delay=10
+        )
+        assert sock.getpeername() == ssh_server
+        assert list(errors) == [refused]
+        sock.close()
+
+    def test_immediate_failure_starts_the_next_attempt(
+        self, blackhole, unreachable, ssh_server
+    ):
+        start = time.monotonic()
+        sock, errors = race_connect(
+            [(V4, blackhole), (V4, unreachable), (V4, ssh_server)],
+            timeout=10,
+            delay=1,
+        )
+        # One delay after the blackhole, not two
+        assert time.monotonic() - start < 1.6
+        assert sock.getpeername() == ssh_server
+        assert list(errors) == [unreachable]
+        sock.close()
+
+    def test_all_errors_are_collected(self, refused, blackhole):
+        sock, errors = race_connect(
+            [(V4, refused), (V4, blackhole)], timeout=0.2, delay=0.05
+        )
+        assert sock is None
+        assert isinstance(errors[refused], ConnectionRefusedError)
+        assert isinstance(errors[blackhole], socket.timeout)
+
+
+@slow
+class TestSSHClientConnect(object):
+    def connect(self, to_try, port, **kwargs):
+        client = SSHClient()
+        client.set_missing_host_key_policy(AutoAddPolicy())
+        client._families_and_addresses = lambda hostname, port: to_try
+        client.connect(
+            "localhost",
+            port,
+            username="slowdive",
+            password="pygmalion",
+            allow_agent=False,
+            look_for_keys=False,
+            **kwargs
+        )
+        return client
+
+    def test_racing_connect(self, blackhole, ssh_server):
+        client = self.connect(
+            [(V4, blackhole), (V4, ssh_server)],
+            ssh_server[1],
+            timeout=10,
+            happy_eyeballs_delay=0.1,
+        )
+        assert client.get_transport().is_authenticated()
+        client.close()
+
+    def test_racing_connect_failure(self, refused, blackhole):
+        with pytest.raises(NoValidConnectionsError) as info:
+            self.connect(
+                [(V4, refused), (V4, blackhole)],
+                refused[1],
+                timeout=0.2,
+                happy_eyeballs_delay=0.05,
+            )
+        assert set(info.value.errors) == {refused, blackhole}
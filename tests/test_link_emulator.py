@@ -0,0 +1,88 @@
+"""
+Tests for the `Link` emulator in ``tests/loop.py``.
+"""
+
+import threading
+import time
+
+import pytest
+from paramiko import RSAKey, SFTPServer
+
+from paramiko_stat import SFTPClient, Transport
+
+from .loop import Link, LoopSocket
+from .stub_sftp import StubServer, StubSFTPServer
+from .util import _support, slow
+
+
+def read_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return data
+
+
+def round_trip(a, b, payload=b"x"):
+    start = time.monotonic()
+    a.send(payload)
+    read_exactly(b, len(payload))
+    b.send(payload)
+    read_exactly(a, len(payload))
+    return time.monotonic() - start
+
+
+def test_plain_pair():
+    a, b = LoopSocket.pair()
+    assert round_trip(a, b) < 0.05
+
+
+def test_delay_applies_each_way():
+    a, b = LoopSocket.pair(delay=0.05)
+    assert 0.1 <= round_trip(a, b) < 0.3
+
+
+def test_serialisation_delay():
+    link = Link(bandwidth=1500000, mtu=1500, header=40)
+    # One full packet, then just over: a second packet's header
+    assert link.serialisation_delay(1460) == pytest.approx(0.001)
+    assert link.serialisation_delay(1461) == pytest.approx(1541 / 1500000.0)
+    a, b = LoopSocket.pair(bandwidth=1000000)
+    start = time.monotonic()
+    a.send(b"x" * 100000)
+    read_exactly(b, 100000)
+    assert time.monotonic() - start >= 0.1
+
+
+def test_jitter_never_reorders():
+    a, b = LoopSocket.pair(delay=0.001, jitter=0.02, seed=1)
+    chunks = [bytes([i]) * 10 for i in range(50)]
+    for chunk in chunks:
+        a.send(chunk)
+    assert read_exactly(b, 500) == b"".join(chunks)
+
+
+@slow
+def test_pipelining_pays_off_over_latency():
+    sockc, socks = LoopSocket.pair(delay=0.005)
+    tc, ts = Transport(sockc), Transport(socks)
+    ts.add_server_key(RSAKey.from_private_key_file(_support("test_rsa.key")))
+    ts.set_subsystem_handler("sftp", SFTPServer, StubSFTPServer)
+    ts.start_server(threading.Event(), StubServer())
+    tc.connect(username="slowdive", password="pygmalion")
+    sftp = SFTPClient.from_transport(tc)
+    try:
+        paths = ["/missing/{}".format(i) for i in range(40)]
+        start = time.monotonic()
+        for path in paths:
+            sftp.exists(path)
+        looped = time.monotonic() - start
+        start = time.monotonic()
+        sftp.exists_many(paths)
+        pipelined = time.monotonic() - start
+        # 40 round-trips of at least 10ms each, versus about one
+        assert looped >= 0.4
+        assert pipelined < looped / 4
+    finally:
+        sftp.close()
+        tc.close()
+        ts.close()
@@ -0,0 +1,130 @@
+"""
+Tests for `SFTPClient.listdir_columns` and `DirColumns`.
+"""
+
+import os
+
+import pytest
+
+from paramiko_stat import sftp_columns
+from paramiko_stat.sftp_columns import NO_ID, NO_VALUE, DirColumns
+from paramiko_stat.sftp_kind import PathKind
+
+
+@pytest.fixture
+def folder(sftp):
+    top = sftp.FOLDER
+    for i in range(300):
+        path = "{}/f{:03}".format(top, i)
+        with open(path, "wb") as f:
+            f.write(b"x" * i)
+        os.utime(path, (1000000000 + i, 1000000000 + i))
+    os.mkdir(top + "/dir")
+    os.symlink("f299", top + "/link")
+    with open(top + "/café", "wb"):
+        pass
+    return top
+
+
+@pytest.fixture(params=["numpy", "python"])
+def select_with(request, monkeypatch):
+    """
+    Run `DirColumns.select` with NumPy masks, or without NumPy.
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(sftp_columns, "numpy", None)
+    return request.param
+
+
+class TestListdirColumns(object):
+    def test_matches_lstat(self, sftp, folder):
+        columns = sftp.listdir_columns(folder, read_aheads=2)
+        assert sorted(columns.names()) == sorted(os.listdir(folder))
+        assert len(columns) == 303
+        for i, name in enumerate(columns.names()):
+            assert columns.name(i) == name
+            st = os.lstat(os.path.join(folder, name))
+            assert columns.sizes[i] == st.st_size
+            assert columns.modes[i] == st.st_mode
+            assert columns.uids[i] == st.st_uid
+            assert columns.gids[i] == st.st_gid
+            assert columns.mtimes[i] == int(st.st_mtime)
+
+    def test_matches_listdir_attr(self, sftp, folder):
+        columns = sftp.listdir_columns(folder)
+        expected = {a.filename: a for a in sftp.listdir_attr(folder)}
+        for i in range(len(columns)):
+            attr = columns.attributes(i)
+            other = expected[attr.filename]
+            assert (attr.st_size, attr.st_mode, attr.st_mtime) == (
+                other.st_size,
+                other.st_mode,
+                other.st_mtime,
+            )
+
+    def test_relative_to_cwd(self, sftp, folder):
+        sftp.chdir(folder)
+        try:
+            assert len(sftp.listdir_columns()) == 303
+        finally:
+            sftp.chdir(None)
+
+    def test_missing(self, sftp):
+        with pytest.raises(IOError):
+            sftp.listdir_columns(sftp.FOLDER + "/missing")
+
+    def test_select(self, sftp, folder, select_with):
+        columns = sftp.listdir_columns(folder)
+
+        def selected(**conditions):
+            return sorted(
+                columns.name(i) for i in columns.select(**conditions)
+            )
+
+        assert selected(kind=PathKind.DIR) == ["dir"]
+        assert selected(kind=PathKind.SYMLINK) == ["link"]
+        assert len(selected(kind=PathKind.FILE)) == 301
+        assert selected(
+            kind=PathKind.FILE, min_size=250, modified_after=1000000295
+        ) == ["f296", "f297", "f298", "f299"]
+        assert selected(max_size=1, modified_before=1000000002) == [
+            "f000",
+            "f001",
+        ]
+        with pytest.raises(ValueError):
+            columns.select(kind="socket")
+
+    def test_filter(self, sftp, folder, select_with):
+        found = sftp.listdir_columns(folder).filter(
+            kind=PathKind.FILE, min_size=298
+        )
+        assert isinstance(found, DirColumns)
+        assert sorted(found.names()) == ["f298", "f299"]
+        assert sorted(found.sizes) == [298, 299]
+        assert found.name(-1) in ("f298", "f299")
+
+
+class TestDirColumns(object):
+    def test_missing_values(self, select_with):
+        columns = DirColumns()
+        columns._append(b"a", NO_VALUE, NO_ID, NO_ID, 0, NO_VALUE)
+        attr = columns.attributes(0)
+        assert attr.filename == "a"
+        assert attr.st_size is None
+        assert attr.st_uid is None
+        assert attr.st_mode is None
+        assert attr.st_mtime is None
+        assert len(columns.select(max_size=10)) == 0
+        assert len(columns.select(modified_before=10)) == 0
+        assert len(DirColumns().select(kind=PathKind.FILE)) == 0
+        assert columns.select().typecode == "Q"
+
+    def test_to_numpy(self, sftp, folder):
+        pytest.importorskip("numpy")
+        columns = sftp.listdir_columns(folder)
+        table = columns.to_numpy()
+        assert len(table) == len(columns)
+        assert list(table["size"]) == list(columns.sizes)
+        assert list(table["mtime"]) == list(columns.mtimes)
@@ -0,0 +1,112 @@
+"""
+Tests for `SFTPClient.makedirs` and `SFTPClient.makedirs_many`.
+"""
+
+import errno
+import os
+
+import pytest
+from paramiko.sftp import CMD_MKDIR, CMD_STAT
+
+
+class TestMakedirs(object):
+    def test_creates_missing_parents(self, sftp):
+        path = sftp.FOLDER + "/a/b/c"
+        created = sftp.makedirs(path)
+        assert created == [
+            sftp.FOLDER + "/a",
+            sftp.FOLDER + "/a/b",
+            sftp.FOLDER + "/a/b/c",
+        ]
+        assert os.path.isdir(path)
+
+    def test_stats_then_creates(self, sftp, sent_requests):
+        sftp.makedirs(sftp.FOLDER + "/a/b/c/d")
+        depth = (sftp.FOLDER + "/a/b/c/d").count("/") + 1
+        assert sent_requests == [CMD_STAT] * depth + [CMD_MKDIR] * 4
+
+    def test_only_missing_ones_are_created(self, sftp, sent_requests):
+        os.makedirs(sftp.FOLDER + "/a/b")
+        assert sftp.makedirs(sftp.FOLDER + "/a/b/c/d") == [
+            sftp.FOLDER + "/a/b/c",
+            sftp.FOLDER + "/a/b/c/d",
+        ]
+        assert sent_requests.count(CMD_MKDIR) == 2
+
+    def test_mode(self, sftp):
+        sftp.makedirs(sftp.FOLDER + "/a/b", mode=0o750)
+        assert os.stat(sftp.FOLDER + "/a").st_mode & 0o777 == 0o750
+        assert os.stat(sftp.FOLDER + "/a/b").st_mode & 0o777 == 0o750
+
+    def test_relative_to_cwd(self, sftp):
+        sftp.chdir(sftp.FOLDER)
+        try:
+            assert sftp.makedirs("x/./y/") == ["x", "x/y"]
+        finally:
+            sftp.chdir(None)
+        assert os.path.isdir(sftp.FOLDER + "/x/y")
+
+    def test_exists(self, sftp):
+        with pytest.raises(IOError) as info:
+            sftp.makedirs(sftp.FOLDER)
+        assert info.value.errno == errno.EEXIST
+        assert sftp.makedirs(sftp.FOLDER, exist_ok=True) == []
+
+    def test_existing_file(self, sftp):
+        path = sftp.FOLDER + "/file"
+        open(path, "wb").close()
+        with pytest.raises(IOError) as info:
+            sftp.makedirs(path, exist_ok=True)
+        assert info.value.errno == errno.EEXIST
+        with pytest.raises(IOError) as info:
+            sftp.makedirs(path + "/a/b")
+        assert info.value.errno == errno.ENOTDIR
+        assert info.value.filename == path
+
+    def test_failure_names_the_folder(self, sftp):
+        # Can't be stat'ed, nor made into a folder
+        os.symlink("nowhere", sftp.FOLDER + "/broken")
+        with pytest.raises(IOError) as info:
+            sftp.makedirs(sftp.FOLDER + "/broken/a")
+        assert info.value.filename == sftp.FOLDER + "/broken"
+
+    def test_invalidates_stat_cache(self, sftp):
+        sftp.enable_stat_cache(ttl=60, negative_ttl=60)
+        path = sftp.FOLDER + "/a/b"
+        assert not sftp.isdir(path)
+        sftp.makedirs(path)
+        assert sftp.isdir(path)
+
+
+class TestMakedirsMany(object):
+    def test_shared_parents_are_created_once(self, sftp, sent_requests):
+        top = sftp.FOLDER
+        os.makedirs(top + "/a")
+        paths = [top + "/a/b/c", top + "/a/b/d", top + "/a/e", top + "/f"]
+        created = sftp.makedirs_many(paths, mode=0o755, window=3)
+        # Parents first
+        assert created == [
+            top + "/f",
+            top + "/a/b",
+            top + "/a/e",
+            top + "/a/b/c",
+            top + "/a/b/d",
+        ]
+        for path in paths:
+            assert os.path.isdir(path)
+        assert sent_requests.count(CMD_MKDIR) == 5
+        # Each ancestor stat'ed once
+        assert sent_requests.count(CMD_STAT) == top.count("/") + 1 + 6
+
+    def test_existing_ones_are_fine(self, sftp):
+        os.makedirs(sftp.FOLDER + "/a/b")
+        assert sftp.makedirs_many([sftp.FOLDER + "/a/b"]) == []
+        assert sftp.makedirs_many([]) == []
+
+    def test_existing_file(self, sftp):
+        path = sftp.FOLDER + "/file"
+        open(path, "wb").close()
+        with pytest.raises(IOError) as info:
+            sftp.makedirs_many([sftp.FOLDER + "/ok", path + "/a"])
+        assert info.value.errno == errno.ENOTDIR
+        assert not os.path.exists(sftp.FOLDER + "/ok")
@@ -0,0 +1,83 @@
+"""
+Tests for `Transport.parallel_walk`.
+"""
+
+import os
+
+import pytest
+
+from paramiko_stat.sftp_parallel import ParallelWalk
+
+from .util import slow
+
+
+class Boom(Exception):
+    pass
+
+
+def normalized(results):
+    return sorted(
+        (top, sorted(dirs), sorted(files)) for top, dirs, files in results
+    )
+
+
+@pytest.fixture
+def tree(sftp):
+    top = sftp.FOLDER
+    for i in range(6):
+        for j in range(4):
+            os.makedirs(os.path.join(top, "d{}".format(i), "e{}".format(j)))
+            for k in range(3):
+                path = os.path.join(
+                    top, "d{}".format(i), "e{}".format(j), "f{}".format(k)
+                )
+                with open(path, "w"):
+                    pass
+    os.symlink("d0", os.path.join(top, "link"))
+    return top
+
+
+@slow
+class TestParallelWalk(object):
+    @pytest.mark.parametrize("channels", [1, 3])
+    def test_matches_os_walk(self, sftp_server, tree, channels):
+        walk = sftp_server.parallel_walk(tree, channels=channels, window=2)
+        assert normalized(walk) == normalized(os.walk(tree))
+
+    def test_followlinks(self, sftp_server, tree):
+        walk = sftp_server.parallel_walk(tree, followlinks=True)
+        assert normalized(walk) == normalized(os.walk(tree, followlinks=True))
+
+    def test_stats(self, sftp_server, tree):
+        walk = sftp_server.parallel_walk(tree, channels=3, queue_depth=2)
+        results = list(walk)
+        assert len(walk.stats) == 3
+        assert sum(s.directories for s in walk.stats) == len(results)
+        assert sum(s.entries for s in walk.stats) == sum(
+            len(dirs) + len(files) for top, dirs, files in results
+        )
+
+    def test_worker_failure_is_raised(self, sftp_server, tree, monkeypatch):
+        process = ParallelWalk._process
+
+        def failing(self, client, path, listing):
+            if path.endswith("/d3"):
+                raise Boom(path)
+            return process(self, client, path, listing)
+
+        monkeypatch.setattr(ParallelWalk, "_process", failing)
+        with pytest.raises(Boom):
+            list(sftp_server.parallel_walk(tree, channels=2))
+
+    def test_onerror(self, sftp_server, sftp):
+        errors = []
+        missing = "{}/missing".format(sftp.FOLDER)
+        walk = sftp_server.parallel_walk(missing, onerror=errors.append)
+        assert list(walk) == []
+        assert [e.filename for e in errors] == [missing]
+
+    def test_close_early(self, sftp_server, tree):
+        with sftp_server.parallel_walk(tree, queue_depth=1) as walk:
+            next(iter(walk))
+        for client in walk._clients:
+            assert client.get_channel().closed
@@ -0,0 +1,69 @@
+"""
+Tests for `SFTPClient.path_kind` and the predicates built on it.
+"""
+
+import pytest
+
+from paramiko_stat import PathKind
+
+from .util import slow
+
+
+@pytest.fixture
+def tree(sftp):
+    paths = {
+        name: "{}/{}".format(sftp.FOLDER, name)
+        for name in ("file", "dir", "link", "broken_link", "missing")
+    }
+    sftp.open(paths["file"], "w").close()
+    sftp.mkdir(paths["dir"])
+    sftp.symlink("dir", paths["link"])
+    sftp.symlink("nowhere", paths["broken_link"])
+    return paths
+
+
+@slow
+class TestPathKind(object):
+    @pytest.mark.parametrize(
+        "name, kind, requests_needed",
+        [
+            ("file", PathKind.FILE, 1),
+            ("dir", PathKind.DIR, 1),
+            ("link", PathKind.SYMLINK, 2),
+            ("broken_link", PathKind.BROKEN_SYMLINK, 2),
+            ("missing", PathKind.MISSING, 1),
+        ],
+    )
+    def test_kinds(
+        self, sftp, tree, sent_requests, name, kind, requests_needed
+    ):
+        del sent_requests[:]
+        result = sftp.path_kind(tree[name])
+        assert result.kind == kind
+        assert len(sent_requests) == requests_needed
+
+    def test_symlink_carries_both_stats(self, sftp, tree):
+        result = sftp.path_kind(tree["link"])
+        assert result.is_symlink
+        assert result.is_dir
+        assert result.lstat is not result.stat
+
+    def test_result_is_immutable(self, sftp, tree):
+        result = sftp.path_kind(tree["file"])
+        with pytest.raises(AttributeError):
+            result.kind = PathKind.DIR
+
+    def test_islink_does_not_resolve_target(self, sftp, tree, sent_requests):
+        del sent_requests[:]
+        assert sftp.islink(tree["link"])
+        assert sftp.lexists(tree["broken_link"])
+        assert len(sent_requests) == 2
+
+    def test_predicates_agree_with_path_kind(self, sftp, tree):
+        for path in tree.values():
+            kind = sftp.path_kind(path)
+            assert sftp.exists(path) == kind.exists
+            assert sftp.lexists(path) == kind.lexists
+            assert sftp.isfile(path) == kind.is_file
+            assert sftp.isdir(path) == kind.is_dir
+            assert sftp.islink(path) == kind.is_symlink
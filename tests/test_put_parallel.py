@@ -0,0 +1,142 @@
+"""
+Tests for `SFTPClient.put_parallel`.
+"""
+
+import os
+
+import paramiko
+import pytest
+
+from .util import slow
+
+
+class Interrupt(Exception):
+    pass
+
+
+@pytest.fixture
+def local(tmp_path):
+    path = str(tmp_path / "big")
+    with open(path, "wb") as f:
+        f.write(os.urandom(1000000))
+    return path
+
+
+def contents(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@slow
+class TestPutParallel(object):
+    @pytest.mark.parametrize("channels", [1, 3])
+    def test_upload(self, sftp, local, channels):
+        remote = sftp.FOLDER + "/copy"
+        attr = sftp.put_parallel(
+            local, remote, channels=channels, range_size=100000, window=4
+        )
+        assert attr.st_size == 1000000
+        assert contents(remote) == contents(local)
+        assert os.listdir(sftp.FOLDER) == ["copy"]
+        assert not os.path.exists(local + ".upload.ranges")
+
+    def test_plain_paramiko_transport(
+        self, sftp, sftp_server, local, monkeypatch
+    ):
+        # What paramiko's own Transport.open_sftp_client() hands back
+        monkeypatch.setattr(
+            sftp_server,
+            "open_sftp_client",
+            lambda: paramiko.SFTPClient.from_transport(sftp_server),
+        )
+        remote = sftp.FOLDER + "/copy"
+        sftp.put_parallel(local, remote, channels=2, range_size=100000)
+        assert contents(remote) == contents(local)
+
+    def test_empty_file(self, sftp, tmp_path):
+        local = str(tmp_path / "empty")
+        open(local, "wb").close()
+        assert sftp.put_parallel(local, sftp.FOLDER + "/copy").st_size == 0
+        assert contents(sftp.FOLDER + "/copy") == b""
+
+    def test_replaces_existing_file(self, sftp, local):
+        remote = sftp.FOLDER + "/copy"
+        with open(remote, "wb") as f:
+            f.write(b"old")
+        sftp.put_parallel(local, remote)
+        assert contents(remote) == contents(local)
+
+    def test_uses_posix_rename(self, sftp, local, monkeypatch):
+        monkeypatch.setattr(
+            sftp, "extensions", {"posix-rename@openssh.com": b"1"}
+        )
+        renamed = []
+        original = sftp.posix_rename
+        monkeypatch.setattr(
+            sftp,
+            "posix_rename",
+            lambda old, new: renamed.append(new) or original(old, new),
+        )
+        remote = sftp.FOLDER + "/copy"
+        with open(remote, "wb") as f:
+            f.write(b"old")
+        sftp.put_parallel(local, remote)
+        assert renamed == [remote]
+        assert contents(remote) == contents(local)
+
+    def test_failed_rename_keeps_the_error(self, sftp, local, monkeypatch):
+        def rename(old, new):
+            raise IOError("denied")
+
+        monkeypatch.setattr(sftp, "rename", rename)
+        remote = sftp.FOLDER + "/copy"
+        with pytest.raises(IOError, match="denied"):
+            sftp.put_parallel(local, remote)
+        assert contents(remote + ".part") == contents(local)
+
+    def test_resume(self, sftp, local):
+        remote = sftp.FOLDER + "/copy"
+
+        def interrupt(done, total):
+            if done >= 400000:
+                raise Interrupt()
+
+        with pytest.raises(Interrupt):
+            sftp.put_parallel(
+                local, remote, range_size=100000, window=2, callback=interrupt
+            )
+        assert not os.path.exists(remote)
+        assert os.path.exists(remote + ".part")
+        seen = []
+        sftp.put_parallel(
+            local,
+            remote,
+            range_size=100000,
+            callback=lambda done, total: seen.append(done),
+        )
+        assert seen[0] > 300000
+        assert contents(remote) == contents(local)
+        assert os.listdir(sftp.FOLDER) == ["copy"]
+
+    def test_truncated_partial_is_resent(self, sftp, local):
+        remote = sftp.FOLDER + "/copy"
+
+        def interrupt(done, total):
+            if done >= 400000:
+                raise Interrupt()
+
+        with pytest.raises(Interrupt):
+            sftp.put_parallel(
+                local, remote, range_size=100000, window=2, callback=interrupt
+            )
+        with open(remote + ".part", "r+b") as f:
+            f.truncate(150000)
+        seen = []
+        sftp.put_parallel(
+            local,
+            remote,
+            range_size=100000,
+            callback=lambda done, total: seen.append(done),
+        )
+        assert seen[0] <= 200000
+        assert contents(remote) == contents(local)
@@ -0,0 +1,116 @@
+"""
+Tests for `SFTPClient.rmtree`.
+"""
+
+import errno
+import os
+
+import pytest
+from paramiko.sftp import CMD_OPENDIR, CMD_REMOVE, CMD_RMDIR, CMD_STAT
+
+from .util import slow
+
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def tree(sftp):
+    top = sftp.FOLDER + "/tree"
+    for i in range(30):
+        write("{}/f{}".format(top, i))
+    write(top + "/sub/a")
+    write(top + "/sub/deeper/b")
+    os.makedirs(top + "/empty")
+    os.makedirs(top + "/sub/deeper/empty")
+    return top
+
+
+@slow
+class TestRmtree(object):
+    def test_removes_everything(self, sftp, tree, sent_requests):
+        sftp.rmtree(tree)
+        assert not os.path.lexists(tree)
+        assert sent_requests.count(CMD_REMOVE) == 32
+        assert sent_requests.count(CMD_RMDIR) == 5
+        # Entry types come from the listings
+        assert CMD_STAT not in sent_requests
+
+    def test_small_window(self, sftp, tree):
+        sftp.rmtree(tree + "/", window=1)
+        assert not os.path.lexists(tree)
+
+    def test_relative_to_cwd(self, sftp, tree):
+        sftp.chdir(sftp.FOLDER)
+        try:
+            sftp.rmtree("tree")
+        finally:
+            sftp.chdir(None)
+        assert not os.path.lexists(tree)
+
+    def test_symlinks_are_not_followed(self, sftp, tree):
+        outside = sftp.FOLDER + "/outside"
+        write(outside + "/keep")
+        os.symlink(os.path.abspath(outside), tree + "/sub/link")
+        os.symlink("nowhere", tree + "/broken")
+        sftp.rmtree(tree)
+        assert not os.path.lexists(tree)
+        assert os.path.exists(outside + "/keep")
+
+    def test_symlink_top(self, sftp, tree):
+        link = sftp.FOLDER + "/link"
+        os.symlink("tree", link)
+        with pytest.raises(OSError):
+            sftp.rmtree(link)
+        assert os.path.exists(tree + "/f0")
+        sftp.rmtree(link, ignore_errors=True)
+        assert os.path.lexists(link)
+
+    def test_missing(self, sftp):
+        with pytest.raises(IOError) as info:
+            sftp.rmtree(sftp.FOLDER + "/missing")
+        assert info.value.errno == errno.ENOENT
+        sftp.rmtree(sftp.FOLDER + "/missing", ignore_errors=True)
+
+    def test_not_a_directory(self, sftp):
+        write(sftp.FOLDER + "/file")
+        with pytest.raises(IOError) as info:
+            sftp.rmtree(sftp.FOLDER + "/file")
+        assert info.value.errno == errno.ENOTDIR
+
+    def test_onerror(self, sftp, tree, monkeypatch):
+        # Make the listing of one directory and the removal of one file fail
+        # by sending them for paths that don't exist
+        broken = {
+            (CMD_OPENDIR, (tree + "/sub/deeper").encode()),
+            (CMD_REMOVE, (tree + "/f3").encode()),
+        }
+        original = sftp._async_request
+
+        def failing(fileobj, t, *args):
+            if (t, args[0]) in broken:
+                args = (args[0] + b"-missing",) + args[1:]
+            return original(fileobj, t, *args)
+
+        monkeypatch.setattr(sftp, "_async_request", failing)
+        errors = []
+        sftp.rmtree(tree, onerror=lambda *args: errors.append(args))
+        assert [(function, path) for function, path, _ in errors] == [
+            (sftp.remove, tree + "/f3"),
+            (sftp.listdir_attr, tree + "/sub/deeper"),
+            (sftp.rmdir, tree + "/sub/deeper"),
+            (sftp.rmdir, tree + "/sub"),
+            (sftp.rmdir, tree),
+        ]
+        assert errors[0][2][1].errno == errno.ENOENT
+        assert errors[0][2][1].filename == tree + "/f3"
+        assert sorted(os.listdir(tree)) == ["f3", "sub"]
+
+    def test_invalidates_stat_cache(self, sftp, tree):
+        sftp.enable_stat_cache(ttl=60)
+        assert sftp.isfile(tree + "/sub/a")
+        sftp.rmtree(tree)
+        assert not sftp.exists(tree + "/sub/a")
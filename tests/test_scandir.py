@@ -0,0 +1,84 @@
+"""
+Tests for `SFTPClient.scandir`.
+"""
+
+import pytest
+from paramiko.sftp_attr import SFTPAttributes
+
+from .util import slow
+
+
+@pytest.fixture
+def tree(sftp):
+    sftp.open("{}/file".format(sftp.FOLDER), "w").close()
+    sftp.mkdir("{}/dir".format(sftp.FOLDER))
+    sftp.symlink("dir", "{}/link".format(sftp.FOLDER))
+    sftp.symlink("nowhere", "{}/broken_link".format(sftp.FOLDER))
+    return sftp.FOLDER
+
+
+@slow
+class TestScandir(object):
+    def test_lists_all_entries(self, sftp, tree):
+        entries = {e.name: e for e in sftp.scandir(tree)}
+        assert sorted(entries) == sorted(sftp.listdir(tree))
+        assert entries["file"].path == "{}/file".format(tree)
+
+    def test_types_come_from_readdir(self, sftp, tree, sent_requests):
+        entries = {e.name: e for e in sftp.scandir(tree)}
+        sent = len(sent_requests)
+        assert entries["file"].is_file()
+        assert not entries["file"].is_dir()
+        assert entries["dir"].is_dir()
+        assert not entries["dir"].is_symlink()
+        assert entries["link"].is_symlink()
+        assert not entries["link"].is_dir(follow_symlinks=False)
+        assert entries["file"].stat().st_size == 0
+        assert len(sent_requests) == sent
+
+    def test_following_a_symlink_costs_one_request(
+        self, sftp, tree, sent_requests
+    ):
+        link = next(e for e in sftp.scandir(tree) if e.name == "link")
+        sent = len(sent_requests)
+        assert link.is_dir()
+        assert not link.is_file()
+        assert link.stat().st_mode == sftp.stat(link.path).st_mode
+        assert len(sent_requests) == sent + 2
+
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_stat_is_always_attributes(self, sftp, tree, cached):
+        if cached:
+            sftp.enable_stat_cache(ttl=60)
+        for entry in sftp.scandir(tree):
+            if entry.name != "broken_link":
+                assert isinstance(entry.stat(), SFTPAttributes)
+            attr = entry.stat(follow_symlinks=False)
+            assert isinstance(attr, SFTPAttributes)
+            assert attr.filename == entry.name
+
+    def test_broken_symlink(self, sftp, tree):
+        link = next(e for e in sftp.scandir(tree) if e.name == "broken_link")
+        assert link.is_symlink()
+        assert not link.is_file()
+        assert not link.is_dir()
+        with pytest.raises(IOError):
+            link.stat()
+
+    @pytest.mark.parametrize("read_aheads", [1, 3])
+    def test_large_directory(self, sftp, read_aheads):
+        names = ["f{:04d}".format(i) for i in range(300)]
+        for name in names:
+            sftp.open("{}/{}".format(sftp.FOLDER, name), "w").close()
+        entries = sftp.scandir(sftp.FOLDER, read_aheads=read_aheads)
+        assert sorted(e.name for e in entries) == names
+
+    def test_stopping_early_leaves_client_usable(self, sftp, tree):
+        entries = sftp.scandir(tree)
+        next(entries)
+        entries.close()
+        assert sftp.isdir(tree)
+
+    def test_missing_directory(self, sftp):
+        with pytest.raises(IOError):
+            list(sftp.scandir("{}/missing".format(sftp.FOLDER)))
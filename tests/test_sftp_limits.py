@@ -0,0 +1,121 @@
+"""
+Tests for `SFTPClient.query_limits` and the `SFTPLimits` it reports.
+"""
+
+import os
+import threading
+
+import pytest
+from paramiko import RSAKey
+from paramiko.sftp_file import SFTPFile
+
+from paramiko_stat import SFTPClient, Transport
+from paramiko_stat.sftp_limits import SFTPLimits
+
+from .conftest import make_sftp_folder
+from .loop import LoopSocket
+from .stub_sftp import LimitsSFTPServer, StubServer, StubSFTPServer
+from .util import _support
+
+
+@pytest.fixture
+def limits_server():
+    """
+    Like ``sftp_server``, but the server answers ``limits@openssh.com``.
+    """
+    sockc, socks = LoopSocket.pair()
+    tc, ts = Transport(sockc), Transport(socks)
+    ts.add_server_key(RSAKey.from_private_key_file(_support("test_rsa.key")))
+    ts.set_subsystem_handler("sftp", LimitsSFTPServer, StubSFTPServer)
+    ts.start_server(threading.Event(), StubServer())
+    tc.connect(username="slowdive", password="pygmalion")
+    yield tc
+    tc.close()
+    ts.close()
+
+
+@pytest.fixture
+def limited(limits_server):
+    client = limits_server.open_sftp_client()
+    client.FOLDER = make_sftp_folder()
+    yield client
+    client.close()
+
+
+def test_limits_are_queried(limited):
+    assert "limits@openssh.com" in limited.extensions
+    assert limited.limits == SFTPLimits(*LimitsSFTPServer.LIMITS)
+
+
+def test_default_without_extension(sftp_server):
+    client = sftp_server.open_sftp_client()
+    try:
+        assert "limits@openssh.com" not in client.extensions
+        assert client.limits is SFTPLimits.DEFAULT
+    finally:
+        client.close()
+
+
+def test_plain_client_does_not_ask(limits_server):
+    client = SFTPClient.from_transport(limits_server)
+    try:
+        assert client.limits is SFTPLimits.DEFAULT
+    finally:
+        client.close()
+
+
+def test_unknown_limits_fall_back(limits_server, monkeypatch):
+    monkeypatch.setattr(LimitsSFTPServer, "LIMITS", (0, 0, 65536, 0))
+    client = limits_server.open_sftp_client()
+    try:
+        assert client.limits == SFTPLimits(34000, 32768, 65536, None)
+    finally:
+        client.close()
+
+
+def test_chunk_size():
+    limits = SFTPLimits(70000, 65536, 32768, None)
+    assert limits.chunk_size("r") == 65536
+    assert limits.chunk_size("rb") == 65536
+    assert limits.chunk_size("w") == 32768
+    assert limits.chunk_size("a") == 32768
+    assert limits.chunk_size("r+") == 32768
+
+
+def test_files_use_the_limits(limited):
+    path = limited.FOLDER + "/data"
+    data = os.urandom(1 << 19)
+    with limited.open(path, "wb") as f:
+        assert f.MAX_REQUEST_SIZE == 1 << 17
+        f.write(data)
+    with limited.open(path, "rb") as f:
+        assert f.MAX_REQUEST_SIZE == 1 << 17
+        assert f.read() == data
+
+
+def test_get_fills_the_channel_window(limited, tmp_path, monkeypatch):
+    path = limited.FOLDER + "/data"
+    data = os.urandom(1 << 20)
+    with open(path, "wb") as f:
+        f.write(data)
+    windows = []
+    prefetch = SFTPFile.prefetch
+
+    def recording(self, file_size=None, max_concurrent_requests=None):
+        windows.append(max_concurrent_requests)
+        return prefetch(self, file_size, max_concurrent_requests)
+
+    monkeypatch.setattr(SFTPFile, "prefetch", recording)
+    limited.get(path, str(tmp_path / "copy"))
+    assert (tmp_path / "copy").read_bytes() == data
+    window = limited.get_channel().in_window_size
+    assert windows == [-(-window // (1 << 17))]
+
+
+def test_walk_window_is_capped_by_handles(limited):
+    assert limited._handle_window(64) == 8
+    assert limited._handle_window(4) == 4
+    for i in range(20):
+        os.mkdir("{}/d{}".format(limited.FOLDER, i))
+    top = limited.FOLDER
+    assert len(list(limited.walk(top, window=64))) == 21
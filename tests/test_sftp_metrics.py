@@ -0,0 +1,74 @@
+"""
+Tests for `SFTPClient.enable_metrics`.
+"""
+
+import errno
+import os
+
+from paramiko.message import Message
+from paramiko.sftp import CMD_STAT, CMD_STATUS, SFTP_NO_SUCH_FILE
+
+from paramiko_stat.sftp_metrics import SFTPMetrics
+
+from .util import slow
+
+
+def test_histogram_buckets():
+    metrics = SFTPMetrics()
+    for num, latency in enumerate((0.00005, 0.0003, 20.0)):
+        request = Message()
+        request.add_int(num)
+        metrics.sent(CMD_STAT, request.asbytes())
+        metrics._pending[num] = (CMD_STAT, metrics._pending[num][1] - latency)
+        reply = Message()
+        reply.add_int(num)
+        reply.add_int(SFTP_NO_SUCH_FILE)
+        metrics.received(CMD_STATUS, reply.asbytes())
+    stat = metrics.snapshot()["stat"]
+    assert stat["count"] == 3
+    assert stat["errors"] == {errno.ENOENT: 3}
+    assert stat["histogram"][0] == 1
+    assert stat["histogram"][2] == 1
+    assert stat["histogram"][-1] == 1
+    assert stat["latency_max"] >= 20.0
+
+
+@slow
+class TestSFTPMetrics(object):
+    def test_disabled_by_default(self, sftp):
+        assert sftp.metrics is None
+
+    def test_counts_requests(self, sftp):
+        folder = sftp.FOLDER
+        with open(os.path.join(folder, "f"), "wb") as f:
+            f.write(b"x" * 1000)
+        metrics = sftp.enable_metrics()
+        assert sftp.exists(folder + "/f")
+        assert not sftp.exists(folder + "/missing")
+        with sftp.open(folder + "/f") as f:
+            assert len(f.read()) == 1000
+        sftp.listdir(folder)
+        snapshot = metrics.snapshot()
+        assert snapshot["lstat"]["count"] == 2
+        assert snapshot["lstat"]["errors"] == {errno.ENOENT: 1}
+        assert sum(snapshot["lstat"]["histogram"]) == 2
+        assert snapshot["read"]["bytes_received"] > 1000
+        assert snapshot["read"]["errors"] == {}
+        assert snapshot["opendir"]["count"] == 1
+        assert snapshot["readdir"]["count"] >= 1
+        assert snapshot["open"]["bytes_sent"] > len(folder)
+
+    def test_reset_and_disable(self, sftp):
+        metrics = sftp.enable_metrics()
+        sftp.exists(sftp.FOLDER)
+        metrics.reset()
+        assert metrics.snapshot() == {}
+        sftp.disable_metrics()
+        sftp.exists(sftp.FOLDER)
+        assert metrics.snapshot() == {}
+
+    def test_batch_requests_are_counted(self, sftp):
+        metrics = sftp.enable_metrics()
+        paths = ["{}/{}".format(sftp.FOLDER, i) for i in range(20)]
+        sftp.exists_many(paths, window=8)
+        assert metrics.snapshot()["stat"]["count"] == 20
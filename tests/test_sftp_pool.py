@@ -0,0 +1,80 @@
+"""
+Tests for `Transport.open_sftp_pool`.
+"""
+
+import threading
+import time
+
+import pytest
+from paramiko.ssh_exception import SSHException
+
+from .util import slow
+
+
+@slow
+class TestSFTPSessionPool(object):
+    def test_sessions_are_reused(self, sftp_server):
+        with sftp_server.open_sftp_pool() as pool:
+            with pool.session() as first:
+                pass
+            with pool.session() as second:
+                assert second is first
+            assert (pool.created, pool.checkouts, pool.size) == (1, 2, 1)
+
+    def test_min_size_is_opened_up_front(self, sftp_server):
+        with sftp_server.open_sftp_pool(min_size=2) as pool:
+            assert (pool.created, pool.idle) == (2, 2)
+
+    def test_cwd_is_reset_on_return(self, sftp_server, sftp):
+        with sftp_server.open_sftp_pool() as pool:
+            with pool.session() as client:
+                client.chdir(sftp.FOLDER)
+            with pool.session() as client:
+                assert client.getcwd() is None
+
+    def test_exhaustion_waits_for_a_return(self, sftp_server):
+        with sftp_server.open_sftp_pool(max_size=1) as pool:
+            held = pool.checkout()
+            timer = threading.Timer(0.2, pool.checkin, [held])
+            timer.start()
+            with pool.session() as client:
+                assert client is held
+            timer.join()
+            assert pool.exhausted == 1
+            assert pool.wait_time >= 0.1
+
+    def test_checkout_timeout(self, sftp_server):
+        with sftp_server.open_sftp_pool(max_size=1, timeout=0.1) as pool:
+            with pool.session():
+                with pytest.raises(SSHException):
+                    pool.checkout()
+
+    def test_closed_sessions_are_replaced(self, sftp_server):
+        with sftp_server.open_sftp_pool() as pool:
+            with pool.session() as first:
+                pass
+            first.get_channel().close()
+            with pool.session() as second:
+                assert second is not first
+                second.normalize(".")
+            assert (pool.created, pool.discarded, pool.size) == (2, 1, 1)
+
+    def test_idle_sessions_are_pinged(self, sftp_server, monkeypatch):
+        with sftp_server.open_sftp_pool(ping_after=0) as pool:
+            with pool.session() as client:
+                pings = []
+                monkeypatch.setattr(client, "normalize", pings.append)
+            with pool.session():
+                pass
+            assert pings == ["."]
+
+    def test_idle_timeout(self, sftp_server):
+        with sftp_server.open_sftp_pool(min_size=1, idle_timeout=0.1) as pool:
+            a = pool.checkout()
+            b = pool.checkout()
+            pool.checkin(a)
+            pool.checkin(b)
+            assert pool.size == 2
+            time.sleep(0.2)
+            pool.reap()
+            assert (pool.size, pool.idle) == (1, 1)
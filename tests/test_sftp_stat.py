@@ -0,0 +1,91 @@
+"""
+Tests for `SFTPStat` and where `SFTPClient` uses it.
+"""
+
+import os
+import sys
+
+from paramiko.sftp_attr import SFTPAttributes
+
+from paramiko_stat.sftp_stat import SFTPStat
+
+
+def make_attributes():
+    attr = SFTPAttributes()
+    attr.st_size = 123
+    attr.st_uid = 1000
+    attr.st_gid = 100
+    attr.st_mode = 0o100644
+    attr.st_atime = 1000000000
+    attr.st_mtime = 1100000000
+    return attr
+
+
+class TestSFTPStat(object):
+    def test_conversion(self):
+        st = SFTPStat.from_attributes(make_attributes())
+        assert st == (123, 1000, 100, 0o100644, 1000000000, 1100000000)
+        attr = st.to_attributes()
+        assert isinstance(attr, SFTPAttributes)
+        assert str(attr) == str(make_attributes())
+        assert SFTPStat.from_attributes(attr) == st
+
+    def test_kinds(self):
+        st = SFTPStat.from_attributes(make_attributes())
+        assert (st.is_file, st.is_dir, st.is_symlink) == (True, False, False)
+        st = st._replace(st_mode=0o40755)
+        assert (st.is_file, st.is_dir, st.is_symlink) == (False, True, False)
+        st = st._replace(st_mode=0o120777)
+        assert (st.is_file, st.is_dir, st.is_symlink) == (False, False, True)
+        st = st._replace(st_mode=None)
+        assert (st.is_file, st.is_dir, st.is_symlink) == (False, False, False)
+
+    def test_smaller_than_attributes(self):
+        attr = make_attributes()
+        st = SFTPStat.from_attributes(attr)
+        assert not hasattr(st, "__dict__")
+        assert sys.getsizeof(st) < sys.getsizeof(attr) + sys.getsizeof(
+            attr.__dict__
+        )
+
+
+class TestClientUse(object):
+    def test_stat_many_compact(self, sftp):
+        path = sftp.FOLDER + "/file"
+        with open(path, "wb") as f:
+            f.write(b"x" * 10)
+        missing = sftp.FOLDER + "/missing"
+        found = sftp.stat_many([path, missing], compact=True)
+        assert found[missing] is None
+        st = os.stat(path)
+        assert found[path] == (
+            10,
+            st.st_uid,
+            st.st_gid,
+            st.st_mode,
+            int(st.st_atime),
+            int(st.st_mtime),
+        )
+        assert isinstance(
+            sftp.lstat_many([path], compact=True)[path], SFTPStat
+        )
+        assert isinstance(sftp.stat_many([path])[path], SFTPAttributes)
+
+    def test_cache_holds_compact_results(self, sftp):
+        sftp.enable_stat_cache(ttl=60)
+        path = sftp.FOLDER + "/file"
+        open(path, "wb").close()
+        first = sftp.stat_many([path])[path]
+        assert isinstance(first, SFTPAttributes)
+        cached = sftp.stat_cache._entries[(path.encode(), True)][1]
+        assert isinstance(cached, SFTPStat)
+        # Still handed out as SFTPAttributes unless asked otherwise
+        again = sftp.stat_many([path])[path]
+        assert isinstance(again, SFTPAttributes)
+        assert again.st_mode == first.st_mode
+        assert sftp.stat_many([path], compact=True)[path] is cached
+
+    def test_path_kind(self, sftp):
+        kind = sftp.path_kind(sftp.FOLDER)
+        assert isinstance(kind.lstat, SFTPStat)
+        assert kind.lstat.is_dir
@@ -0,0 +1,157 @@
+"""
+Tests for the opt-in stat cache behind the existence predicates.
+"""
+
+import pytest
+
+from paramiko_stat import sftp_cache
+from paramiko_stat.sftp_cache import MISSING, StatCache
+
+from .util import slow
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(sftp_cache.time, "monotonic", clock)
+    return clock
+
+
+class TestStatCache(object):
+    def test_miss_then_hit(self):
+        cache = StatCache()
+        assert cache.get(b"/a", True) is MISSING
+        cache.put(b"/a", True, "attr")
+        assert cache.get(b"/a", True) == "attr"
+        assert cache.get(b"/a", False) is MISSING
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_entries_expire(self, clock):
+        cache = StatCache(ttl=5, negative_ttl=1)
+        cache.put(b"/a", True, "attr")
+        cache.put(b"/b", True, None)
+        clock.now += 2
+        assert cache.get(b"/a", True) == "attr"
+        assert cache.get(b"/b", True) is MISSING
+        clock.now += 5
+        assert cache.get(b"/a", True) is MISSING
+        assert cache.expirations == 2
+
+    def test_negative_results_can_be_disabled(self):
+        cache = StatCache(negative_ttl=0)
+        cache.put(b"/a", True, None)
+        assert cache.get(b"/a", True) is MISSING
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        cache = StatCache(max_entries=2)
+        cache.put(b"/a", True, "a")
+        cache.put(b"/b", True, "b")
+        cache.get(b"/a", True)
+        cache.put(b"/c", True, "c")
+        assert cache.get(b"/b", True) is MISSING
+        assert cache.get(b"/a", True) == "a"
+        assert cache.evictions == 1
+
+    def test_recursive_invalidation(self):
+        cache = StatCache()
+        for path in (b"/d", b"/d/x", b"/d/x/y", b"/dx"):
+            cache.put(path, True, "attr")
+            cache.put(path, False, "attr")
+        cache.invalidate(b"/d", recursive=True)
+        assert len(cache) == 2
+        assert cache.get(b"/dx", False) == "attr"
+
+
+@slow
+class TestCachedPredicates(object):
+    def test_repeated_predicates_hit_the_cache(self, sftp):
+        cache = sftp.enable_stat_cache()
+        path = "{}/file".format(sftp.FOLDER)
+        sftp.open(path, "w").close()
+        assert sftp.exists(path)
+        assert sftp.isfile(path)
+        assert not sftp.isdir(path)
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_missing_paths_are_cached(self, sftp):
+        cache = sftp.enable_stat_cache()
+        path = "{}/missing".format(sftp.FOLDER)
+        assert not sftp.exists(path)
+        assert not sftp.exists(path)
+        assert cache.negative_hits == 1
+
+    @pytest.mark.parametrize(
+        "mutate",
+        [
+            lambda sftp, path: sftp.remove(path),
+            lambda sftp, path: sftp.rename(path, path + ".new"),
+            lambda sftp, path: sftp.open(path, "w").close(),
+            lambda sftp, path: sftp.chmod(path, 0o600),
+        ],
+    )
+    def test_mutations_invalidate(self, sftp, mutate):
+        cache = sftp.enable_stat_cache(ttl=60)
+        path = "{}/file".format(sftp.FOLDER)
+        sftp.open(path, "w").close()
+        assert sftp.exists(path)
+        mutate(sftp, path)
+        misses = cache.misses
+        sftp.exists(path)
+        assert cache.misses == misses + 1
+
+    def test_mkdir_invalidates_negative_result(self, sftp):
+        sftp.enable_stat_cache(ttl=60)
+        path = "{}/dir".format(sftp.FOLDER)
+        assert not sftp.isdir(path)
+        sftp.mkdir(path)
+        assert sftp.isdir(path)
+
+    def test_batch_methods_share_the_cache(self, sftp):
+        cache = sftp.enable_stat_cache()
+        path = "{}/file".format(sftp.FOLDER)
+        sftp.open(path, "w").close()
+        assert sftp.exists_many([path]) == {path: True}
+        assert sftp.exists(path)
+        assert cache.hits == 1
+
+    def test_batch_stat_answers_followed_predicates(self, sftp, sent_requests):
+        cache = sftp.enable_stat_cache(ttl=60)
+        path = "{}/file".format(sftp.FOLDER)
+        missing = "{}/missing".format(sftp.FOLDER)
+        sftp.open(path, "w").close()
+        sftp.stat_many([path, missing])
+        sent = len(sent_requests)
+        misses = cache.misses
+        assert sftp.exists(path)
+        assert sftp.isfile(path)
+        assert not sftp.isdir(path)
+        assert not sftp.exists(missing)
+        assert len(sent_requests) == sent
+        assert cache.misses == misses
+
+    def test_batch_stat_of_a_symlink(self, sftp):
+        # A followed stat describes the target, never the link itself
+        sftp.enable_stat_cache(ttl=60)
+        target = "{}/file".format(sftp.FOLDER)
+        link = "{}/link".format(sftp.FOLDER)
+        sftp.open(target, "w").close()
+        sftp.symlink("file", link)
+        assert sftp.exists_many([link]) == {link: True}
+        assert sftp.islink(link)
+        assert sftp.lexists(link)
+        assert sftp.islink_many([link]) == {link: True}
+
+    def test_disabled_by_default(self, sftp):
+        assert sftp.stat_cache is None
+        sftp.enable_stat_cache()
+        sftp.disable_stat_cache()
+        assert sftp.stat_cache is None
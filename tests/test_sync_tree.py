@@ -0,0 +1,163 @@
+"""
+Tests for `SFTPClient.sync_tree`.
+"""
+
+import os
+
+import pytest
+
+from paramiko_stat.sftp_stat import SFTPStat
+from paramiko_stat.sftp_sync import _Sync
+
+from .util import slow
+
+
+def write(path, data, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def snapshot(top):
+    """
+    Map each file below ``top`` to ``(contents, mode, mtime)``, and each
+    directory to ``None``.
+    """
+    found = {}
+    for dirpath, dirnames, filenames in os.walk(top):
+        rel = os.path.relpath(dirpath, top)
+        for name in dirnames:
+            found[os.path.normpath(os.path.join(rel, name))] = None
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                found[os.path.normpath(os.path.join(rel, name))] = (
+                    f.read(),
+                    st.st_mode & 0o777,
+                    int(st.st_mtime),
+                )
+    return found
+
+
+@pytest.fixture
+def source(sftp):
+    top = sftp.FOLDER + "/src"
+    write(top + "/a", b"a" * 100, mtime=1000000000)
+    write(top + "/sub/b", b"b" * 2000, mtime=1100000000)
+    write(top + "/sub/deeper/c", b"", mtime=1200000000)
+    os.chmod(top + "/a", 0o640)
+    os.makedirs(top + "/empty")
+    return top
+
+
+@slow
+class TestSyncTree(object):
+    def test_download_copies_everything(self, sftp, source, tmp_path):
+        target = str(tmp_path / "copy")
+        summary = sftp.sync_tree(source, target)
+        assert snapshot(target) == snapshot(source)
+        assert (summary.files_sent, summary.bytes_sent) == (3, 2100)
+        assert (summary.files_skipped, summary.bytes_skipped) == (0, 0)
+        assert summary.dirs_created == 4
+        assert summary.errors == []
+
+    def test_second_run_sends_nothing(self, sftp, source, tmp_path):
+        target = str(tmp_path / "copy")
+        sftp.sync_tree(source, target)
+        summary = sftp.sync_tree(source, target)
+        assert (summary.files_sent, summary.files_skipped) == (0, 3)
+        assert summary.bytes_skipped == 2100
+        assert summary.dirs_created == 0
+
+    def test_only_changed_files_are_sent(self, sftp, source, tmp_path):
+        target = str(tmp_path / "copy")
+        sftp.sync_tree(source, target)
+        write(source + "/a", b"A" * 100, mtime=1300000000)
+        write(source + "/sub/b", b"b" * 2001)
+        summary = sftp.sync_tree(source, target)
+        assert (summary.files_sent, summary.bytes_sent) == (2, 2101)
+        assert snapshot(target) == snapshot(source)
+
+    def test_checksum_ignores_mtime(self, sftp, source, tmp_path):
+        target = str(tmp_path / "copy")
+        sftp.sync_tree(source, target)
+        os.utime(source + "/sub/b", (1, 1))
+        write(source + "/a", b"A" * 100, mtime=1000000000)
+        summary = sftp.sync_tree(source, target, checksum="md5")
+        assert summary.files_sent == 1
+        with open(os.path.join(target, "a"), "rb") as f:
+            assert f.read() == b"A" * 100
+
+    def test_delete(self, sftp, source, tmp_path):
+        target = str(tmp_path / "copy")
+        write(os.path.join(target, "extra"), b"x")
+        write(os.path.join(target, "old", "dir", "f"), b"x")
+        summary = sftp.sync_tree(source, target)
+        assert summary.deleted == 0
+        assert os.path.exists(os.path.join(target, "extra"))
+        summary = sftp.sync_tree(source, target, delete=True)
+        assert summary.deleted == 4
+        assert snapshot(target) == snapshot(source)
+
+    def test_upload(self, sftp, source, tmp_path):
+        target = sftp.FOLDER + "/up"
+        local = str(tmp_path)
+        sftp.sync_tree(source, local)
+        summary = sftp.sync_tree(target, local, direction="upload")
+        assert summary.files_sent == 3
+        assert snapshot(target) == snapshot(local)
+        write(target + "/extra/f", b"x")
+        write(local + "/a", b"new")
+        summary = sftp.sync_tree(
+            target, local, direction="upload", delete=True, workers=1
+        )
+        assert (summary.files_sent, summary.deleted) == (1, 2)
+        assert snapshot(target) == snapshot(local)
+
+    def test_missing_source(self, sftp, tmp_path):
+        with pytest.raises(IOError):
+            sftp.sync_tree(
+                sftp.FOLDER + "/missing", str(tmp_path), delete=True
+            )
+        with pytest.raises(IOError):
+            sftp.sync_tree(
+                sftp.FOLDER, str(tmp_path / "missing"), direction="upload"
+            )
+
+    def test_symlinked_directories_are_skipped(self, sftp, source, tmp_path):
+        os.symlink("sub", source + "/linked")
+        target = str(tmp_path / "copy")
+        summary = sftp.sync_tree(source, target)
+        assert not os.path.lexists(os.path.join(target, "linked"))
+        assert summary.dirs_created == 4
+        assert summary.errors == []
+
+    def test_directory_failures_are_recorded(self, sftp, source, tmp_path):
+        target = str(tmp_path / "copy")
+        # A file where the sub directory should go
+        write(os.path.join(target, "sub"), b"in the way")
+        summary = sftp.sync_tree(source, target)
+        failed = [rel for rel, e in summary.errors]
+        assert failed[0] == "sub"
+        assert "sub/b" in failed
+        with open(os.path.join(target, "a"), "rb") as f:
+            assert f.read() == b"a" * 100
+        assert os.path.isdir(os.path.join(target, "empty"))
+
+    def test_missing_times(self, sftp, source, tmp_path):
+        # As from a server that doesn't send them
+        attr = SFTPStat.from_attributes(sftp.stat(source + "/a"))
+        attr = attr._replace(st_atime=None, st_mtime=None)
+        sync = _Sync(sftp, source, str(tmp_path), "download", False, None)
+        sync._send(sftp, "a", attr)
+        assert sync.summary.errors == []
+        assert sync.summary.files_sent == 1
+        with open(str(tmp_path / "a"), "rb") as f:
+            assert f.read() == b"a" * 100
+
+    def test_bad_direction(self, sftp, tmp_path):
+        with pytest.raises(ValueError):
+            sftp.sync_tree(sftp.FOLDER, str(tmp_path), direction="sideways")
@@ -0,0 +1,88 @@
+"""
+Tests for `SFTPClient.walk`.
+"""
+
+import os
+
+import pytest
+
+from .util import slow
+
+
+def normalized(results):
+    return sorted(
+        (top, sorted(dirs), sorted(files)) for top, dirs, files in results
+    )
+
+
+@pytest.fixture
+def tree(sftp):
+    """
+    Build a small tree locally (the stub server serves the working
+    directory) and return its top.
+    """
+    top = sftp.FOLDER
+    for d in ("a", "a/aa", "a/ab", "b", "b/ba/baa", "c"):
+        os.makedirs(os.path.join(top, d))
+    for f in ("f1", "a/f2", "a/aa/f3", "b/ba/baa/f4", "c/f5"):
+        with open(os.path.join(top, f), "w"):
+            pass
+    os.symlink("a", os.path.join(top, "link_to_a"))
+    os.symlink("f1", os.path.join(top, "link_to_f1"))
+    return top
+
+
+@slow
+class TestWalk(object):
+    @pytest.mark.parametrize("topdown", [True, False])
+    def test_matches_os_walk(self, sftp, tree, topdown):
+        expected = normalized(os.walk(tree, topdown=topdown))
+        assert normalized(sftp.walk(tree, topdown=topdown)) == expected
+
+    def test_followlinks(self, sftp, tree):
+        expected = normalized(os.walk(tree, followlinks=True))
+        assert normalized(sftp.walk(tree, followlinks=True)) == expected
+
+    @pytest.mark.parametrize("topdown", [True, False])
+    def test_order_does_not_depend_on_window(self, sftp, tree, topdown):
+        serial = list(sftp.walk(tree, topdown=topdown, window=1))
+        for window in (2, 16):
+            assert list(sftp.walk(tree, topdown=topdown, window=window)) == (
+                serial
+            )
+
+    def test_parents_before_children_topdown(self, sftp, tree):
+        seen = []
+        for top, dirs, files in sftp.walk(tree):
+            assert top == tree or os.path.dirname(top) in seen
+            seen.append(top)
+
+    def test_children_before_parents_bottom_up(self, sftp, tree):
+        seen = []
+        for top, dirs, files in sftp.walk(tree, topdown=False):
+            for d in dirs:
+                if d != "link_to_a":
+                    assert os.path.join(top, d) in seen
+            seen.append(top)
+
+    def test_pruning(self, sftp, tree):
+        visited = []
+        for top, dirs, files in sftp.walk(tree):
+            visited.append(top)
+            if "a" in dirs:
+                dirs.remove("a")
+        assert os.path.join(tree, "a") not in visited
+        assert os.path.join(tree, "b", "ba", "baa") in visited
+
+    def test_onerror(self, sftp):
+        errors = []
+        missing = "{}/missing".format(sftp.FOLDER)
+        assert list(sftp.walk(missing, onerror=errors.append)) == []
+        assert len(errors) == 1
+        assert errors[0].filename == missing
+
+    def test_stopping_early_leaves_client_usable(self, sftp, tree):
+        walker = sftp.walk(tree, window=4)
+        next(walker)
+        walker.close()
+        assert sorted(sftp.listdir(tree)) == sorted(os.listdir(tree))